@@ -24,6 +24,26 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    PRINCIPAL_CACHE_TTL: int = 30  # Seconds an authenticated user is reused without a DB lookup (0 = off)
+    SESSION_SYNC_SECONDS: int = 5  # Ended sessions reach other workers within this delay
+    
+    # Worker Pools (per API worker)
+    CPU_POOL_WORKERS: int = 2  # Threads for bcrypt and other CPU-heavy calls
+    BLOCKING_THREADS: int = 40  # Threads for sync endpoints and dependencies
+    
+    # Background Jobs
+    JOB_THREAD_WORKERS: int = 2  # Concurrent jobs per API worker
+    JOB_PROCESS_WORKERS: int = 2  # Process pool for CPU-bound steps (0 = run inline)
+    JOB_STALE_SECONDS: int = 900  # Running jobs without heartbeat are marked as interrupted
+    
+    # Cell Tower Database (OpenCellID-style CSV, optionally .gz)
+    CELL_TOWER_DB_PATH: str = ""
+    CELL_TOWER_MCCS: str = ""  # Load only these countries, e.g. "520" (empty = all)
+    CELL_TOWER_DEFAULT_MCC: str = ""  # Assumed for cell ids recorded without a country code
+    
+    # Login Tracking
+    GEOIP_DB_PATH: str = ""  # DB-IP Lite / IP2Location LITE city CSV (optionally .gz), or its compiled .bin
+    LOGIN_LOG_QUEUE_SIZE: int = 10000  # Attempts waiting to be written (more are dropped)
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000,https://wonderful-wave-0486dd100.6.azurestaticapps.net"
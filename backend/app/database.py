@@ -55,4 +55,9 @@ def init_db():
     from app.models import user, organization, case, money_flow  # noqa
     from app.models import evidence  # noqa - import separately to avoid circular
     from app.models import registration, session  # noqa - Registration & Session models
+    from app.models import job  # noqa - Background jobs
+    from app.models import graph_change  # noqa - Delta sync tombstones
     Base.metadata.create_all(bind=engine)
+
+    from app.services.search import setup_search
+    setup_search(engine)  # SQLite full-text tables and triggers
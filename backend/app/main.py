@@ -7,6 +7,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.database import init_db
+from app.services.cell_towers import get_cell_index
+from app.services.jobs import start_job_runner, shutdown_job_runner
+from app.utils.blocking import configure_threadpool, shutdown_cpu_pool
+from app.utils.login_tracking import start_login_logger, shutdown_login_logger
+from app.utils.sessions import start_session_sync, shutdown_session_sync
 
 
 @asynccontextmanager
@@ -16,8 +21,17 @@ async def lifespan(app: FastAPI):
     print("📦 Initializing database...")
     init_db()
     print("✅ Database ready!")
+    configure_threadpool()
+    get_cell_index()  # Load towers before serving - not on the first request
+    start_job_runner()
+    start_login_logger()
+    start_session_sync()
     yield
     print("👋 Shutting down...")
+    shutdown_job_runner()
+    shutdown_login_logger()
+    shutdown_session_sync()
+    shutdown_cpu_pool()
 
 
 app = FastAPI(
@@ -77,6 +91,7 @@ routers_to_load = [
     ("crypto_transactions", "app.routers.crypto_transactions", "router"),
     ("admin_api_keys", "app.routers.admin_api_keys", "router"),
     ("notifications", "app.routers.notifications", "router"),
+    ("jobs", "app.routers.jobs", "router"),
 ]
 
 for name, module_path, router_attr in routers_to_load:
@@ -13,6 +13,8 @@ from app.models.login_history import LoginHistory
 from app.models.call_record import CallRecord, CallEntity, CallLink, CallType
 from app.models.location import LocationPoint, LocationCluster, LocationSource
 from app.models.crypto import CryptoTransaction, CryptoWallet, BlockchainType, RiskFlag
+from app.models.job import BackgroundJob, JobStatus
+from app.models.graph_change import GraphTombstone
 
 __all__ = [
     "Organization",
@@ -41,5 +43,10 @@ __all__ = [
     "CryptoTransaction",
     "CryptoWallet",
     "BlockchainType",
-    "RiskFlag"
+    "RiskFlag",
+    # Jobs
+    "BackgroundJob",
+    "JobStatus",
+    # Delta sync
+    "GraphTombstone"
 ]
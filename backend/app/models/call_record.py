@@ -4,9 +4,10 @@ Store call logs imported from forensic tools (Cellebrite, UFED, XRY)
 """
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float, Index
+from sqlalchemy.orm import relationship, validates
 from app.database import Base
+from app.utils.phone import normalize_phone
 
 
 class CallType(str, PyEnum):
@@ -39,6 +40,10 @@ class CallRecord(Base):
     partner_number = Column(String(50), nullable=False)  # The other party
     partner_name = Column(String(255), nullable=True)
     call_type = Column(Enum(CallType), default=CallType.UNKNOWN)
+
+    # Normalized numbers (see utils.phone) - cross-case contact lookup
+    device_number_norm = Column(String(32), nullable=True)
+    partner_number_norm = Column(String(32), nullable=True)
     
     # Timing
     start_time = Column(DateTime, nullable=True)
@@ -50,6 +55,10 @@ class CallRecord(Base):
     cell_tower_location = Column(String(255), nullable=True)
     gps_lat = Column(Float, nullable=True)
     gps_lon = Column(Float, nullable=True)
+    # Resolved tower position of cell_id (services.cell_towers)
+    cell_lat = Column(Float, nullable=True)
+    cell_lon = Column(Float, nullable=True)
+    cell_range_m = Column(Integer, nullable=True)
     
     # Flags
     is_suspect_call = Column(Boolean, default=False)  # Flagged as suspicious
@@ -69,6 +78,23 @@ class CallRecord(Base):
     # Relationships
     case = relationship("Case", back_populates="call_records")
     
+    __table_args__ = (
+        # number -> cases/devices lookups
+        Index("ix_call_records_partner_norm_case", "partner_number_norm", "case_id"),
+        Index("ix_call_records_device_norm_case", "device_number_norm", "case_id"),
+        Index("ix_call_records_case_id", "case_id"),  # Per-case counts/lists
+    )
+    
+    @validates("partner_number")
+    def _set_partner_norm(self, key, value):
+        self.partner_number_norm = normalize_phone(value)
+        return value
+    
+    @validates("device_number")
+    def _set_device_norm(self, key, value):
+        self.device_number_norm = normalize_phone(value)
+        return value
+    
     def __repr__(self):
         return f"<CallRecord {self.device_number} -> {self.partner_number}>"
 
@@ -105,6 +131,8 @@ class CallEntity(Base):
     
     # Visual
     color = Column(String(20), nullable=True)
+    x_position = Column(Float, nullable=True)  # Set by the layout job
+    y_position = Column(Float, nullable=True)
     
     # Timestamps
     first_seen = Column(DateTime, nullable=True)
@@ -115,6 +143,10 @@ class CallEntity(Base):
     # Relationships
     case = relationship("Case", back_populates="call_entities")
     
+    __table_args__ = (
+        Index("ix_call_entities_case_updated", "case_id", "updated_at"),  # Change feed
+    )
+    
     def __repr__(self):
         return f"<CallEntity {self.entity_type}: {self.label}>"
 
@@ -154,5 +186,9 @@ class CallLink(Base):
     source_entity = relationship("CallEntity", foreign_keys=[source_entity_id])
     target_entity = relationship("CallEntity", foreign_keys=[target_entity_id])
     
+    __table_args__ = (
+        Index("ix_call_links_case_updated", "case_id", "updated_at"),  # Change feed
+    )
+    
     def __repr__(self):
         return f"<CallLink {self.source_entity_id} -> {self.target_entity_id}>"
@@ -77,6 +77,9 @@ class Case(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Bumped by every money-flow node/edge write (graph caches and ETags)
+    graph_version = Column(Integer, default=0, nullable=False)
+    
     # Soft Delete
     is_active = Column(Boolean, default=True, nullable=False, index=True)
     deleted_at = Column(DateTime, nullable=True)
@@ -4,7 +4,7 @@ Store cryptocurrency transaction data from imported files
 """
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -86,6 +86,10 @@ class CryptoTransaction(Base):
     # Relationships
     case = relationship("Case", back_populates="crypto_transactions")
     
+    __table_args__ = (
+        Index("ix_crypto_transactions_case_id", "case_id"),  # Per-case counts/lists
+    )
+    
     def __repr__(self):
         return f"<CryptoTransaction {self.blockchain}: {self.from_address[:10]}... -> {self.to_address[:10]}...>"
 
@@ -0,0 +1,30 @@
+"""
+Graph Change Models
+Tombstones for deleted graph objects, read by the delta sync endpoints
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from app.database import Base
+
+
+class GraphTombstone(Base):
+    """
+    A deleted node/edge (money flow) or entity/link (call network).
+    object_type "all" marks a rebuild of the whole graph (clients resync fully).
+    """
+
+    __tablename__ = "graph_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    graph = Column(String(20), nullable=False)  # money_flow, call_network
+    object_type = Column(String(20), nullable=False)  # node, edge, entity, link, all
+    object_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_graph_tombstones_case_graph_deleted", "case_id", "graph", "deleted_at"),
+    )
+
+    def __repr__(self):
+        return f"<GraphTombstone {self.graph} {self.object_type} {self.object_id}>"
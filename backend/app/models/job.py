@@ -0,0 +1,57 @@
+"""
+Background Job Model
+Persisted status and progress of long-running analytics jobs
+"""
+from datetime import datetime
+from enum import Enum as PyEnum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text
+from app.database import Base
+
+
+class JobStatus(str, PyEnum):
+    """Job lifecycle"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class BackgroundJob(Base):
+    """
+    Long-running job executed by the in-process job runner
+    (network generation, clustering, tracing, ...)
+    """
+
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(100), nullable=False, index=True)
+
+    # Scope (plain column, no FK - jobs may outlive the case, e.g. purge)
+    case_id = Column(Integer, nullable=True, index=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # Status
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True)
+    progress = Column(Integer, default=0)  # 0-100
+    message = Column(String(500), nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+
+    # Payload
+    params = Column(Text, nullable=True)  # JSON
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Heartbeat
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def __repr__(self):
+        return f"<BackgroundJob {self.id} {self.job_type}: {self.status}>"
@@ -4,9 +4,10 @@ Store GPS, Cell Tower, WiFi location data from forensic extraction
 """
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float, Index
+from sqlalchemy.orm import relationship, validates
 from app.database import Base
+from app.utils.geo import grid_cell
 
 
 class LocationSource(str, PyEnum):
@@ -41,6 +42,7 @@ class LocationPoint(Base):
     longitude = Column(Float, nullable=False)
     altitude = Column(Float, nullable=True)
     accuracy_meters = Column(Float, nullable=True)
+    grid_cell = Column(Integer, nullable=True)  # utils.geo.grid_cell - spatial index
     
     # Source
     source = Column(Enum(LocationSource), default=LocationSource.UNKNOWN)
@@ -79,6 +81,23 @@ class LocationPoint(Base):
     # Relationships
     case = relationship("Case", back_populates="location_points")
     
+    __table_args__ = (
+        # Per-person track scans (stay-point detection)
+        Index("ix_location_points_case_suspect_time", "case_id", "suspect_id", "timestamp"),
+        # Bounding box + time range queries
+        Index("ix_location_points_case_cell_time", "case_id", "grid_cell", "timestamp"),
+        # Time window queries (timeline detail)
+        Index("ix_location_points_case_time", "case_id", "timestamp"),
+    )
+    
+    @validates("latitude", "longitude")
+    def _set_grid_cell(self, key, value):
+        lat = value if key == "latitude" else self.latitude
+        lon = value if key == "longitude" else self.longitude
+        if lat is not None and lon is not None:
+            self.grid_cell = grid_cell(lat, lon)
+        return value
+    
     def __repr__(self):
         return f"<LocationPoint {self.suspect_name} @ {self.latitude},{self.longitude}>"
 
@@ -111,6 +130,7 @@ class LocationCluster(Base):
     is_suspicious = Column(Boolean, default=False)
     risk_score = Column(Integer, default=0)
     notes = Column(Text, nullable=True)
+    is_generated = Column(Boolean, default=False)  # Created by stay-point clustering
     
     # Timestamps
     first_visit = Column(DateTime, nullable=True)
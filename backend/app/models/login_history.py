@@ -3,9 +3,10 @@ Login History Model
 Track user login activity with device and location info
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Numeric
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Numeric, Index
+from sqlalchemy.orm import relationship, validates
 from app.database import Base
+from app.utils.geo import grid_cell
 
 
 class LoginHistory(Base):
@@ -34,6 +35,7 @@ class LoginHistory(Base):
     latitude = Column(Numeric(10, 6), nullable=True)
     longitude = Column(Numeric(10, 6), nullable=True)
     isp = Column(String(200), nullable=True)
+    grid_cell = Column(Integer, nullable=True)  # utils.geo.grid_cell - map aggregation
     
     # Login Status
     login_success = Column(Boolean, default=True)
@@ -42,5 +44,18 @@ class LoginHistory(Base):
     # Relationships
     user = relationship("User", backref="login_history")
     
+    __table_args__ = (
+        # Map cells of a time window
+        Index("ix_login_history_login_at_cell", "login_at", "grid_cell"),
+    )
+    
+    @validates("latitude", "longitude")
+    def _set_grid_cell(self, key, value):
+        lat = value if key == "latitude" else self.latitude
+        lon = value if key == "longitude" else self.longitude
+        if lat is not None and lon is not None:
+            self.grid_cell = grid_cell(float(lat), float(lon))
+        return value
+    
     def __repr__(self):
         return f"<LoginHistory user_id={self.user_id} at {self.login_at}>"
@@ -4,7 +4,7 @@ Nodes and Edges for money flow graph visualization
 """
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -71,8 +71,13 @@ class MoneyFlowNode(Base):
     
     # Relationships
     case = relationship("Case", back_populates="money_flow_nodes")
-    outgoing_edges = relationship("MoneyFlowEdge", back_populates="from_node", foreign_keys="MoneyFlowEdge.from_node_id")
-    incoming_edges = relationship("MoneyFlowEdge", back_populates="to_node", foreign_keys="MoneyFlowEdge.to_node_id")
+    outgoing_edges = relationship("MoneyFlowEdge", back_populates="from_node", foreign_keys="MoneyFlowEdge.from_node_id", cascade="all, delete")
+    incoming_edges = relationship("MoneyFlowEdge", back_populates="to_node", foreign_keys="MoneyFlowEdge.to_node_id", cascade="all, delete")
+    
+    __table_args__ = (
+        # Whole-graph loads and change feeds per case
+        Index("ix_money_flow_nodes_case_updated", "case_id", "updated_at"),
+    )
     
     def __repr__(self):
         return f"<Node {self.node_type}: {self.label}>"
@@ -123,5 +128,10 @@ class MoneyFlowEdge(Base):
     from_node = relationship("MoneyFlowNode", back_populates="outgoing_edges", foreign_keys=[from_node_id])
     to_node = relationship("MoneyFlowNode", back_populates="incoming_edges", foreign_keys=[to_node_id])
     
+    __table_args__ = (
+        # Whole-graph loads and change feeds per case
+        Index("ix_money_flow_edges_case_updated", "case_id", "updated_at"),
+    )
+    
     def __repr__(self):
         return f"<Edge {self.from_node_id} -> {self.to_node_id}: {self.amount}>"
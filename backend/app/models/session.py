@@ -3,7 +3,7 @@ Session Model
 Tracks active user sessions for single-device policy
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -38,5 +38,10 @@ class UserSession(Base):
     # Relationships
     user = relationship("User", back_populates="sessions")
     
+    __table_args__ = (
+        # Sessions ended since the last sync (utils.sessions)
+        Index("ix_user_sessions_active_expired", "is_active", "expired_at"),
+    )
+    
     def __repr__(self):
         return f"<UserSession user_id={self.user_id} active={self.is_active}>"
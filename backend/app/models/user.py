@@ -63,6 +63,7 @@ class User(Base):
     last_login_at = Column(DateTime, nullable=True)
     failed_login_attempts = Column(Integer, default=0)
     locked_until = Column(DateTime, nullable=True)
+    token_version = Column(Integer, default=0, nullable=False)  # Bump to revoke issued tokens
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
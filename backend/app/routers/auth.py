@@ -1,16 +1,21 @@
 """
 Authentication Router
 Login, Register, Token refresh endpoints with login tracking
+
+Handlers that touch the database are sync (`def`) so their queries run on
+the worker thread pool, not the event loop; bcrypt goes to the bounded
+CPU pool (utils.blocking).
 """
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.config import settings
 from app.models.user import User, UserRole
 from app.models.organization import Organization
-from app.models.login_history import LoginHistory
+from app.models.session import UserSession
 from app.schemas.auth import (
     LoginRequest, 
     LoginResponse, 
@@ -18,67 +23,25 @@ from app.schemas.auth import (
     TokenRefreshRequest
 )
 from app.schemas.user import UserRegister, UserResponse
+from app.utils.blocking import call_cpu_bound
 from app.utils.security import (
     verify_password,
     get_password_hash,
     create_access_token,
     create_refresh_token,
     decode_token,
-    get_current_user
+    get_current_user,
+    invalidate_principal,
+    security
 )
-from app.utils.login_tracking import parse_user_agent, get_ip_geolocation, get_client_ip
+from app.utils.login_tracking import log_login_attempt, get_client_ip
+from app.utils.sessions import open_session, end_sessions
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-async def log_login_attempt(
-    db: Session,
-    user_id: int,
-    request: Request,
-    success: bool = True,
-    failure_reason: str = None
-):
-    """Log login attempt with device and location info"""
-    try:
-        # Get client info
-        ip_address = get_client_ip(request)
-        user_agent = request.headers.get("User-Agent", "")
-        
-        # Parse user agent
-        ua_info = parse_user_agent(user_agent)
-        
-        # Get IP geolocation
-        geo_info = await get_ip_geolocation(ip_address)
-        
-        # Create login history record
-        login_record = LoginHistory(
-            user_id=user_id,
-            login_at=datetime.utcnow(),
-            ip_address=ip_address,
-            user_agent=user_agent[:500] if user_agent else None,
-            device_type=ua_info["device_type"],
-            browser=ua_info["browser"],
-            os=ua_info["os"],
-            country=geo_info.get("country"),
-            country_code=geo_info.get("country_code"),
-            region=geo_info.get("region"),
-            city=geo_info.get("city"),
-            latitude=geo_info.get("latitude"),
-            longitude=geo_info.get("longitude"),
-            isp=geo_info.get("isp"),
-            login_success=success,
-            failure_reason=failure_reason
-        )
-        
-        db.add(login_record)
-        db.commit()
-    except Exception as e:
-        print(f"Error logging login: {e}")
-        # Don't fail the login if logging fails
-
-
 @router.post("/seed-admin")
-async def seed_admin(db: Session = Depends(get_db)):
+def seed_admin(db: Session = Depends(get_db)):
     """
     Create or reset admin user for development/testing
     Creates: admin@test.com / admin123
@@ -91,18 +54,19 @@ async def seed_admin(db: Session = Depends(get_db)):
     
     if existing:
         # Update password
-        existing.hashed_password = get_password_hash(admin_password)
+        existing.hashed_password = call_cpu_bound(get_password_hash, admin_password)
         existing.role = UserRole.SUPER_ADMIN
         existing.is_active = True
         existing.failed_login_attempts = 0
         existing.locked_until = None
         db.commit()
+        invalidate_principal(existing.id)
         return {"message": "Admin user password reset", "email": admin_email, "password": admin_password}
     else:
         # Create new admin
         user = User(
             email=admin_email,
-            hashed_password=get_password_hash(admin_password),
+            hashed_password=call_cpu_bound(get_password_hash, admin_password),
             first_name="Admin",
             last_name="User",
             role=UserRole.SUPER_ADMIN,
@@ -115,7 +79,7 @@ async def seed_admin(db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(
+def login(
     request: LoginRequest,
     fastapi_request: Request,
     db: Session = Depends(get_db)
@@ -137,14 +101,14 @@ async def login(
     # Check if locked
     if user.locked_until and user.locked_until > datetime.utcnow():
         # Log failed attempt
-        await log_login_attempt(db, user.id, fastapi_request, False, "Account locked")
+        log_login_attempt(user.id, fastapi_request, False, "Account locked")
         raise HTTPException(
             status_code=status.HTTP_423_LOCKED,
             detail="Account is temporarily locked. Please try again later."
         )
     
     # Verify password
-    if not verify_password(request.password, user.hashed_password):
+    if not call_cpu_bound(verify_password, request.password, user.hashed_password):
         # Increment failed attempts
         user.failed_login_attempts += 1
         if user.failed_login_attempts >= 5:
@@ -152,7 +116,7 @@ async def login(
         db.commit()
         
         # Log failed attempt
-        await log_login_attempt(db, user.id, fastapi_request, False, "Invalid password")
+        log_login_attempt(user.id, fastapi_request, False, "Invalid password")
         
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -162,7 +126,7 @@ async def login(
     # Check if active
     if not user.is_active:
         # Log failed attempt
-        await log_login_attempt(db, user.id, fastapi_request, False, "Account disabled")
+        log_login_attempt(user.id, fastapi_request, False, "Account disabled")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account is disabled"
@@ -172,13 +136,20 @@ async def login(
     user.failed_login_attempts = 0
     user.locked_until = None
     user.last_login_at = datetime.utcnow()
+    session_id = open_session(
+        db, user.id, get_client_ip(fastapi_request), fastapi_request.headers.get("User-Agent")
+    )
     db.commit()
+    invalidate_principal(user.id)
     
     # Log successful login
-    await log_login_attempt(db, user.id, fastapi_request, True)
+    log_login_attempt(user.id, fastapi_request, True)
     
     # Create tokens
-    token_data = {"sub": str(user.id), "email": user.email, "role": user.role.value}
+    token_data = {
+        "sub": str(user.id), "email": user.email, "role": user.role.value,
+        "tv": user.token_version, "sid": session_id
+    }
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     
@@ -194,7 +165,7 @@ async def login(
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(
+def register(
     request: UserRegister,
     db: Session = Depends(get_db)
 ):
@@ -227,7 +198,7 @@ async def register(
     # Create user
     user = User(
         email=request.email,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=call_cpu_bound(get_password_hash, request.password),
         first_name=request.first_name,
         last_name=request.last_name,
         phone=request.phone,
@@ -245,7 +216,7 @@ async def register(
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(
+def refresh_token(
     request: TokenRefreshRequest,
     db: Session = Depends(get_db)
 ):
@@ -269,8 +240,26 @@ async def refresh_token(
             detail="User not found or inactive"
         )
     
-    # Create new tokens
-    token_data = {"sub": str(user.id), "email": user.email, "role": user.role.value}
+    if user.token_version != payload.get("tv", 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked"
+        )
+    
+    # New tokens stay in the login's session - ended sessions can't be refreshed
+    token_data = {"sub": str(user.id), "email": user.email, "role": user.role.value, "tv": user.token_version}
+    session_id = payload.get("sid")
+    if session_id is not None:
+        active = db.query(UserSession.id).filter(
+            UserSession.session_token == session_id,
+            UserSession.is_active == True
+        ).first()
+        if not active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Session has ended"
+            )
+        token_data["sid"] = session_id
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     
@@ -293,7 +282,7 @@ async def get_current_user_info(
 
 
 @router.patch("/profile", response_model=UserResponse)
-async def update_profile(
+def update_profile(
     first_name: str = None,
     last_name: str = None,
     phone: str = None,
@@ -318,20 +307,25 @@ async def update_profile(
         current_user.position = position
     
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
     
     return UserResponse.model_validate(current_user)
 
 
 @router.post("/logout")
-async def logout(
-    current_user: User = Depends(get_current_user)
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Logout current user
-    Note: Client should discard tokens
+    Ends the token's session on the server (all workers reject it within
+    SESSION_SYNC_SECONDS); client should discard tokens
     """
-    # In a production system, you might want to:
-    # - Add token to a blacklist
-    # - Clear refresh tokens from database
+    payload = decode_token(credentials.credentials)
+    session_id = payload.get("sid") if payload else None
+    if session_id:
+        end_sessions(db, user_id=current_user.id, session_id=session_id)
     return {"message": "Logged out successfully"}
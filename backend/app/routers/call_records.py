@@ -4,15 +4,24 @@ API for Call Analysis data
 """
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from app.database import get_db
 from app.models.call_record import CallRecord, CallEntity, CallLink, CallType
 from app.models.case import Case
-from app.models.user import User
+from app.models.user import User, UserRole
 from app.routers.auth import get_current_user
+from app.utils.security import require_roles
+from app.utils.case_access import check_case_access
+from app.schemas.job import JobSubmitResponse
+from app.services.graph_changes import get_changes, record_rebuild
+from app.services.jobs import submit_job, find_active_job
+from app.services import call_network  # noqa - registers the call_network job
+from app.services import graph_layout  # noqa - registers the call_network_layout job
+from app.services.common_contacts import find_shared_contacts, lookup_number
+from app.services.cell_towers import get_cell_index, parse_cell, resolve_cell, resolve_call_records
 import json
 
 router = APIRouter(prefix="/call-analysis", tags=["call-analysis"])
@@ -51,6 +60,10 @@ class CallRecordResponse(BaseModel):
     duration_seconds: int
     is_suspect_call: bool
     risk_score: int
+    cell_id: Optional[str] = None
+    cell_lat: Optional[float] = None
+    cell_lon: Optional[float] = None
+    cell_range_m: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -87,6 +100,8 @@ class CallEntityResponse(BaseModel):
     cluster_id: Optional[int]
     role: Optional[str]
     color: Optional[str]
+    x_position: Optional[float] = None
+    y_position: Optional[float] = None
     first_seen: Optional[datetime]
     last_seen: Optional[datetime]
 
@@ -135,6 +150,16 @@ class NetworkDataResponse(BaseModel):
     summary: dict
 
 
+class NetworkChangesResponse(BaseModel):
+    """Network delta since a cursor (reset=True: full network, replace local state)"""
+    cursor: datetime
+    reset: bool
+    entities: List[dict]
+    links: List[dict]
+    deleted_entities: List[str]
+    deleted_links: List[str]
+
+
 # ==================== CALL RECORDS ENDPOINTS ====================
 
 @router.post("/case/{case_id}/records", response_model=CallRecordResponse)
@@ -145,9 +170,7 @@ async def create_call_record(
     current_user: User = Depends(get_current_user)
 ):
     """Create a single call record"""
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
+    check_case_access(case_id, current_user, db)
     
     # Map call_type string to enum
     call_type_map = {
@@ -176,6 +199,7 @@ async def create_call_record(
         notes=record.notes,
         raw_data=record.raw_data
     )
+    resolve_call_records([db_record])
     
     db.add(db_record)
     db.commit()
@@ -192,9 +216,7 @@ async def bulk_import_call_records(
     current_user: User = Depends(get_current_user)
 ):
     """Bulk import call records"""
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
+    check_case_access(case_id, current_user, db)
     
     call_type_map = {
         "incoming": CallType.INCOMING,
@@ -203,7 +225,7 @@ async def bulk_import_call_records(
         "blocked": CallType.BLOCKED,
     }
     
-    created_count = 0
+    db_records = []
     for record in request.records:
         call_type_enum = call_type_map.get((record.call_type or "").lower(), CallType.UNKNOWN)
         
@@ -226,12 +248,19 @@ async def bulk_import_call_records(
             notes=record.notes,
             raw_data=record.raw_data
         )
-        db.add(db_record)
-        created_count += 1
+        db_records.append(db_record)
     
+    # Tower positions for all distinct cell ids of the batch
+    resolved_count = resolve_call_records(db_records)
+    db.add_all(db_records)
     db.commit()
     
-    return {"message": f"Imported {created_count} call records", "count": created_count}
+    created_count = len(db_records)
+    return {
+        "message": f"Imported {created_count} call records",
+        "count": created_count,
+        "cells_resolved": resolved_count
+    }
 
 
 @router.get("/case/{case_id}/records", response_model=List[CallRecordResponse])
@@ -359,6 +388,7 @@ async def delete_all_call_entities(
     db.query(CallLink).filter(CallLink.case_id == case_id).delete()
     # Then delete entities
     deleted = db.query(CallEntity).filter(CallEntity.case_id == case_id).delete()
+    record_rebuild(db, case_id, "call_network")
     db.commit()
     return {"message": f"Deleted {deleted} call entities"}
 
@@ -440,7 +470,11 @@ async def list_call_links(
 
 # ==================== NETWORK GENERATION ENDPOINT ====================
 
-@router.post("/case/{case_id}/generate-network")
+@router.post(
+    "/case/{case_id}/generate-network",
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def generate_network_from_records(
     case_id: int,
     db: Session = Depends(get_db),
@@ -448,186 +482,155 @@ async def generate_network_from_records(
 ):
     """
     Generate network entities and links from call records.
-    This processes raw call records into a network graph.
+    Runs as a background job - poll /jobs/{job_id} for progress and result.
     """
-    # Check case exists
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    # Get all call records for this case
-    records = db.query(CallRecord).filter(CallRecord.case_id == case_id).all()
+    check_case_access(case_id, current_user, db)
     
-    if not records:
-        return {"message": "No call records found", "entities_created": 0, "links_created": 0}
+    job = find_active_job(db, "call_network", case_id)
+    if not job:
+        job = submit_job(db, "call_network", case_id=case_id, user_id=current_user.id)
     
-    # Delete existing entities and links for this case (regenerate fresh)
-    db.query(CallLink).filter(CallLink.case_id == case_id).delete()
-    db.query(CallEntity).filter(CallEntity.case_id == case_id).delete()
-    db.commit()
-    
-    # Build phone number statistics
-    phone_stats = {}  # phone -> {calls, duration, first_seen, last_seen, is_device, contacts}
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Network generation started"
+    )
+
+
+@router.post(
+    "/case/{case_id}/layout",
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def layout_network(
+    case_id: int,
+    incremental: bool = Query(True, description="Only place entities without a position"),
+    iterations: Optional[int] = Query(None, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Compute force-directed positions for the call network (returned as x/y by /network).
+    Runs as a background job - poll /jobs/{job_id} for progress and result.
+    """
+    check_case_access(case_id, current_user, db)
     
-    for record in records:
-        # Device phone
-        device_phone = record.device_number or record.device_owner or "Unknown Device"
-        partner_phone = record.partner_number
-        
-        # Initialize device phone stats
-        if device_phone not in phone_stats:
-            phone_stats[device_phone] = {
-                'calls': 0, 'duration': 0, 'first_seen': None, 'last_seen': None,
-                'is_device': True, 'contacts': set(), 'name': record.device_owner,
-                'is_suspect': False
-            }
-        
-        # Initialize partner phone stats
-        if partner_phone not in phone_stats:
-            phone_stats[partner_phone] = {
-                'calls': 0, 'duration': 0, 'first_seen': None, 'last_seen': None,
-                'is_device': False, 'contacts': set(), 'name': record.partner_name,
-                'is_suspect': False
-            }
-        
-        # Update stats
-        phone_stats[device_phone]['calls'] += 1
-        phone_stats[device_phone]['duration'] += record.duration_seconds or 0
-        phone_stats[partner_phone]['calls'] += 1
-        phone_stats[partner_phone]['duration'] += record.duration_seconds or 0
-        
-        # Track contacts
-        phone_stats[device_phone]['contacts'].add(partner_phone)
-        phone_stats[partner_phone]['contacts'].add(device_phone)
-        
-        # Track first/last seen
-        if record.start_time:
-            for phone in [device_phone, partner_phone]:
-                if not phone_stats[phone]['first_seen'] or record.start_time < phone_stats[phone]['first_seen']:
-                    phone_stats[phone]['first_seen'] = record.start_time
-                if not phone_stats[phone]['last_seen'] or record.start_time > phone_stats[phone]['last_seen']:
-                    phone_stats[phone]['last_seen'] = record.start_time
-        
-        # Mark suspect if flagged
-        if record.is_suspect_call:
-            phone_stats[device_phone]['is_suspect'] = True
-            phone_stats[partner_phone]['is_suspect'] = True
-    
-    # Calculate risk levels based on call patterns
-    def calculate_risk(stats):
-        # High call volume or long duration = higher risk
-        if stats['is_suspect']:
-            return 'critical', 90
-        if stats['calls'] > 50 or stats['duration'] > 10000:
-            return 'high', 75
-        if stats['calls'] > 20 or stats['duration'] > 5000:
-            return 'medium', 50
-        if stats['calls'] > 5:
-            return 'low', 25
-        return 'unknown', 0
-    
-    # Simple clustering based on connectivity
-    # Devices (main actors) get cluster 1, high-contact numbers get cluster 2, etc.
-    def assign_cluster(stats):
-        if stats['is_device']:
-            return 1  # Main device/suspect
-        contact_count = len(stats['contacts'])
-        if contact_count > 5:
-            return 2  # Hub/coordinator
-        if contact_count > 2:
-            return 3  # Active contact
-        return 4  # Peripheral
-    
-    # Create entities
-    phone_to_entity_id = {}
-    entities_created = 0
-    
-    for phone, stats in phone_stats.items():
-        risk_level, risk_score = calculate_risk(stats)
-        cluster_id = assign_cluster(stats)
-        
-        entity = CallEntity(
-            case_id=case_id,
-            entity_type='phone',
-            label=phone,
-            phone_number=phone,
-            person_name=stats['name'],
-            total_calls=stats['calls'],
-            total_duration=stats['duration'],
-            risk_level=risk_level,
-            risk_score=risk_score,
-            cluster_id=cluster_id,
-            role='Device Owner' if stats['is_device'] else 'Contact',
-            first_seen=stats['first_seen'],
-            last_seen=stats['last_seen']
+    job = find_active_job(db, "call_network_layout", case_id)
+    if not job:
+        job = submit_job(
+            db, "call_network_layout", case_id=case_id, user_id=current_user.id,
+            params={"incremental": incremental, "iterations": iterations}
         )
-        db.add(entity)
-        db.flush()
-        phone_to_entity_id[phone] = entity.id
-        entities_created += 1
     
-    # Create links between entities
-    link_stats = {}  # (source, target) -> {calls, duration, first, last}
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Network layout started"
+    )
+
+
+# ==================== CELL TOWER ENDPOINTS ====================
+
+@router.post(
+    "/case/{case_id}/resolve-cells",
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def resolve_case_cells(
+    case_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Backfill tower positions for call records and location points of a case.
+    Runs as a background job - poll /jobs/{job_id} for progress and result.
+    """
+    check_case_access(case_id, current_user, db)
+    if get_cell_index() is None:
+        raise HTTPException(status_code=503, detail="Cell tower database is not configured")
+    
+    job = find_active_job(db, "cell_tower_resolve", case_id)
+    if not job:
+        job = submit_job(db, "cell_tower_resolve", case_id=case_id, user_id=current_user.id)
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Cell tower resolution started"
+    )
+
+
+@router.get("/cell-towers/lookup")
+async def lookup_cell_tower(
+    cell_id: str,
+    lac: Optional[str] = None,
+    mcc: Optional[str] = None,
+    mnc: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Resolve one cell id ("CID", "LAC-CID" or "MCC-MNC-LAC-CID") to its tower position"""
+    if get_cell_index() is None:
+        raise HTTPException(status_code=503, detail="Cell tower database is not configured")
     
-    for record in records:
-        device_phone = record.device_number or record.device_owner or "Unknown Device"
-        partner_phone = record.partner_number
-        
-        # Ensure consistent ordering for undirected links
-        source, target = (device_phone, partner_phone) if device_phone < partner_phone else (partner_phone, device_phone)
-        key = (source, target)
-        
-        if key not in link_stats:
-            link_stats[key] = {'calls': 0, 'duration': 0, 'first': None, 'last': None, 'types': set()}
-        
-        link_stats[key]['calls'] += 1
-        link_stats[key]['duration'] += record.duration_seconds or 0
-        
-        # Track call type
-        if record.call_type:
-            link_stats[key]['types'].add(str(record.call_type.value) if hasattr(record.call_type, 'value') else str(record.call_type))
-        
-        if record.start_time:
-            if not link_stats[key]['first'] or record.start_time < link_stats[key]['first']:
-                link_stats[key]['first'] = record.start_time
-            if not link_stats[key]['last'] or record.start_time > link_stats[key]['last']:
-                link_stats[key]['last'] = record.start_time
-    
-    links_created = 0
-    for (source, target), stats in link_stats.items():
-        source_id = phone_to_entity_id.get(source)
-        target_id = phone_to_entity_id.get(target)
-        
-        if source_id and target_id:
-            # Weight based on call count
-            weight = min(stats['calls'], 100)  # Cap at 100
-            
-            link = CallLink(
-                case_id=case_id,
-                source_entity_id=source_id,
-                target_entity_id=target_id,
-                link_type='call',
-                call_count=stats['calls'],
-                total_duration=stats['duration'],
-                first_contact=stats['first'],
-                last_contact=stats['last'],
-                weight=weight
-            )
-            db.add(link)
-            links_created += 1
+    cell = parse_cell(cell_id, lac, mcc, mnc)
+    if not cell:
+        raise HTTPException(status_code=400, detail="Invalid cell id")
     
-    db.commit()
+    tower = resolve_cell(cell)
+    if tower is None:
+        raise HTTPException(status_code=404, detail="Cell tower not found")
     
     return {
-        "message": "Network generated successfully",
-        "entities_created": entities_created,
-        "links_created": links_created,
-        "total_records_processed": len(records)
+        "mcc": cell[0],
+        "mnc": cell[1],
+        "lac": cell[2],
+        "cid": cell[3],
+        "lat": tower[0],
+        "lon": tower[1],
+        "range_m": tower[2]
     }
 
 
 # ==================== NETWORK DATA ENDPOINT ====================
 
+def _entity_dict(e: CallEntity) -> dict:
+    """Network entity as the frontend graph expects it"""
+    return {
+        "id": f"E{e.id}",
+        "type": e.entity_type,
+        "label": e.label,
+        "subLabel": e.role,
+        "risk": e.risk_level,
+        "clusterId": e.cluster_id,
+        "x": e.x_position,
+        "y": e.y_position,
+        "metadata": {
+            "phone": e.phone_number,
+            "calls": e.total_calls,
+            "duration": e.total_duration
+        }
+    }
+
+
+def _link_dict(l: CallLink) -> dict:
+    return {
+        "id": f"L{l.id}",
+        "source": f"E{l.source_entity_id}",
+        "target": f"E{l.target_entity_id}",
+        "type": l.link_type,
+        "weight": l.weight,
+        "firstSeen": l.first_contact.isoformat() if l.first_contact else None,
+        "lastSeen": l.last_contact.isoformat() if l.last_contact else None,
+        "metadata": {
+            "calls": l.call_count,
+            "duration": l.total_duration
+        }
+    }
+
+
 @router.get("/case/{case_id}/network", response_model=NetworkDataResponse)
 async def get_network_data(
     case_id: int,
@@ -636,60 +639,30 @@ async def get_network_data(
     current_user: User = Depends(get_current_user)
 ):
     """Get complete network data for visualization.
-    If auto_generate=True and no entities exist, will auto-generate from call records.
+    If auto_generate=True and no entities exist, starts a network generation job
+    and returns immediately - summary.jobId can be polled at /jobs/{job_id}.
     """
     
     # Get entities
     entities = db.query(CallEntity).filter(CallEntity.case_id == case_id).all()
     
     # Auto-generate if no entities but records exist
+    generation_job = None
     if not entities and auto_generate:
         records_count = db.query(func.count(CallRecord.id)).filter(
             CallRecord.case_id == case_id
         ).scalar() or 0
         
         if records_count > 0:
-            # Auto-generate network
-            await generate_network_from_records(case_id, db, current_user)
-            # Re-fetch entities
-            entities = db.query(CallEntity).filter(CallEntity.case_id == case_id).all()
+            generation_job = find_active_job(db, "call_network", case_id)
+            if not generation_job:
+                generation_job = submit_job(db, "call_network", case_id=case_id, user_id=current_user.id)
     
     # Get links
     links = db.query(CallLink).filter(CallLink.case_id == case_id).all()
     
-    # Build entity list for frontend
-    entity_list = []
-    for e in entities:
-        entity_list.append({
-            "id": f"E{e.id}",
-            "type": e.entity_type,
-            "label": e.label,
-            "subLabel": e.role,
-            "risk": e.risk_level,
-            "clusterId": e.cluster_id,
-            "metadata": {
-                "phone": e.phone_number,
-                "calls": e.total_calls,
-                "duration": e.total_duration
-            }
-        })
-    
-    # Build links list for frontend
-    link_list = []
-    for l in links:
-        link_list.append({
-            "id": f"L{l.id}",
-            "source": f"E{l.source_entity_id}",
-            "target": f"E{l.target_entity_id}",
-            "type": l.link_type,
-            "weight": l.weight,
-            "firstSeen": l.first_contact.isoformat() if l.first_contact else None,
-            "lastSeen": l.last_contact.isoformat() if l.last_contact else None,
-            "metadata": {
-                "calls": l.call_count,
-                "duration": l.total_duration
-            }
-        })
+    entity_list = [_entity_dict(e) for e in entities]
+    link_list = [_link_dict(l) for l in links]
     
     # Build clusters from entity cluster_ids
     cluster_ids = set(e.cluster_id for e in entities if e.cluster_id)
@@ -714,6 +687,9 @@ async def get_network_data(
         "totalClusters": len(cluster_list),
         "highRiskCount": sum(1 for e in entities if e.risk_level in ['critical', 'high'])
     }
+    if generation_job:
+        summary["jobId"] = generation_job.id
+        summary["generating"] = True
     
     return NetworkDataResponse(
         entities=entity_list,
@@ -723,6 +699,30 @@ async def get_network_data(
     )
 
 
+@router.get("/case/{case_id}/network/changes", response_model=NetworkChangesResponse)
+async def get_network_changes(
+    case_id: int,
+    since: Optional[datetime] = Query(None, description="Cursor from the previous response"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Entities and links inserted, updated or deleted since a cursor (delta sync).
+    Without `since` (or after the network was regenerated / an expired cursor)
+    returns the whole network with reset=true. Apply deletions before upserts.
+    """
+    check_case_access(case_id, current_user, db)
+    changes = get_changes(db, case_id, "call_network", {"entity": CallEntity, "link": CallLink}, since)
+    return NetworkChangesResponse(
+        cursor=changes["cursor"],
+        reset=changes["reset"],
+        entities=[_entity_dict(e) for e in changes["changed"]["entity"]],
+        links=[_link_dict(l) for l in changes["changed"]["link"]],
+        deleted_entities=[f"E{i}" for i in changes["deleted"]["entity"]],
+        deleted_links=[f"L{i}" for i in changes["deleted"]["link"]]
+    )
+
+
 # ==================== STATISTICS ENDPOINT ====================
 
 @router.get("/case/{case_id}/stats")
@@ -756,3 +756,90 @@ async def get_call_stats(
         "total_duration_seconds": total_duration,
         "total_duration_hours": round(total_duration / 3600, 2)
     }
+
+
+# ==================== CROSS-CASE CONTACTS ====================
+
+def get_accessible_case_ids(
+    db: Session,
+    current_user: User,
+    case_ids: Optional[List[int]] = None
+) -> List[int]:
+    """Active cases the user can see (same rules as the case list), optionally narrowed"""
+    query = db.query(Case.id).filter(Case.is_active == True)
+    if current_user.role == UserRole.SUPER_ADMIN:
+        pass
+    elif current_user.role == UserRole.ORG_ADMIN:
+        query = query.filter(Case.organization_id == current_user.organization_id)
+    else:
+        query = query.filter(
+            Case.organization_id == current_user.organization_id,
+            or_(
+                Case.created_by == current_user.id,
+                Case.assigned_to == current_user.id
+            )
+        )
+    if case_ids:
+        query = query.filter(Case.id.in_(case_ids))
+    return [row.id for row in query.all()]
+
+
+@router.get("/common-contacts")
+async def get_common_contacts(
+    case_ids: Optional[List[int]] = Query(None, description="Cases to compare (default: all accessible)"),
+    min_cases: int = Query(2, ge=1),
+    min_devices: Optional[int] = Query(None, ge=2, description="Also include numbers seen on this many devices"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Phone numbers shared between cases (or devices), ranked by call volume
+    """
+    accessible = get_accessible_case_ids(db, current_user, case_ids)
+    if case_ids and len(accessible) != len(set(case_ids)):
+        raise HTTPException(status_code=404, detail="Case not found")
+    if not accessible:
+        return {"cases_compared": 0, "total": 0, "contacts": []}
+
+    contacts = find_shared_contacts(db, accessible, min_cases=min_cases, min_devices=min_devices, limit=limit)
+    return {"cases_compared": len(accessible), "total": len(contacts), "contacts": contacts}
+
+
+@router.get("/contacts/{number}")
+async def get_contact_cases(
+    number: str,
+    case_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cases and devices where a phone number appears
+    """
+    accessible = get_accessible_case_ids(db, current_user, case_ids)
+    result = lookup_number(db, number, accessible)
+    if not result:
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+    return result
+
+
+
+@router.post("/contacts/backfill", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def backfill_contact_numbers(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("super_admin"))
+):
+    """
+    Normalize numbers of call records imported before the common-contacts
+    index existed (run once after migration 008). Returns a job to poll.
+    """
+    job = find_active_job(db, "call_number_backfill", None)
+    if not job:
+        job = submit_job(db, "call_number_backfill", user_id=current_user.id)
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Number normalization started"
+    )
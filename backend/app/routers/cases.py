@@ -4,16 +4,22 @@ Case management CRUD endpoints with Soft Delete support
 """
 from math import ceil
 from datetime import datetime
+import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
 from typing import Optional
 
 from app.database import get_db
 from app.models.case import Case, CaseStatus, CaseType, CasePriority
 from app.models.user import User, UserRole
 from app.models.money_flow import MoneyFlowNode, MoneyFlowEdge
+from app.models.call_record import CallRecord
+from app.models.location import LocationPoint
+from app.models.crypto import CryptoTransaction
+from app.models.evidence import Evidence
 from app.schemas.case import (
     CaseCreate,
     CaseUpdate,
@@ -24,7 +30,14 @@ from app.schemas.case import (
     DeletedCaseResponse
 )
 from app.schemas.user import UserBrief
+from app.schemas.job import JobSubmitResponse
 from app.utils.security import get_current_user, require_roles
+from app.utils.cache import TTLCache
+from app.utils.case_access import check_case_access, invalidate_case_access
+from app.services.search import apply_search
+from app.services.case_bundle import BundleError, iter_case_bundle, read_bundle_case, save_bundle
+from app.services import case_purge  # noqa - registers the case_purge job
+from app.services.jobs import submit_job, find_active_job
 
 router = APIRouter(prefix="/cases", tags=["Cases"])
 
@@ -36,6 +49,47 @@ def generate_case_number() -> str:
     return f"CASE-{timestamp}-{unique_id}"
 
 
+# Per-case item counts: CaseResponse field -> counted model
+_COUNTED_MODELS = {
+    "nodes_count": MoneyFlowNode,
+    "edges_count": MoneyFlowEdge,
+    "call_records_count": CallRecord,
+    "locations_count": LocationPoint,
+    "crypto_transactions_count": CryptoTransaction,
+    "evidence_count": Evidence,
+}
+
+
+def _count_columns():
+    """
+    Correlated COUNT subqueries for the case query's SELECT list, so a page of
+    cases and all of their counts come back in one round trip (case_id indexed)
+    """
+    return [
+        select(func.count())
+        .select_from(model)
+        .where(model.case_id == Case.id)
+        .correlate(Case)
+        .scalar_subquery()
+        .label(name)
+        for name, model in _COUNTED_MODELS.items()
+    ]
+
+
+_OPEN_STATUSES = (CaseStatus.OPEN, CaseStatus.IN_PROGRESS, CaseStatus.PENDING_REVIEW)
+_CLOSED_STATUSES = (CaseStatus.CLOSED, CaseStatus.ARCHIVED)
+
+# Dashboard statistics per visibility scope (see _statistics_scope). Writes in
+# this process invalidate at once; the TTL bounds staleness from other workers.
+_statistics_cache = TTLCache(maxsize=256, ttl=60)
+
+
+def _set_counts(response: CaseResponse, counts) -> CaseResponse:
+    for name, value in zip(_COUNTED_MODELS, counts):
+        setattr(response, name, value)
+    return response
+
+
 # ============================================
 # REGULAR ENDPOINTS (Filter is_active=True)
 # ============================================
@@ -86,15 +140,10 @@ async def list_cases(
             )
         )
     
-    # Search filter
+    # Search filter (full-text, best matches first)
+    search_order = []
     if search:
-        query = query.filter(
-            or_(
-                Case.case_number.ilike(f"%{search}%"),
-                Case.title.ilike(f"%{search}%"),
-                Case.description.ilike(f"%{search}%")
-            )
-        )
+        query, search_order = apply_search(query, Case, search)
     
     # Type filter
     if case_type:
@@ -115,15 +164,16 @@ async def list_cases(
     # Count total
     total = query.count()
     
-    # Paginate
-    cases = query.order_by(Case.created_at.desc()) \
-                 .offset((page - 1) * page_size) \
-                 .limit(page_size) \
-                 .all()
+    # Paginate (counts are selected alongside each case)
+    rows = query.add_columns(*_count_columns()) \
+                .order_by(*search_order, Case.created_at.desc()) \
+                .offset((page - 1) * page_size) \
+                .limit(page_size) \
+                .all()
     
     # Build response with computed fields
     items = []
-    for case in cases:
+    for case, *counts in rows:
         case_response = CaseResponse.model_validate(case)
         
         # Add user info
@@ -132,11 +182,7 @@ async def list_cases(
         if case.assigned_to_user:
             case_response.assigned_to_user = UserBrief.model_validate(case.assigned_to_user)
         
-        # Add node/edge counts
-        case_response.nodes_count = db.query(MoneyFlowNode).filter(MoneyFlowNode.case_id == case.id).count()
-        case_response.edges_count = db.query(MoneyFlowEdge).filter(MoneyFlowEdge.case_id == case.id).count()
-        
-        items.append(case_response)
+        items.append(_set_counts(case_response, counts))
     
     return CaseListResponse(
         items=items,
@@ -189,24 +235,36 @@ async def create_case(
     
     db.add(case)
     db.commit()
+    _invalidate_statistics(case.organization_id)
     db.refresh(case)
     
     return CaseResponse.model_validate(case)
 
 
-@router.get("/statistics", response_model=CaseStatistics)
-async def get_case_statistics(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Get case statistics for dashboard
-    Only counts active cases visible to the user
-    """
-    query = db.query(Case)
-    
-    # ★ SOFT DELETE: Only count active cases
-    query = query.filter(Case.is_active == True)
+def _statistics_scope(user: User) -> tuple:
+    """Cache key of the set of cases a user can see (role filter of list_cases)"""
+    if user.role == UserRole.SUPER_ADMIN:
+        return ("all",)
+    if user.role == UserRole.ORG_ADMIN:
+        return ("org", user.organization_id)
+    return ("user", user.organization_id, user.id)
+
+
+def _invalidate_statistics(organization_id: Optional[int]):
+    """Drop cached statistics that include an organization's cases - call after case writes"""
+    _statistics_cache.invalidate(lambda key: key[0] == "all" or key[1] == organization_id)
+
+
+def _compute_statistics(db: Session, current_user: User) -> CaseStatistics:
+    """All dashboard numbers from one GROUP BY type/status/priority query"""
+    query = db.query(
+        Case.case_type,
+        Case.status,
+        Case.priority,
+        func.count(Case.id),
+        func.sum(Case.total_amount),
+        func.sum(Case.victims_count)
+    ).filter(Case.is_active == True)  # ★ SOFT DELETE: Only count active cases
     
     # ★ ROLE-BASED FILTERING (same as list_cases)
     if current_user.role == UserRole.SUPER_ADMIN:
@@ -223,79 +281,24 @@ async def get_case_statistics(
             )
         )
     
-    # Total cases
-    total_cases = query.count()
-    
-    # Open cases - need fresh subquery with same filters
-    open_query = db.query(Case).filter(Case.is_active == True)
-    if current_user.role == UserRole.SUPER_ADMIN:
-        pass
-    elif current_user.role == UserRole.ORG_ADMIN:
-        open_query = open_query.filter(Case.organization_id == current_user.organization_id)
-    else:
-        open_query = open_query.filter(
-            Case.organization_id == current_user.organization_id,
-            or_(Case.created_by == current_user.id, Case.assigned_to == current_user.id)
-        )
-    
-    open_cases = open_query.filter(Case.status.in_([
-        CaseStatus.OPEN, 
-        CaseStatus.IN_PROGRESS, 
-        CaseStatus.PENDING_REVIEW
-    ])).count()
-    
-    # Closed cases
-    closed_cases = open_query.filter(Case.status.in_([
-        CaseStatus.CLOSED,
-        CaseStatus.ARCHIVED
-    ])).count()
-    
-    # Total amount
-    amount_query = db.query(func.sum(Case.total_amount)).filter(Case.is_active == True)
-    if current_user.role == UserRole.SUPER_ADMIN:
-        pass
-    elif current_user.role == UserRole.ORG_ADMIN:
-        amount_query = amount_query.filter(Case.organization_id == current_user.organization_id)
-    else:
-        amount_query = amount_query.filter(
-            Case.organization_id == current_user.organization_id,
-            or_(Case.created_by == current_user.id, Case.assigned_to == current_user.id)
-        )
-    total_amount = amount_query.scalar() or 0
-    
-    # Total victims
-    victims_query = db.query(func.sum(Case.victims_count)).filter(Case.is_active == True)
-    if current_user.role == UserRole.SUPER_ADMIN:
-        pass
-    elif current_user.role == UserRole.ORG_ADMIN:
-        victims_query = victims_query.filter(Case.organization_id == current_user.organization_id)
-    else:
-        victims_query = victims_query.filter(
-            Case.organization_id == current_user.organization_id,
-            or_(Case.created_by == current_user.id, Case.assigned_to == current_user.id)
-        )
-    total_victims = victims_query.scalar() or 0
-    
-    # By type
-    by_type = {}
-    for case_type in CaseType:
-        count = query.filter(Case.case_type == case_type).count()
-        if count > 0:
-            by_type[case_type.value] = count
-    
-    # By status
-    by_status = {}
-    for case_status in CaseStatus:
-        count = query.filter(Case.status == case_status).count()
-        if count > 0:
-            by_status[case_status.value] = count
-    
-    # By priority
-    by_priority = {}
-    for case_priority in CasePriority:
-        count = query.filter(Case.priority == case_priority).count()
-        if count > 0:
-            by_priority[case_priority.value] = count
+    rows = query.group_by(Case.case_type, Case.status, Case.priority).all()
+    
+    total_cases = open_cases = closed_cases = total_victims = 0
+    total_amount = 0.0
+    by_type: dict = {}
+    by_status: dict = {}
+    by_priority: dict = {}
+    for case_type, case_status, case_priority, count, amount, victims in rows:
+        total_cases += count
+        total_amount += amount or 0
+        total_victims += victims or 0
+        if case_status in _OPEN_STATUSES:
+            open_cases += count
+        elif case_status in _CLOSED_STATUSES:
+            closed_cases += count
+        by_type[case_type.value] = by_type.get(case_type.value, 0) + count
+        by_status[case_status.value] = by_status.get(case_status.value, 0) + count
+        by_priority[case_priority.value] = by_priority.get(case_priority.value, 0) + count
     
     return CaseStatistics(
         total_cases=total_cases,
@@ -309,6 +312,96 @@ async def get_case_statistics(
     )
 
 
+@router.get("/statistics", response_model=CaseStatistics)
+async def get_case_statistics(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get case statistics for dashboard
+    Only counts active cases visible to the user
+    Cached per visibility scope; case writes invalidate their organization's entries
+    """
+    return _statistics_cache.get_or_set(
+        _statistics_scope(current_user),
+        lambda: _compute_statistics(db, current_user)
+    )
+
+
+# ============================================
+# CASE BUNDLES (export / import)
+# ============================================
+
+@router.get("/{case_id}/export")
+def export_case(
+    case_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a case with all of its data as a zip bundle
+    (case.json, one NDJSON member per case table, manifest.json).
+    Streamed while it is read - the case is never held in memory.
+    """
+    check_case_access(case_id, current_user, db)
+    case_number = db.scalar(select(Case.case_number).where(Case.id == case_id))
+    
+    return StreamingResponse(
+        iter_case_bundle(case_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{case_number}.zip"'}
+    )
+
+
+@router.post("/import", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+def import_case(
+    file: UploadFile = File(...),
+    current_user: User = Depends(require_roles("super_admin", "org_admin", "investigator")),
+    db: Session = Depends(get_db)
+):
+    """
+    Restore a case bundle (from /cases/{case_id}/export) into a new case.
+    The case is created right away; its data is imported by a background job -
+    poll /jobs/{job_id} (the job's case_id is the new case).
+    """
+    if not current_user.organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must belong to an organization to create cases"
+        )
+    
+    path = save_bundle(file.file)
+    try:
+        fields = read_bundle_case(path)
+    except BundleError as e:
+        os.remove(path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    case = Case(
+        **fields,
+        case_number=generate_case_number(),
+        organization_id=current_user.organization_id,
+        created_by=current_user.id,
+        assigned_to=current_user.id,
+        is_active=True
+    )
+    db.add(case)
+    db.commit()
+    _invalidate_statistics(case.organization_id)
+    
+    job = submit_job(db, "case_import", case_id=case.id, user_id=current_user.id, params={"path": path})
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message=f"Importing into case {case.case_number} (id {case.id})"
+    )
+
+
 # ============================================
 # ★ ADMIN ENDPOINTS - DELETED CASES MANAGEMENT
 # ============================================
@@ -394,19 +487,20 @@ async def get_case(
     """
     Get case by ID (only active cases)
     """
-    case = db.query(Case).options(
+    row = db.query(Case).options(
         joinedload(Case.created_by_user),
         joinedload(Case.assigned_to_user)
-    ).filter(
+    ).add_columns(*_count_columns()).filter(
         Case.id == case_id,
         Case.is_active == True  # ★ SOFT DELETE: Only get active cases
     ).first()
     
-    if not case:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Case not found"
         )
+    case, *counts = row
     
     # Permission check
     if current_user.role != UserRole.SUPER_ADMIN:
@@ -424,11 +518,7 @@ async def get_case(
     if case.assigned_to_user:
         response.assigned_to_user = UserBrief.model_validate(case.assigned_to_user)
     
-    # Add counts
-    response.nodes_count = db.query(MoneyFlowNode).filter(MoneyFlowNode.case_id == case_id).count()
-    response.edges_count = db.query(MoneyFlowEdge).filter(MoneyFlowEdge.case_id == case_id).count()
-    
-    return response
+    return _set_counts(response, counts)
 
 
 @router.patch("/{case_id}", response_model=CaseResponse)
@@ -479,6 +569,8 @@ async def update_case(
         setattr(case, key, value)
     
     db.commit()
+    _invalidate_statistics(case.organization_id)
+    invalidate_case_access(case_id)
     db.refresh(case)
     
     return CaseResponse.model_validate(case)
@@ -523,6 +615,7 @@ async def update_case_status(
         case.closed_date = datetime.utcnow()
     
     db.commit()
+    _invalidate_statistics(case.organization_id)
     db.refresh(case)
     
     return CaseResponse.model_validate(case)
@@ -567,6 +660,8 @@ async def delete_case(
     case.deleted_by = current_user.id
     
     db.commit()
+    _invalidate_statistics(case.organization_id)
+    invalidate_case_access(case_id)
     
     return {
         "message": "Case deleted successfully",
@@ -598,6 +693,12 @@ async def restore_case(
             detail="Deleted case not found"
         )
     
+    if find_active_job(db, "case_purge", case_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Case is being permanently deleted"
+        )
+    
     # Permission check
     if current_user.role != UserRole.SUPER_ADMIN:
         if case.organization_id != current_user.organization_id:
@@ -616,12 +717,13 @@ async def restore_case(
     case.internal_notes = (case.internal_notes or "") + restore_note
     
     db.commit()
+    _invalidate_statistics(case.organization_id)
     db.refresh(case)
     
     return CaseResponse.model_validate(case)
 
 
-@router.delete("/{case_id}/permanent", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{case_id}/permanent", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
 async def permanent_delete_case(
     case_id: int,
     current_user: User = Depends(require_roles("super_admin")),
@@ -630,6 +732,7 @@ async def permanent_delete_case(
     """
     Permanently delete a case (Super Admin only)
     WARNING: This cannot be undone!
+    Runs as a background job - poll /jobs/{job_id} for progress.
     """
     case = db.query(Case).filter(
         Case.id == case_id,
@@ -642,6 +745,15 @@ async def permanent_delete_case(
             detail="Deleted case not found. Case must be soft-deleted first."
         )
     
-    # Actually delete from database
-    db.delete(case)
-    db.commit()
+    # Data is removed in batches by the purge job
+    job = find_active_job(db, "case_purge", case_id)
+    if not job:
+        job = submit_job(db, "case_purge", case_id=case_id, user_id=current_user.id)
+    invalidate_case_access(case_id)
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message=f"Permanently deleting case {case.case_number}"
+    )
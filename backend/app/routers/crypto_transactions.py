@@ -10,9 +10,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.database import get_db
 from app.models.crypto import CryptoTransaction, CryptoWallet, BlockchainType, RiskFlag
-from app.models.case import Case
 from app.models.user import User
 from app.routers.auth import get_current_user
+from app.utils.case_access import check_case_access
+from app.schemas.job import JobSubmitResponse
+from app.services.jobs import JobContext, job_handler, submit_job
 import json
 import httpx
 import asyncio
@@ -145,9 +147,7 @@ async def create_crypto_transaction(
     current_user: User = Depends(get_current_user)
 ):
     """Create a single crypto transaction"""
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
+    check_case_access(case_id, current_user, db)
     
     # Map blockchain string to enum
     blockchain_map = {
@@ -220,9 +220,7 @@ async def bulk_import_crypto_transactions(
     current_user: User = Depends(get_current_user)
 ):
     """Bulk import crypto transactions"""
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
+    check_case_access(case_id, current_user, db)
     
     blockchain_map = {
         "btc": BlockchainType.BTC,
@@ -1077,42 +1075,92 @@ async def bulk_lookup_wallets(
     results = []
     
     for wallet in wallets[:50]:  # Limit to 50 wallets per request
-        blockchain = wallet.get("blockchain", "").lower()
-        address = wallet.get("address", "")
-        
-        if not blockchain or not address:
-            results.append({
-                "address": address,
-                "blockchain": blockchain,
-                "success": False,
-                "error": "Missing blockchain or address"
-            })
-            continue
-        
-        try:
-            result = await lookup_wallet(blockchain, address, current_user)
-            result_dict = result.dict() if hasattr(result, 'dict') else result
-            results.append({
-                **result_dict,
-                "success": True
-            })
-        except HTTPException as e:
-            results.append({
-                "address": address,
-                "blockchain": blockchain,
-                "success": False,
-                "error": e.detail
-            })
-        except Exception as e:
-            results.append({
-                "address": address,
-                "blockchain": blockchain,
-                "success": False,
-                "error": str(e)
-            })
+        results.append(await _lookup_wallet_result(
+            wallet.get("blockchain", "").lower(),
+            wallet.get("address", "")
+        ))
     
     return {
         "total": len(wallets),
         "processed": len(results),
         "results": results
     }
+
+
+# ==================== WALLET TRACING JOB ====================
+
+# Wallets per tracing job (each lookup is rate limited, so large batches run as jobs)
+_TRACE_JOB_LIMIT = 500
+
+
+async def _lookup_wallet_result(blockchain: str, address: str) -> Dict[str, Any]:
+    """Lookup one wallet and wrap the outcome with success/error status"""
+    if not blockchain or not address:
+        return {
+            "address": address,
+            "blockchain": blockchain,
+            "success": False,
+            "error": "Missing blockchain or address"
+        }
+    try:
+        result = await lookup_wallet(blockchain, address, None)
+        result_dict = result.dict() if hasattr(result, 'dict') else result
+        return {**result_dict, "success": True}
+    except HTTPException as e:
+        return {"address": address, "blockchain": blockchain, "success": False, "error": e.detail}
+    except Exception as e:
+        return {"address": address, "blockchain": blockchain, "success": False, "error": str(e)}
+
+
+@job_handler("crypto_wallet_trace")
+async def trace_wallets_job(ctx: JobContext):
+    """Job: look up a batch of wallets, reporting progress per wallet"""
+    wallets = ctx.params.get("wallets", [])
+    results = []
+    for i, wallet in enumerate(wallets):
+        ctx.report(int(100 * i / max(len(wallets), 1)), f"Looking up wallet {i + 1}/{len(wallets)}")
+        results.append(await _lookup_wallet_result(
+            (wallet.get("blockchain") or "").lower(),
+            wallet.get("address") or ""
+        ))
+    return {
+        "total": len(wallets),
+        "processed": len(results),
+        "results": results
+    }
+
+
+@router.post("/lookup/bulk/job", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_lookup_wallets_job(
+    wallets: List[Dict[str, str]],
+    case_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Trace many wallets as a background job (up to 500).
+    Same request body as /lookup/bulk - poll /jobs/{job_id} for progress and results.
+    """
+    if len(wallets) > _TRACE_JOB_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many wallets. Maximum {_TRACE_JOB_LIMIT} per job"
+        )
+    if case_id is not None:
+        check_case_access(case_id, current_user, db)
+    
+    job = submit_job(
+        db,
+        "crypto_wallet_trace",
+        case_id=case_id,
+        user_id=current_user.id,
+        params={"wallets": wallets}
+    )
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message=f"Tracing {len(wallets)} wallets"
+    )
+
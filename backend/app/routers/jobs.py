@@ -0,0 +1,111 @@
+"""
+Jobs Router
+Status, progress and cancellation of background jobs
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.case import Case
+from app.models.job import BackgroundJob, JobStatus
+from app.models.user import User, UserRole
+from app.schemas.job import JobResponse
+from app.services.jobs import request_cancel
+from app.utils.security import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def check_job_access(job: BackgroundJob, current_user: User, db: Session):
+    """Owner, super admin, or a member of the job's case organization"""
+    if current_user.role == UserRole.SUPER_ADMIN or job.created_by == current_user.id:
+        return
+    if job.case_id:
+        case = db.query(Case).filter(Case.id == job.case_id).first()
+        if case and case.organization_id == current_user.organization_id:
+            return
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Access denied"
+    )
+
+
+def get_job_or_404(job_id: int, db: Session) -> BackgroundJob:
+    job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("", response_model=list[JobResponse])
+async def list_jobs(
+    case_id: Optional[int] = Query(None),
+    job_type: Optional[str] = Query(None),
+    job_status: Optional[JobStatus] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List recent jobs
+    - Super Admin: all jobs
+    - Others: jobs they started, or jobs of a case in their organization
+    """
+    query = db.query(BackgroundJob)
+
+    if case_id:
+        query = query.filter(BackgroundJob.case_id == case_id)
+    if job_type:
+        query = query.filter(BackgroundJob.job_type == job_type)
+    if job_status:
+        query = query.filter(BackgroundJob.status == job_status)
+
+    if current_user.role != UserRole.SUPER_ADMIN:
+        org_case_ids = db.query(Case.id).filter(Case.organization_id == current_user.organization_id)
+        query = query.filter(
+            (BackgroundJob.created_by == current_user.id) |
+            (BackgroundJob.case_id.in_(org_case_ids))
+        )
+
+    jobs = query.order_by(BackgroundJob.id.desc()).limit(limit).all()
+    return [JobResponse.model_validate(j) for j in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get job status, progress and result
+    """
+    job = get_job_or_404(job_id, db)
+    check_job_access(job, current_user, db)
+    return JobResponse.model_validate(job)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Request cancellation of a pending/running job
+    """
+    job = get_job_or_404(job_id, db)
+    check_job_access(job, current_user, db)
+
+    if current_user.role == UserRole.VIEWER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions"
+        )
+
+    job = request_cancel(db, job)
+    return JobResponse.model_validate(job)
@@ -21,7 +21,7 @@ from app.schemas.license import (
     LicenseListResponse,
     LicenseActivationResult
 )
-from app.utils.security import get_current_user, require_roles
+from app.utils.security import get_current_user, require_roles, invalidate_principal
 
 router = APIRouter(prefix="/licenses", tags=["Licenses"])
 
@@ -309,6 +309,7 @@ async def activate_license(
     current_user.is_active = True
     
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(license)
     
     return LicenseActivationResult(
@@ -4,15 +4,23 @@ API for Location Timeline data
 """
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from app.database import get_db
 from app.models.location import LocationPoint, LocationCluster, LocationSource
-from app.models.case import Case
 from app.models.user import User
 from app.routers.auth import get_current_user
+from app.utils.case_access import check_case_access
+from app.schemas.job import JobSubmitResponse
+from app.services.jobs import submit_job, find_active_job
+from app.services import location_analysis  # noqa - registers the location_clustering job
+from app.services.location_timeline import point_to_dict, get_downsampled_points
+from app.services.colocation import find_colocations
+from app.services.map_cells import get_location_cells, cells_in_bbox
+from app.services.cell_towers import parse_cell, resolve_point_cells
+from app.utils.geo import grid_cell_ranges
 import json
 
 router = APIRouter(prefix="/locations", tags=["locations"])
@@ -24,12 +32,15 @@ class LocationPointCreate(BaseModel):
     suspect_id: Optional[str] = None
     suspect_name: Optional[str] = None
     device_id: Optional[str] = None
-    latitude: float
-    longitude: float
+    latitude: Optional[float] = None  # Resolved from the cell tower when missing
+    longitude: Optional[float] = None
     altitude: Optional[float] = None
     accuracy_meters: Optional[float] = None
     source: Optional[str] = "unknown"
     cell_id: Optional[str] = None
+    cell_lac: Optional[str] = None
+    cell_mcc: Optional[str] = None
+    cell_mnc: Optional[str] = None
     wifi_bssid: Optional[str] = None
     wifi_ssid: Optional[str] = None
     location_name: Optional[str] = None
@@ -94,6 +105,7 @@ class LocationClusterResponse(BaseModel):
     risk_score: int
     first_visit: Optional[datetime]
     last_visit: Optional[datetime]
+    is_generated: Optional[bool] = False
 
     class Config:
         from_attributes = True
@@ -112,6 +124,21 @@ class TimelineDataResponse(BaseModel):
     summary: dict
 
 
+# ==================== HELPERS ====================
+
+def locate_point(point: LocationPointCreate, source: LocationSource, towers: dict):
+    """
+    (lat, lon, accuracy, source) of a point - from the cell tower when it has
+    no coordinates of its own. None if it can't be placed.
+    """
+    if point.latitude is not None and point.longitude is not None:
+        return point.latitude, point.longitude, point.accuracy_meters, source
+    tower = towers.get(parse_cell(point.cell_id, point.cell_lac, point.cell_mcc, point.cell_mnc))
+    if not tower:
+        return None
+    return tower[0], tower[1], point.accuracy_meters or float(tower[2]), LocationSource.CELL_TOWER
+
+
 # ==================== LOCATION POINTS ENDPOINTS ====================
 
 @router.post("/case/{case_id}/points", response_model=LocationPointResponse)
@@ -122,9 +149,7 @@ async def create_location_point(
     current_user: User = Depends(get_current_user)
 ):
     """Create a single location point"""
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
+    check_case_access(case_id, current_user, db)
     
     # Map source string to enum
     source_map = {
@@ -137,17 +162,25 @@ async def create_location_point(
     }
     source_enum = source_map.get((point.source or "").lower(), LocationSource.UNKNOWN)
     
+    located = locate_point(point, source_enum, resolve_point_cells([point]))
+    if located is None:
+        raise HTTPException(status_code=400, detail="Point has no coordinates and its cell tower is unknown")
+    latitude, longitude, accuracy, source_enum = located
+    
     db_point = LocationPoint(
         case_id=case_id,
         suspect_id=point.suspect_id,
         suspect_name=point.suspect_name,
         device_id=point.device_id,
-        latitude=point.latitude,
-        longitude=point.longitude,
+        latitude=latitude,
+        longitude=longitude,
         altitude=point.altitude,
-        accuracy_meters=point.accuracy_meters,
+        accuracy_meters=accuracy,
         source=source_enum,
         cell_id=point.cell_id,
+        cell_lac=point.cell_lac,
+        cell_mcc=point.cell_mcc,
+        cell_mnc=point.cell_mnc,
         wifi_bssid=point.wifi_bssid,
         wifi_ssid=point.wifi_ssid,
         location_name=point.location_name,
@@ -175,9 +208,7 @@ async def bulk_import_location_points(
     current_user: User = Depends(get_current_user)
 ):
     """Bulk import location points"""
-    case = db.query(Case).filter(Case.id == case_id, Case.is_active == True).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
+    check_case_access(case_id, current_user, db)
     
     source_map = {
         "gps": LocationSource.GPS,
@@ -188,9 +219,20 @@ async def bulk_import_location_points(
         "app_data": LocationSource.APP_DATA,
     }
     
+    # Tower positions for points without coordinates, each distinct cell looked up once
+    towers = resolve_point_cells([
+        p for p in request.points if p.latitude is None or p.longitude is None
+    ])
+    
     created_count = 0
+    skipped_count = 0
     for point in request.points:
         source_enum = source_map.get((point.source or "").lower(), LocationSource.UNKNOWN)
+        located = locate_point(point, source_enum, towers)
+        if located is None:
+            skipped_count += 1
+            continue
+        latitude, longitude, accuracy, source_enum = located
         
         db_point = LocationPoint(
             case_id=case_id,
@@ -198,12 +240,15 @@ async def bulk_import_location_points(
             suspect_id=point.suspect_id,
             suspect_name=point.suspect_name,
             device_id=point.device_id,
-            latitude=point.latitude,
-            longitude=point.longitude,
+            latitude=latitude,
+            longitude=longitude,
             altitude=point.altitude,
-            accuracy_meters=point.accuracy_meters,
+            accuracy_meters=accuracy,
             source=source_enum,
             cell_id=point.cell_id,
+            cell_lac=point.cell_lac,
+            cell_mcc=point.cell_mcc,
+            cell_mnc=point.cell_mnc,
             wifi_bssid=point.wifi_bssid,
             wifi_ssid=point.wifi_ssid,
             location_name=point.location_name,
@@ -220,7 +265,11 @@ async def bulk_import_location_points(
     
     db.commit()
     
-    return {"message": f"Imported {created_count} location points", "count": created_count}
+    return {
+        "message": f"Imported {created_count} location points",
+        "count": created_count,
+        "skipped": skipped_count
+    }
 
 
 @router.get("/case/{case_id}/points", response_model=List[LocationPointResponse])
@@ -246,6 +295,63 @@ async def list_location_points(
     return points
 
 
+@router.get("/case/{case_id}/points/bbox")
+async def query_points_in_bbox(
+    case_id: int,
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    suspect_id: Optional[str] = None,
+    source: Optional[str] = None,
+    limit: int = Query(5000, ge=1, le=50000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Points inside a bounding box (and optional time range) for the map viewport.
+    Uses the (case_id, grid_cell, timestamp) index.
+    """
+    check_case_access(case_id, current_user, db)
+    if south > north or west > east:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    
+    cell_filter = or_(*[
+        LocationPoint.grid_cell.between(low, high)
+        for low, high in grid_cell_ranges(south, west, north, east)
+    ])
+    query = db.query(LocationPoint).filter(
+        LocationPoint.case_id == case_id,
+        cell_filter,
+        LocationPoint.latitude.between(south, north),
+        LocationPoint.longitude.between(west, east)
+    )
+    if start:
+        query = query.filter(LocationPoint.timestamp >= start)
+    if end:
+        query = query.filter(LocationPoint.timestamp <= end)
+    if suspect_id:
+        query = query.filter(LocationPoint.suspect_id == suspect_id)
+    if source:
+        try:
+            query = query.filter(LocationPoint.source == LocationSource(source.lower()))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid source")
+    
+    # One extra row tells whether the viewport was truncated
+    points = query.order_by(LocationPoint.timestamp.asc()).limit(limit + 1).all()
+    truncated = len(points) > limit
+    points = points[:limit]
+    
+    return {
+        "points": [point_to_dict(p) for p in points],
+        "count": len(points),
+        "truncated": truncated
+    }
+
+
 @router.delete("/case/{case_id}/points")
 async def delete_all_location_points(
     case_id: int,
@@ -306,6 +412,46 @@ async def list_location_clusters(
     return clusters
 
 
+@router.post(
+    "/case/{case_id}/clusters/generate",
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def generate_location_clusters(
+    case_id: int,
+    distance_m: Optional[float] = Query(None, gt=0, description="Max movement while staying"),
+    min_stay_minutes: Optional[float] = Query(None, gt=0),
+    eps_m: Optional[float] = Query(None, gt=0, description="Clustering radius"),
+    min_visits: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Detect stay points and rebuild generated clusters (manual clusters are kept).
+    Runs as a background job - poll /jobs/{job_id} for progress and result.
+    """
+    check_case_access(case_id, current_user, db)
+    
+    job = find_active_job(db, "location_clustering", case_id)
+    if not job:
+        job = submit_job(
+            db, "location_clustering", case_id=case_id, user_id=current_user.id,
+            params={
+                "distance_m": distance_m,
+                "min_stay_minutes": min_stay_minutes,
+                "eps_m": eps_m,
+                "min_visits": min_visits
+            }
+        )
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Location clustering started"
+    )
+
+
 @router.delete("/case/{case_id}/clusters")
 async def delete_all_location_clusters(
     case_id: int,
@@ -321,41 +467,54 @@ async def delete_all_location_clusters(
 # ==================== TIMELINE DATA ENDPOINT ====================
 
 @router.get("/case/{case_id}/timeline", response_model=TimelineDataResponse)
-async def get_timeline_data(
+def get_timeline_data(
     case_id: int,
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Simplify tracks for this map zoom level"),
+    bucket_minutes: Optional[int] = Query(None, ge=1, description="Keep one point per time bucket instead"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get complete timeline data for visualization"""
+    """Get timeline data for visualization.
+    With zoom or bucket_minutes, each person's track is downsampled (cached per level);
+    use /timeline/detail for full detail of a time window.
+    (Plain def - loading and simplifying tracks runs in the threadpool, not on the event loop.)
+    """
+    check_case_access(case_id, current_user, db)
+    downsampled = zoom is not None or bucket_minutes is not None
     
-    # Get all points
-    points = db.query(LocationPoint).filter(
-        LocationPoint.case_id == case_id
-    ).order_by(LocationPoint.timestamp.asc()).all()
+    if downsampled:
+        simplified = get_downsampled_points(db, case_id, zoom=zoom, bucket_minutes=bucket_minutes)
+        point_list = simplified["points"]
+        total_points = simplified["totalPoints"]
+        persons = [
+            row[0] for row in db.query(LocationPoint.suspect_name).filter(
+                LocationPoint.case_id == case_id,
+                LocationPoint.suspect_name.isnot(None)
+            ).distinct().all()
+        ]
+        start, end = db.query(
+            func.min(LocationPoint.timestamp), func.max(LocationPoint.timestamp)
+        ).filter(LocationPoint.case_id == case_id).one()
+    else:
+        # Get all points
+        points = db.query(LocationPoint).filter(
+            LocationPoint.case_id == case_id
+        ).order_by(LocationPoint.timestamp.asc()).all()
+        
+        # Build points list for frontend
+        point_list = [point_to_dict(p) for p in points]
+        total_points = len(points)
+        
+        # Get unique persons
+        persons = list(set(p.suspect_name for p in points if p.suspect_name))
+        timed = [p.timestamp for p in points if p.timestamp]
+        start, end = (timed[0], timed[-1]) if timed else (None, None)
     
     # Get clusters
     clusters = db.query(LocationCluster).filter(
         LocationCluster.case_id == case_id
     ).all()
     
-    # Build points list for frontend
-    point_list = []
-    for p in points:
-        point_list.append({
-            "id": str(p.id),
-            "lat": p.latitude,
-            "lng": p.longitude,
-            "timestamp": p.timestamp.isoformat() if p.timestamp else None,
-            "label": p.location_name or f"Point {p.id}",
-            "source": p.source.value if p.source else "unknown",
-            "accuracy": p.accuracy_meters,
-            "address": p.address,
-            "notes": p.notes,
-            "personId": p.suspect_id,
-            "personName": p.suspect_name,
-            "locationType": p.location_type
-        })
-    
     # Build clusters list for frontend
     cluster_list = []
     for c in clusters:
@@ -368,21 +527,26 @@ async def get_timeline_data(
             "radius": c.radius_meters,
             "visits": c.visit_count,
             "duration": c.total_duration_minutes,
+            "uniqueVisitors": c.unique_visitors,
+            "firstVisit": c.first_visit.isoformat() if c.first_visit else None,
+            "lastVisit": c.last_visit.isoformat() if c.last_visit else None,
+            "isGenerated": bool(c.is_generated),
             "isSuspicious": c.is_suspicious,
             "riskScore": c.risk_score
         })
     
-    # Get unique persons
-    persons = list(set(p.suspect_name for p in points if p.suspect_name))
-    
     # Summary
     summary = {
-        "totalPoints": len(points),
+        "totalPoints": total_points,
+        "returnedPoints": len(point_list),
+        "downsampled": downsampled,
+        "zoom": zoom,
+        "bucketMinutes": bucket_minutes,
         "totalClusters": len(clusters),
         "totalPersons": len(persons),
         "dateRange": {
-            "start": points[0].timestamp.isoformat() if points and points[0].timestamp else None,
-            "end": points[-1].timestamp.isoformat() if points and points[-1].timestamp else None
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None
         }
     }
     
@@ -394,6 +558,114 @@ async def get_timeline_data(
     )
 
 
+@router.get("/case/{case_id}/timeline/detail")
+def get_timeline_detail(
+    case_id: int,
+    start: datetime,
+    end: datetime,
+    suspect_id: Optional[str] = None,
+    limit: int = Query(10000, ge=1, le=50000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-detail points of a time window (complements the downsampled timeline).
+    (Plain def - the point load runs in the threadpool.)
+    """
+    check_case_access(case_id, current_user, db)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    query = db.query(LocationPoint).filter(
+        LocationPoint.case_id == case_id,
+        LocationPoint.timestamp >= start,
+        LocationPoint.timestamp <= end
+    )
+    if suspect_id:
+        query = query.filter(LocationPoint.suspect_id == suspect_id)
+    
+    points = query.order_by(LocationPoint.timestamp.asc()).limit(limit + 1).all()
+    truncated = len(points) > limit
+    points = points[:limit]
+    
+    return {
+        "points": [point_to_dict(p) for p in points],
+        "count": len(points),
+        "truncated": truncated
+    }
+
+
+# ==================== MAP CELLS ENDPOINT ====================
+
+@router.get("/case/{case_id}/map/cells")
+def get_location_map_cells(
+    case_id: int,
+    zoom: int = Query(..., ge=0, le=22),
+    south: Optional[float] = Query(None, ge=-90, le=90),
+    west: Optional[float] = Query(None, ge=-180, le=180),
+    north: Optional[float] = Query(None, ge=-90, le=90),
+    east: Optional[float] = Query(None, ge=-180, le=180),
+    suspect_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Points aggregated into grid cells for the map (count, centroid, people, time range).
+    Cached per case + zoom level; the bounding box only selects cells.
+    """
+    check_case_access(case_id, current_user, db)
+    if None not in (south, north, west, east) and (south > north or west > east):
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    
+    result = get_location_cells(db, case_id, zoom, suspect_id=suspect_id, start=start, end=end)
+    cells = cells_in_bbox(result["cells"], south, west, north, east)
+    return {
+        "cells": cells,
+        "cellCount": len(cells),
+        "pointCount": sum(c["count"] for c in cells),
+        "cellDegrees": result["cellDegrees"],
+        "zoom": zoom
+    }
+
+
+# ==================== CO-LOCATION ENDPOINT ====================
+
+@router.get("/case/{case_id}/colocations")
+def get_colocations(
+    case_id: int,
+    suspect_ids: Optional[List[str]] = Query(None, description="Suspects to compare (default: all)"),
+    distance_m: float = Query(100, gt=0, le=5000),
+    window_minutes: float = Query(10, gt=0, le=1440),
+    min_matches: int = Query(1, ge=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Meeting events: suspects within distance_m of each other within window_minutes.
+    (Plain def - CPU-bound work runs in the threadpool, not on the event loop.)
+    """
+    check_case_access(case_id, current_user, db)
+    
+    result = find_colocations(
+        db, case_id,
+        suspect_ids=suspect_ids,
+        distance_m=distance_m,
+        window_minutes=window_minutes,
+        min_matches=min_matches
+    )
+    return {
+        **result,
+        "params": {
+            "suspect_ids": suspect_ids,
+            "distance_m": distance_m,
+            "window_minutes": window_minutes,
+            "min_matches": min_matches
+        }
+    }
+
+
 # ==================== STATISTICS ENDPOINT ====================
 
 @router.get("/case/{case_id}/stats")
@@ -4,7 +4,8 @@ Admin endpoints for viewing login history and map data
 """
 from math import ceil
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 
@@ -18,6 +19,7 @@ from app.schemas.login_history import (
     LoginMapResponse,
     LoginStats
 )
+from app.services.map_cells import get_login_cells, cells_in_bbox
 from app.utils.security import require_admin
 
 router = APIRouter(prefix="/login-history", tags=["Login History"])
@@ -177,6 +179,35 @@ async def get_login_map_data(
     )
 
 
+@router.get("/map/cells")
+def get_login_map_cells(
+    days: int = Query(7, ge=1, le=90),
+    zoom: int = Query(..., ge=0, le=22),
+    south: Optional[float] = Query(None, ge=-90, le=90),
+    west: Optional[float] = Query(None, ge=-180, le=180),
+    north: Optional[float] = Query(None, ge=-90, le=90),
+    east: Optional[float] = Query(None, ge=-180, le=180),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Successful logins aggregated into grid cells (count, centroid, users, time range).
+    Covers every login of the period, unlike /map which returns the latest 500.
+    """
+    if None not in (south, north, west, east) and (south > north or west > east):
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    
+    result = get_login_cells(db, days, zoom)
+    cells = cells_in_bbox(result["cells"], south, west, north, east)
+    return {
+        "cells": cells,
+        "cell_count": len(cells),
+        "total_logins": sum(c["count"] for c in cells),
+        "cell_degrees": result["cellDegrees"],
+        "zoom": zoom
+    }
+
+
 @router.get("/stats", response_model=LoginStats)
 async def get_login_stats(
     current_user: User = Depends(require_admin),
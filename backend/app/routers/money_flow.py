@@ -2,12 +2,16 @@
 Money Flow Router
 Graph nodes and edges management
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import Counter
+from datetime import datetime
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import or_, select, update
 
 from app.database import get_db
-from app.models.case import Case
 from app.models.user import User, UserRole
 from app.models.money_flow import MoneyFlowNode, MoneyFlowEdge
 from app.schemas.money_flow import (
@@ -20,74 +24,215 @@ from app.schemas.money_flow import (
     MoneyFlowGraph,
     BulkNodesCreate,
     BulkEdgesCreate,
-    NodePositionsUpdate
+    NodePositionsUpdate,
+    NodePositionsResult,
+    GraphImport,
+    GraphImportResult,
+    GraphChanges
+)
+from app.schemas.job import JobSubmitResponse
+from app.services import flow_patterns, graph_layout  # noqa - register the flow_patterns / money_flow_layout jobs
+from app.services.graph_changes import get_changes, record_deletions
+from app.services.jobs import submit_job, find_active_job
+from app.services.money_flow_graph import (
+    FlowGraph,
+    bump_graph_version,
+    get_flow_graph,
+    graph_version,
+    k_shortest_paths,
+    temporal_paths,
+    max_flow
 )
+from app.utils.cache import TTLCache
+from app.utils.case_access import check_case_access
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/cases/{case_id}/money-flow", tags=["Money Flow"])
 
+# Ids per IN (...) list - stays under SQL Server's 2100 parameter limit
+_IN_CHUNK = 1000
 
-def check_case_access(case_id: int, current_user: User, db: Session) -> Case:
-    """Helper to check case access permissions"""
-    case = db.query(Case).filter(Case.id == case_id).first()
-    
-    if not case:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Case not found"
-        )
-    
-    if current_user.role != UserRole.SUPER_ADMIN:
-        if case.organization_id != current_user.organization_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
-    
-    return case
+# Serialized graphs per (case, graph version)
+_graph_json_cache = TTLCache(maxsize=16, ttl=1800)
 
 
 # ============== Graph ==============
 
 @router.get("", response_model=MoneyFlowGraph)
-async def get_money_flow_graph(
+def get_money_flow_graph(
     case_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get complete money flow graph for a case
+    Get complete money flow graph for a case.
+    Serialized once per graph version; the version is the ETag, so polling
+    with If-None-Match gets 304 Not Modified while nothing has changed.
     """
-    case = check_case_access(case_id, current_user, db)
-    
-    # Get all nodes
-    nodes = db.query(MoneyFlowNode).filter(MoneyFlowNode.case_id == case_id).all()
-    
-    # Get all edges
-    edges = db.query(MoneyFlowEdge).filter(MoneyFlowEdge.case_id == case_id).all()
-    
-    # Calculate statistics
-    total_amount = db.query(func.sum(MoneyFlowEdge.amount)) \
-                     .filter(MoneyFlowEdge.case_id == case_id) \
-                     .scalar() or 0
+    check_case_access(case_id, current_user, db)
+    version = graph_version(db, case_id)
+    etag = f'"mf-{case_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
     
-    suspects_count = db.query(MoneyFlowNode) \
-                       .filter(MoneyFlowNode.case_id == case_id, MoneyFlowNode.is_suspect == True) \
-                       .count()
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    victims_count = db.query(MoneyFlowNode) \
-                      .filter(MoneyFlowNode.case_id == case_id, MoneyFlowNode.is_victim == True) \
-                      .count()
+    body = _graph_json_cache.get_or_set((case_id, version), lambda: _serialize_graph(case_id, db))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (list or *)"""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+def _serialize_graph(case_id: int, db: Session) -> bytes:
+    nodes = [
+        NodeResponse.model_validate(n)
+        for n in db.query(MoneyFlowNode).filter(MoneyFlowNode.case_id == case_id).all()
+    ]
+    edges = [
+        EdgeResponse.model_validate(e)
+        for e in db.query(MoneyFlowEdge).filter(MoneyFlowEdge.case_id == case_id).all()
+    ]
     
+    # Statistics from the loaded rows - no extra aggregate queries
     return MoneyFlowGraph(
         case_id=case_id,
-        nodes=[NodeResponse.model_validate(n) for n in nodes],
-        edges=[EdgeResponse.model_validate(e) for e in edges],
-        total_amount=total_amount,
+        nodes=nodes,
+        edges=edges,
+        total_amount=sum(e.amount or 0 for e in edges),
         node_count=len(nodes),
         edge_count=len(edges),
-        suspects_count=suspects_count,
-        victims_count=victims_count
+        suspects_count=sum(1 for n in nodes if n.is_suspect),
+        victims_count=sum(1 for n in nodes if n.is_victim)
+    ).model_dump_json().encode()
+
+
+@router.get("/changes", response_model=GraphChanges)
+def get_graph_changes(
+    case_id: int,
+    since: Optional[datetime] = Query(None, description="Cursor from the previous response"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Nodes and edges inserted, updated or deleted since a cursor (delta sync).
+    Without `since` (or after a rebuild / an expired cursor) returns the full
+    graph with reset=true. Apply deletions before upserts.
+    """
+    check_case_access(case_id, current_user, db)
+    version = graph_version(db, case_id)
+    changes = get_changes(
+        db, case_id, "money_flow", {"node": MoneyFlowNode, "edge": MoneyFlowEdge}, since
+    )
+    return GraphChanges(
+        case_id=case_id,
+        cursor=changes["cursor"],
+        graph_version=version,
+        reset=changes["reset"],
+        nodes=[NodeResponse.model_validate(n) for n in changes["changed"]["node"]],
+        edges=[EdgeResponse.model_validate(e) for e in changes["changed"]["edge"]],
+        deleted_node_ids=changes["deleted"]["node"],
+        deleted_edge_ids=changes["deleted"]["edge"]
+    )
+
+
+@router.post("/import", response_model=GraphImportResult, status_code=status.HTTP_201_CREATED)
+async def import_graph(
+    case_id: int,
+    request: GraphImport,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create nodes and edges in one transaction.
+    Nodes carry client temp ids; edges reference them (or existing node ids).
+    Returns the temp id -> server id map. Nothing is created if anything is invalid.
+    """
+    check_case_access(case_id, current_user, db)
+    
+    if current_user.role in [UserRole.VIEWER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions"
+        )
+    
+    temp_ids = Counter(n.temp_id for n in request.nodes)
+    duplicates = sorted(t for t, count in temp_ids.items() if count > 1)
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Duplicate node temp ids: {duplicates[:10]}"
+        )
+    
+    # Existing nodes referenced by edges must belong to the case
+    referenced = list({
+        node_id for e in request.edges
+        for node_id in (e.from_node_id, e.to_node_id) if node_id is not None
+    })
+    existing = set()
+    for start in range(0, len(referenced), _IN_CHUNK):
+        existing.update(db.scalars(
+            select(MoneyFlowNode.id).where(
+                MoneyFlowNode.case_id == case_id,
+                MoneyFlowNode.id.in_(referenced[start:start + _IN_CHUNK])
+            )
+        ))
+    
+    errors = []
+    for i, e in enumerate(request.edges):
+        for side, temp_id, node_id in (("from", e.from_temp_id, e.from_node_id), ("to", e.to_temp_id, e.to_node_id)):
+            if temp_id is not None:
+                if temp_id not in temp_ids:
+                    errors.append(f"edges[{i}].{side}_temp_id '{temp_id}' is not in nodes")
+            elif node_id is None:
+                errors.append(f"edges[{i}] has no {side} node")
+            elif node_id not in existing:
+                errors.append(f"edges[{i}].{side}_node_id {node_id} not found")
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid edges", "errors": errors[:20], "error_count": len(errors)}
+        )
+    
+    try:
+        nodes = [
+            MoneyFlowNode(case_id=case_id, **n.model_dump(exclude={"temp_id"}))
+            for n in request.nodes
+        ]
+        db.add_all(nodes)
+        db.flush()
+        node_ids = {n.temp_id: node.id for n, node in zip(request.nodes, nodes)}
+        
+        edges = [
+            MoneyFlowEdge(
+                case_id=case_id,
+                from_node_id=node_ids[e.from_temp_id] if e.from_temp_id is not None else e.from_node_id,
+                to_node_id=node_ids[e.to_temp_id] if e.to_temp_id is not None else e.to_node_id,
+                **e.model_dump(exclude={"temp_id", "from_temp_id", "from_node_id", "to_temp_id", "to_node_id"})
+            )
+            for e in request.edges
+        ]
+        db.add_all(edges)
+        db.flush()
+        edge_ids = {e.temp_id: edge.id for e, edge in zip(request.edges, edges) if e.temp_id is not None}
+        
+        bump_graph_version(db, case_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    return GraphImportResult(
+        node_ids=node_ids,
+        edge_ids=edge_ids,
+        nodes_created=len(nodes),
+        edges_created=len(edges)
     )
 
 
@@ -118,7 +263,7 @@ async def create_node(
     """
     Create a new node
     """
-    case = check_case_access(case_id, current_user, db)
+    check_case_access(case_id, current_user, db)
     
     # Check edit permission
     if current_user.role in [UserRole.VIEWER]:
@@ -133,6 +278,7 @@ async def create_node(
     )
     
     db.add(node)
+    bump_graph_version(db, case_id)
     db.commit()
     db.refresh(node)
     
@@ -157,21 +303,62 @@ async def create_nodes_bulk(
             detail="Insufficient permissions"
         )
     
-    created_nodes = []
-    for node_data in request.nodes:
-        node = MoneyFlowNode(
-            case_id=case_id,
-            **node_data.model_dump()
-        )
-        db.add(node)
-        created_nodes.append(node)
-    
+    created_nodes = [
+        MoneyFlowNode(case_id=case_id, **node_data.model_dump())
+        for node_data in request.nodes
+    ]
+    db.add_all(created_nodes)
+    # Flush assigns ids in batched INSERTs; defaults are set client-side,
+    # so the response is built before commit expires the objects
+    db.flush()
+    response = [NodeResponse.model_validate(n) for n in created_nodes]
+    bump_graph_version(db, case_id)
     db.commit()
     
-    for node in created_nodes:
-        db.refresh(node)
+    return response
+
+
+@router.patch("/nodes/positions", response_model=NodePositionsResult)
+async def update_node_positions(
+    case_id: int,
+    request: NodePositionsUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Update positions for multiple nodes (after drag or auto-layout).
+    One ownership query per 1000 ids and a single executemany UPDATE.
+    (Declared before /nodes/{node_id} so "positions" isn't taken for an id.)
+    """
+    check_case_access(case_id, current_user, db)
     
-    return [NodeResponse.model_validate(n) for n in created_nodes]
+    # Last position wins if a node is sent twice
+    positions = {pos.id: pos for pos in request.positions}
+    ids = list(positions)
+    
+    owned = set()
+    for start in range(0, len(ids), _IN_CHUNK):
+        owned.update(db.scalars(
+            select(MoneyFlowNode.id).where(
+                MoneyFlowNode.case_id == case_id,
+                MoneyFlowNode.id.in_(ids[start:start + _IN_CHUNK])
+            )
+        ))
+    
+    now = datetime.utcnow()
+    rows = [
+        {"id": node_id, "x_position": pos.x, "y_position": pos.y, "updated_at": now}
+        for node_id, pos in positions.items() if node_id in owned
+    ]
+    if rows:
+        db.execute(update(MoneyFlowNode), rows)
+        bump_graph_version(db, case_id)
+        db.commit()
+    
+    return NodePositionsResult(
+        updated=len(rows),
+        missing=[node_id for node_id in ids if node_id not in owned]
+    )
 
 
 @router.get("/nodes/{node_id}", response_model=NodeResponse)
@@ -234,6 +421,7 @@ async def update_node(
     for key, value in update_data.items():
         setattr(node, key, value)
     
+    bump_graph_version(db, case_id)
     db.commit()
     db.refresh(node)
     
@@ -269,39 +457,18 @@ async def delete_node(
             detail="Node not found"
         )
     
+    edge_ids = list(db.scalars(
+        select(MoneyFlowEdge.id).where(
+            or_(MoneyFlowEdge.from_node_id == node_id, MoneyFlowEdge.to_node_id == node_id)
+        )
+    ))
     db.delete(node)
+    record_deletions(db, case_id, "money_flow", "node", [node_id])
+    record_deletions(db, case_id, "money_flow", "edge", edge_ids)
+    bump_graph_version(db, case_id)
     db.commit()
 
 
-@router.patch("/nodes/positions", response_model=list[NodeResponse])
-async def update_node_positions(
-    case_id: int,
-    request: NodePositionsUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Update positions for multiple nodes (after drag in UI)
-    """
-    check_case_access(case_id, current_user, db)
-    
-    updated_nodes = []
-    for pos in request.positions:
-        node = db.query(MoneyFlowNode).filter(
-            MoneyFlowNode.id == pos["id"],
-            MoneyFlowNode.case_id == case_id
-        ).first()
-        
-        if node:
-            node.x_position = pos.get("x")
-            node.y_position = pos.get("y")
-            updated_nodes.append(node)
-    
-    db.commit()
-    
-    return [NodeResponse.model_validate(n) for n in updated_nodes]
-
-
 # ============== Edges ==============
 
 @router.get("/edges", response_model=list[EdgeResponse])
@@ -360,6 +527,7 @@ async def create_edge(
     )
     
     db.add(edge)
+    bump_graph_version(db, case_id)
     db.commit()
     db.refresh(edge)
     
@@ -384,21 +552,17 @@ async def create_edges_bulk(
             detail="Insufficient permissions"
         )
     
-    created_edges = []
-    for edge_data in request.edges:
-        edge = MoneyFlowEdge(
-            case_id=case_id,
-            **edge_data.model_dump()
-        )
-        db.add(edge)
-        created_edges.append(edge)
-    
+    created_edges = [
+        MoneyFlowEdge(case_id=case_id, **edge_data.model_dump())
+        for edge_data in request.edges
+    ]
+    db.add_all(created_edges)
+    db.flush()
+    response = [EdgeResponse.model_validate(e) for e in created_edges]
+    bump_graph_version(db, case_id)
     db.commit()
     
-    for edge in created_edges:
-        db.refresh(edge)
-    
-    return [EdgeResponse.model_validate(e) for e in created_edges]
+    return response
 
 
 @router.get("/edges/{edge_id}", response_model=EdgeResponse)
@@ -461,6 +625,7 @@ async def update_edge(
     for key, value in update_data.items():
         setattr(edge, key, value)
     
+    bump_graph_version(db, case_id)
     db.commit()
     db.refresh(edge)
     
@@ -497,4 +662,182 @@ async def delete_edge(
         )
     
     db.delete(edge)
+    record_deletions(db, case_id, "money_flow", "edge", [edge_id])
+    bump_graph_version(db, case_id)
     db.commit()
+
+
+# ============== Layout ==============
+
+@router.post("/layout", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def layout_graph(
+    case_id: int,
+    incremental: bool = Query(True, description="Only place nodes without a position"),
+    iterations: Optional[int] = Query(None, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Compute force-directed node positions (stored as x_position/y_position).
+    Runs as a background job - poll /jobs/{job_id} for progress and result.
+    """
+    check_case_access(case_id, current_user, db)
+    
+    if current_user.role in [UserRole.VIEWER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions"
+        )
+    
+    job = find_active_job(db, "money_flow_layout", case_id)
+    if not job:
+        job = submit_job(
+            db, "money_flow_layout", case_id=case_id, user_id=current_user.id,
+            params={"incremental": incremental, "iterations": iterations}
+        )
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Graph layout started"
+    )
+
+
+# ============== Analysis ==============
+# Plain def endpoints: graph algorithms are CPU-bound and run in the threadpool
+
+def _analysis_graph(case_id: int, source_ids: list[int], target_ids: list[int], db: Session) -> FlowGraph:
+    graph = get_flow_graph(db, case_id)
+    if not graph.indexes(source_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No source node found in this case")
+    if not graph.indexes(target_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No target node found in this case")
+    return graph
+
+
+@router.get("/analysis/paths")
+def find_shortest_paths(
+    case_id: int,
+    source_ids: list[int] = Query(...),
+    target_ids: list[int] = Query(...),
+    k: int = Query(3, ge=1, le=20),
+    min_amount: float = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    k shortest (fewest hops) paths from any source node to any target node
+    """
+    check_case_access(case_id, current_user, db)
+    graph = _analysis_graph(case_id, source_ids, target_ids, db)
+    
+    paths = k_shortest_paths(graph, source_ids, target_ids, k=k, min_amount=min_amount)
+    return {"paths": paths, "count": len(paths)}
+
+
+@router.get("/analysis/temporal-paths")
+def find_temporal_paths(
+    case_id: int,
+    source_ids: list[int] = Query(...),
+    target_ids: list[int] = Query(...),
+    max_depth: int = Query(6, ge=1, le=12),
+    max_paths: int = Query(100, ge=1, le=1000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_gap_hours: Optional[float] = Query(None, gt=0),
+    min_amount: float = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    All paths whose transfers happen in time order (money could really
+    have travelled along them), up to max_depth transfers
+    """
+    check_case_access(case_id, current_user, db)
+    graph = _analysis_graph(case_id, source_ids, target_ids, db)
+    
+    result = temporal_paths(
+        graph, source_ids, target_ids,
+        max_depth=max_depth,
+        max_paths=max_paths,
+        start=start,
+        end=end,
+        max_gap_hours=max_gap_hours,
+        min_amount=min_amount
+    )
+    return {**result, "count": len(result["paths"])}
+
+
+@router.get("/analysis/max-flow")
+def find_max_flow(
+    case_id: int,
+    source_ids: list[int] = Query(...),
+    target_ids: list[int] = Query(...),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Maximum amount that can have moved from the source nodes to the target nodes
+    """
+    check_case_access(case_id, current_user, db)
+    graph = _analysis_graph(case_id, source_ids, target_ids, db)
+    
+    return max_flow(graph, source_ids, target_ids, start=start, end=end)
+
+
+@router.post("/analysis/patterns", response_model=JobSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def detect_flow_patterns(
+    case_id: int,
+    window_hours: float = Query(24, gt=0, le=24 * 90, description="Fan-in/fan-out/structuring window"),
+    min_counterparties: int = Query(5, ge=2, le=1000),
+    structuring_threshold: Optional[float] = Query(None, gt=0, description="Reporting threshold (edge currency)"),
+    structuring_margin: float = Query(0.1, gt=0, lt=1),
+    min_structuring_count: int = Query(3, ge=2),
+    max_cycle_length: int = Query(4, ge=2, le=8),
+    cycle_window_hours: float = Query(72, gt=0, le=24 * 365),
+    min_return_ratio: float = Query(0.5, ge=0, le=10),
+    include_crypto: bool = True,
+    write_scores: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Detect fan-in, fan-out, structuring and round-trip patterns over the case's
+    money-flow edges and crypto transactions; raises risk scores of what is flagged.
+    Runs as a background job - the job result lists the flagged events.
+    """
+    check_case_access(case_id, current_user, db)
+    
+    if write_scores and current_user.role in [UserRole.VIEWER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions"
+        )
+    
+    job = find_active_job(db, "flow_patterns", case_id)
+    if not job:
+        job = submit_job(
+            db, "flow_patterns", case_id=case_id, user_id=current_user.id,
+            params={
+                "window_hours": window_hours,
+                "min_counterparties": min_counterparties,
+                "structuring_threshold": structuring_threshold,
+                "structuring_margin": structuring_margin,
+                "min_structuring_count": min_structuring_count,
+                "max_cycle_length": max_cycle_length,
+                "cycle_window_hours": cycle_window_hours,
+                "min_return_ratio": min_return_ratio,
+                "include_crypto": include_crypto,
+                "write_scores": write_scores
+            }
+        )
+    
+    return JobSubmitResponse(
+        job_id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        message="Pattern detection started"
+    )
@@ -19,7 +19,7 @@ from app.schemas.registration import (
     RegistrationReject,
     RegistrationStats
 )
-from app.utils.security import get_password_hash, get_current_user
+from app.utils.security import get_password_hash_async, get_current_user
 
 router = APIRouter(prefix="/registrations", tags=["Registration"])
 
@@ -58,7 +58,7 @@ async def submit_registration(
     # Create registration request
     registration = RegistrationRequest(
         email=request.email,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=await get_password_hash_async(request.password),
         first_name=request.first_name,
         last_name=request.last_name,
         phone=request.phone,
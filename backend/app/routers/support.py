@@ -26,6 +26,7 @@ from app.schemas.support_ticket import (
     TicketUserInfo
 )
 from app.utils.security import get_current_user, require_admin
+from app.services.search import apply_search
 
 router = APIRouter(prefix="/support", tags=["Support Tickets"])
 
@@ -325,21 +326,15 @@ async def admin_list_tickets(
         query = query.filter(SupportTicket.category == category)
     if priority:
         query = query.filter(SupportTicket.priority == priority)
+    search_order = []
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                SupportTicket.ticket_number.ilike(search_term),
-                SupportTicket.subject.ilike(search_term),
-                SupportTicket.description.ilike(search_term)
-            )
-        )
+        query, search_order = apply_search(query, SupportTicket, search)
     
     # Count total
     total = query.count()
     
     # Paginate with eager loading
-    tickets = query.order_by(SupportTicket.created_at.desc()).offset(
+    tickets = query.order_by(*search_order, SupportTicket.created_at.desc()).offset(
         (page - 1) * page_size
     ).limit(page_size).all()
     
@@ -6,10 +6,10 @@ from math import ceil
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
 from app.database import get_db
 from app.models.user import User, UserRole
+from app.services.search import apply_search
 from app.schemas.user import (
     UserCreate,
     UserUpdate,
@@ -24,10 +24,13 @@ import secrets
 import string
 from app.utils.security import (
     get_current_user,
-    get_password_hash,
-    verify_password,
-    require_roles
+    get_password_hash_async,
+    verify_password_async,
+    require_roles,
+    invalidate_principal,
+    revoke_tokens
 )
+from app.utils.sessions import end_sessions
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -55,15 +58,10 @@ async def list_users(
     elif organization_id:
         query = query.filter(User.organization_id == organization_id)
     
-    # Search filter
+    # Search filter (full-text, best matches first)
+    search_order = []
     if search:
-        query = query.filter(
-            or_(
-                User.email.ilike(f"%{search}%"),
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%")
-            )
-        )
+        query, search_order = apply_search(query, User, search)
     
     # Role filter
     if role:
@@ -77,7 +75,7 @@ async def list_users(
     total = query.count()
     
     # Paginate
-    users = query.order_by(User.created_at.desc()) \
+    users = query.order_by(*search_order, User.created_at.desc()) \
                  .offset((page - 1) * page_size) \
                  .limit(page_size) \
                  .all()
@@ -116,7 +114,7 @@ async def create_user(
     # Create user
     user = User(
         email=request.email,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=await get_password_hash_async(request.password),
         first_name=request.first_name,
         last_name=request.last_name,
         phone=request.phone,
@@ -210,7 +208,14 @@ async def update_user(
     for key, value in update_data.items():
         setattr(user, key, value)
     
+    # Deactivation also ends the user's current sessions
+    if update_data.get("is_active") is False:
+        revoke_tokens(user)
+    
     db.commit()
+    invalidate_principal(user_id)
+    if update_data.get("is_active") is False:
+        end_sessions(db, user_id=user_id)
     db.refresh(user)
     
     return UserResponse.model_validate(user)
@@ -242,6 +247,7 @@ async def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
 
 
 @router.post("/{user_id}/change-password")
@@ -264,15 +270,16 @@ async def change_password(
     user = db.query(User).filter(User.id == user_id).first()
     
     # Verify current password
-    if not verify_password(request.current_password, user.hashed_password):
+    if not await verify_password_async(request.current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
     # Update password
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
     db.commit()
+    invalidate_principal(user_id)
     
     return {"message": "Password changed successfully"}
 
@@ -328,9 +335,12 @@ async def admin_reset_password(
     
     # Generate new password
     temp_password = generate_temp_password()
-    user.hashed_password = get_password_hash(temp_password)
+    user.hashed_password = await get_password_hash_async(temp_password)
+    revoke_tokens(user)  # Sign out sessions using the old password
     
     db.commit()
+    invalidate_principal(user_id)
+    end_sessions(db, user_id=user_id)
     
     return ResetPasswordResponse(
         message="Password has been reset successfully",
@@ -339,6 +349,41 @@ async def admin_reset_password(
     )
 
 
+@router.post("/{user_id}/sign-out")
+async def force_sign_out(
+    user_id: int,
+    current_user: User = Depends(require_roles("super_admin", "org_admin")),
+    db: Session = Depends(get_db)
+):
+    """
+    End all sessions of a user (admin only).
+    Their tokens stop working on every worker within SESSION_SYNC_SECONDS.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Org admin can only sign out users in their org
+    if current_user.role == UserRole.ORG_ADMIN:
+        if user.organization_id != current_user.organization_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot sign out users outside your organization"
+            )
+    
+    sessions_ended = end_sessions(db, user_id=user_id)
+    
+    return {
+        "message": "User signed out",
+        "user_id": user_id,
+        "sessions_ended": sessions_ended
+    }
+
+
 @router.post("/{user_id}/renew-subscription", response_model=RenewSubscriptionResponse)
 async def renew_subscription(
     user_id: int,
@@ -379,6 +424,7 @@ async def renew_subscription(
     user.is_active = True
     
     db.commit()
+    invalidate_principal(user_id)
     db.refresh(user)
     
     return RenewSubscriptionResponse(
@@ -418,8 +464,11 @@ async def cancel_subscription(
     # Set subscription end to now
     user.subscription_end = datetime.utcnow()
     user.is_active = False
+    revoke_tokens(user)
     
     db.commit()
+    invalidate_principal(user_id)
+    end_sessions(db, user_id=user_id)
     
     return {
         "message": "Subscription cancelled successfully",
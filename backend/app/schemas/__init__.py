@@ -53,6 +53,11 @@ from app.schemas.money_flow import (
     NodePositionsUpdate
 )
 
+from app.schemas.job import (
+    JobResponse,
+    JobSubmitResponse
+)
+
 __all__ = [
     # Auth
     "LoginRequest",
@@ -98,5 +103,9 @@ __all__ = [
     "MoneyFlowGraph",
     "BulkNodesCreate",
     "BulkEdgesCreate",
-    "NodePositionsUpdate"
+    "NodePositionsUpdate",
+    
+    # Jobs
+    "JobResponse",
+    "JobSubmitResponse"
 ]
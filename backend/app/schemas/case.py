@@ -100,6 +100,10 @@ class CaseResponse(CaseBase):
     # Computed
     nodes_count: Optional[int] = None
     edges_count: Optional[int] = None
+    call_records_count: Optional[int] = None
+    locations_count: Optional[int] = None
+    crypto_transactions_count: Optional[int] = None
+    evidence_count: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -0,0 +1,45 @@
+"""
+Background Job Schemas
+Pydantic models for job status/progress
+"""
+import json
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import BaseModel, field_validator
+from app.models.job import JobStatus
+
+
+class JobResponse(BaseModel):
+    """Job status response"""
+    id: int
+    job_type: str
+    case_id: Optional[int]
+    created_by: Optional[int]
+    status: JobStatus
+    progress: int
+    message: Optional[str]
+    cancel_requested: bool
+    result: Optional[Any] = None
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @field_validator("result", mode="before")
+    @classmethod
+    def parse_result(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    class Config:
+        from_attributes = True
+
+
+class JobSubmitResponse(BaseModel):
+    """Returned by endpoints that start a job"""
+    job_id: int
+    job_type: str
+    status: JobStatus
+    message: str
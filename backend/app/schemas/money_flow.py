@@ -109,8 +109,8 @@ class EdgeBase(BaseModel):
     label: Optional[str] = None
 
 
-class EdgeCreate(EdgeBase):
-    """Create edge schema"""
+class EdgeDetails(BaseModel):
+    """Edge fields other than its endpoints and label"""
     amount: Optional[float] = None
     currency: str = "THB"
     transaction_date: Optional[datetime] = None
@@ -127,6 +127,11 @@ class EdgeCreate(EdgeBase):
     notes: Optional[str] = None
 
 
+class EdgeCreate(EdgeBase, EdgeDetails):
+    """Create edge schema"""
+    pass
+
+
 class EdgeUpdate(BaseModel):
     """Update edge schema"""
     from_node_id: Optional[int] = None
@@ -181,6 +186,21 @@ class MoneyFlowGraph(BaseModel):
     victims_count: int
 
 
+class GraphChanges(BaseModel):
+    """
+    Delta sync: nodes/edges inserted or updated since the cursor, and ids
+    deleted since then. reset=True means a full snapshot (replace local state).
+    """
+    case_id: int
+    cursor: datetime
+    graph_version: int
+    reset: bool
+    nodes: list[NodeResponse]
+    edges: list[EdgeResponse]
+    deleted_node_ids: list[int]
+    deleted_edge_ids: list[int]
+
+
 # ============== Bulk Operations ==============
 
 class BulkNodesCreate(BaseModel):
@@ -193,6 +213,48 @@ class BulkEdgesCreate(BaseModel):
     edges: list[EdgeCreate]
 
 
+class GraphImportNode(NodeCreate):
+    """Node keyed by a client-side temporary id"""
+    temp_id: str = Field(..., min_length=1, max_length=100)
+
+
+class GraphImportEdge(EdgeDetails):
+    """Edge whose endpoints are temp ids from the same import or existing node ids"""
+    temp_id: Optional[str] = Field(None, max_length=100)
+    from_temp_id: Optional[str] = None
+    from_node_id: Optional[int] = None
+    to_temp_id: Optional[str] = None
+    to_node_id: Optional[int] = None
+    label: Optional[str] = None
+
+
+class GraphImport(BaseModel):
+    """Nodes and edges created together in one transaction"""
+    nodes: list[GraphImportNode] = []
+    edges: list[GraphImportEdge] = []
+
+
+class GraphImportResult(BaseModel):
+    """Server ids of an imported graph, keyed by temp id"""
+    node_ids: dict[str, int]
+    edge_ids: dict[str, int]  # Only edges sent with a temp_id
+    nodes_created: int
+    edges_created: int
+
+
+class NodePosition(BaseModel):
+    """Position of one node"""
+    id: int
+    x: Optional[float] = None
+    y: Optional[float] = None
+
+
 class NodePositionsUpdate(BaseModel):
-    """Update positions for multiple nodes (after drag)"""
-    positions: list[dict]  # [{id: 1, x: 100, y: 200}, ...]
+    """Update positions for multiple nodes (after drag or auto-layout)"""
+    positions: list[NodePosition]  # [{id: 1, x: 100, y: 200}, ...]
+
+
+class NodePositionsResult(BaseModel):
+    """Acknowledgement of a bulk position update"""
+    updated: int
+    missing: list[int]  # Ids not found in the case
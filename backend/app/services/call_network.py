@@ -0,0 +1,232 @@
+"""
+Call Network Service
+Builds the call network (entities + links) from raw call records.
+
+`build_call_network` is a pure function over plain tuples so the job runner
+can execute it in the process pool; `generate_call_network` is the job
+handler that loads records, runs it and persists the result.
+"""
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import insert
+
+from app.models.call_record import CallRecord, CallEntity, CallLink
+from app.services.graph_changes import record_rebuild
+from app.services.jobs import JobContext, job_handler
+
+# Rows fetched per round trip when streaming call records
+_LOAD_BATCH = 5000
+
+
+def _calculate_risk(stats: Dict[str, Any]) -> Tuple[str, int]:
+    """High call volume or long duration = higher risk"""
+    if stats['is_suspect']:
+        return 'critical', 90
+    if stats['calls'] > 50 or stats['duration'] > 10000:
+        return 'high', 75
+    if stats['calls'] > 20 or stats['duration'] > 5000:
+        return 'medium', 50
+    if stats['calls'] > 5:
+        return 'low', 25
+    return 'unknown', 0
+
+
+def _assign_cluster(stats: Dict[str, Any]) -> int:
+    """
+    Simple clustering based on connectivity
+    Devices (main actors) get cluster 1, high-contact numbers get cluster 2, etc.
+    """
+    if stats['is_device']:
+        return 1  # Main device/suspect
+    contact_count = len(stats['contacts'])
+    if contact_count > 5:
+        return 2  # Hub/coordinator
+    if contact_count > 2:
+        return 3  # Active contact
+    return 4  # Peripheral
+
+
+def build_call_network(rows: List[tuple]) -> Dict[str, List[dict]]:
+    """
+    Aggregate call records into phone entities and undirected links.
+
+    rows: (device_number, device_owner, partner_number, partner_name,
+           duration_seconds, start_time, is_suspect_call, call_type)
+    """
+    phone_stats: Dict[str, Dict[str, Any]] = {}
+    link_stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    for device_number, device_owner, partner_phone, partner_name, duration, start_time, is_suspect, call_type in rows:
+        device_phone = device_number or device_owner or "Unknown Device"
+        duration = duration or 0
+
+        device = phone_stats.get(device_phone)
+        if device is None:
+            device = phone_stats[device_phone] = {
+                'calls': 0, 'duration': 0, 'first_seen': None, 'last_seen': None,
+                'is_device': True, 'contacts': set(), 'name': device_owner,
+                'is_suspect': False
+            }
+        partner = phone_stats.get(partner_phone)
+        if partner is None:
+            partner = phone_stats[partner_phone] = {
+                'calls': 0, 'duration': 0, 'first_seen': None, 'last_seen': None,
+                'is_device': False, 'contacts': set(), 'name': partner_name,
+                'is_suspect': False
+            }
+
+        for stats in (device, partner):
+            stats['calls'] += 1
+            stats['duration'] += duration
+            if start_time:
+                if not stats['first_seen'] or start_time < stats['first_seen']:
+                    stats['first_seen'] = start_time
+                if not stats['last_seen'] or start_time > stats['last_seen']:
+                    stats['last_seen'] = start_time
+            if is_suspect:
+                stats['is_suspect'] = True
+
+        device['contacts'].add(partner_phone)
+        partner['contacts'].add(device_phone)
+
+        # Ensure consistent ordering for undirected links
+        key = (device_phone, partner_phone) if device_phone < partner_phone else (partner_phone, device_phone)
+        link = link_stats.get(key)
+        if link is None:
+            link = link_stats[key] = {'calls': 0, 'duration': 0, 'first': None, 'last': None}
+        link['calls'] += 1
+        link['duration'] += duration
+        if start_time:
+            if not link['first'] or start_time < link['first']:
+                link['first'] = start_time
+            if not link['last'] or start_time > link['last']:
+                link['last'] = start_time
+
+    entities = []
+    for phone, stats in phone_stats.items():
+        risk_level, risk_score = _calculate_risk(stats)
+        entities.append({
+            'entity_type': 'phone',
+            'label': phone,
+            'phone_number': phone,
+            'person_name': stats['name'],
+            'total_calls': stats['calls'],
+            'total_duration': stats['duration'],
+            'unique_contacts': len(stats['contacts']),
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'cluster_id': _assign_cluster(stats),
+            'role': 'Device Owner' if stats['is_device'] else 'Contact',
+            'first_seen': stats['first_seen'],
+            'last_seen': stats['last_seen'],
+        })
+
+    links = []
+    for (source, target), stats in link_stats.items():
+        links.append({
+            'source': source,
+            'target': target,
+            'call_count': stats['calls'],
+            'total_duration': stats['duration'],
+            'first_contact': stats['first'],
+            'last_contact': stats['last'],
+            'weight': min(stats['calls'], 100),  # Cap at 100
+        })
+
+    return {'entities': entities, 'links': links}
+
+
+@job_handler("call_network")
+def generate_call_network(ctx: JobContext):
+    """
+    Job: regenerate call entities and links for a case from its call records
+    """
+    db = ctx.db
+    case_id = ctx.case_id
+
+    ctx.report(0, "Loading call records", force=True)
+    total = db.query(CallRecord).filter(CallRecord.case_id == case_id).count()
+    if total == 0:
+        return {"message": "No call records found", "entities_created": 0, "links_created": 0}
+
+    rows = []
+    stream = db.query(
+        CallRecord.device_number,
+        CallRecord.device_owner,
+        CallRecord.partner_number,
+        CallRecord.partner_name,
+        CallRecord.duration_seconds,
+        CallRecord.start_time,
+        CallRecord.is_suspect_call,
+        CallRecord.call_type
+    ).filter(CallRecord.case_id == case_id).yield_per(_LOAD_BATCH)
+    for row in stream:
+        rows.append(tuple(row[:7]) + ((row[7].value if row[7] else None),))
+        if len(rows) % _LOAD_BATCH == 0:
+            ctx.report(int(40 * len(rows) / total), f"Loaded {len(rows)}/{total} records")
+
+    ctx.report(40, "Building network")
+    network = ctx.run_cpu(build_call_network, rows)
+    ctx.report(60, "Saving network", force=True)
+
+    # Keep layout positions of numbers that stay in the network
+    positions = {
+        r.phone_number: (r.x_position, r.y_position)
+        for r in db.query(CallEntity.phone_number, CallEntity.x_position, CallEntity.y_position).filter(
+            CallEntity.case_id == case_id, CallEntity.x_position.isnot(None)
+        )
+    }
+
+    # Regenerate fresh - one transaction, committed only on success
+    db.query(CallLink).filter(CallLink.case_id == case_id).delete(synchronize_session=False)
+    db.query(CallEntity).filter(CallEntity.case_id == case_id).delete(synchronize_session=False)
+    record_rebuild(db, case_id, "call_network")
+
+    entities = network['entities']
+    phone_to_entity_id = {}
+    for start in range(0, len(entities), _LOAD_BATCH):
+        batch = entities[start:start + _LOAD_BATCH]
+        ids = db.scalars(
+            insert(CallEntity).returning(CallEntity.id, sort_by_parameter_order=True),
+            [
+                {
+                    'case_id': case_id, **e,
+                    'x_position': positions.get(e['phone_number'], (None, None))[0],
+                    'y_position': positions.get(e['phone_number'], (None, None))[1],
+                }
+                for e in batch
+            ]
+        ).all()
+        for entity, entity_id in zip(batch, ids):
+            phone_to_entity_id[entity['phone_number']] = entity_id
+        ctx.report(60 + int(20 * (start + len(batch)) / len(entities)), "Saving entities")
+
+    link_rows = []
+    for link in network['links']:
+        source_id = phone_to_entity_id.get(link['source'])
+        target_id = phone_to_entity_id.get(link['target'])
+        if source_id and target_id:
+            link_rows.append({
+                'case_id': case_id,
+                'source_entity_id': source_id,
+                'target_entity_id': target_id,
+                'link_type': 'call',
+                'call_count': link['call_count'],
+                'total_duration': link['total_duration'],
+                'first_contact': link['first_contact'],
+                'last_contact': link['last_contact'],
+                'weight': link['weight'],
+            })
+    for start in range(0, len(link_rows), _LOAD_BATCH):
+        db.execute(insert(CallLink), link_rows[start:start + _LOAD_BATCH])
+        ctx.report(80 + int(20 * (start + _LOAD_BATCH) / len(link_rows)), "Saving links")
+
+    ctx.check_cancelled()
+    db.commit()
+
+    return {
+        "message": "Network generated successfully",
+        "entities_created": len(entities),
+        "links_created": len(link_rows),
+        "total_records_processed": len(rows)
+    }
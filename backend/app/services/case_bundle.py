@@ -0,0 +1,343 @@
+"""
+Case Bundles
+Export a whole case as a zip and restore it into a new case.
+
+Bundle layout (zip, deflate-compressed members):
+
+    manifest.json          format, version, source case, row count per table
+    case.json              the case row
+    <table>.ndjson         {"columns": [...]} line, then one JSON array per row,
+                           for every case table
+
+Export streams: rows are read with yield_per and each compressed chunk is
+handed to the response as soon as it is written, so memory stays flat for
+any case size. Import runs as the "case_import" job: members are read
+line by line and inserted in batches, and ids are remapped through the
+tables that reference them (edges -> nodes, links -> entities,
+records -> evidence). Users are not part of a bundle; imported evidence is
+attributed to the importing user.
+
+Evidence rows are chain-of-custody metadata (name, size, SHA-256); the
+files themselves are never stored by the server, so a bundle carries no
+evidence files or paths. Re-attach originals on the target side and check
+them against the recorded hashes - manifest and import result say so.
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import DateTime, Enum, String, insert, select, type_coerce
+
+from app.database import SessionLocal
+from app.models.call_record import CallEntity, CallLink, CallRecord
+from app.models.case import Case
+from app.models.crypto import CryptoTransaction, CryptoWallet
+from app.models.evidence import Evidence
+from app.models.location import LocationCluster, LocationPoint
+from app.models.money_flow import MoneyFlowEdge, MoneyFlowNode
+from app.services.graph_changes import record_rebuild
+from app.services.jobs import JobContext, job_handler
+from app.services.money_flow_graph import bump_graph_version
+
+BUNDLE_FORMAT = "investigates-case-bundle"
+BUNDLE_VERSION = 1
+
+# Case tables in import order (referenced tables first), with their
+# columns that hold ids of other bundle tables
+_BUNDLE_TABLES = [
+    (Evidence, {}),
+    (MoneyFlowNode, {}),
+    (MoneyFlowEdge, {"from_node_id": "money_flow_nodes", "to_node_id": "money_flow_nodes"}),
+    (CallEntity, {}),
+    (CallLink, {"source_entity_id": "call_entities", "target_entity_id": "call_entities"}),
+    (CallRecord, {"evidence_id": "evidences"}),
+    (LocationPoint, {"evidence_id": "evidences"}),
+    (LocationCluster, {}),
+    (CryptoTransaction, {"evidence_id": "evidences"}),
+    (CryptoWallet, {}),
+]
+_REFERENCED = {target for _, refs in _BUNDLE_TABLES for target in refs.values()}
+
+# Case columns not taken from a bundle (identity, ownership, lifecycle)
+_CASE_EXCLUDED = {
+    "id", "case_number", "organization_id", "created_by", "assigned_to",
+    "is_active", "deleted_at", "deleted_by", "graph_version", "created_at", "updated_at",
+}
+
+_EXPORT_BATCH = 2000
+_IMPORT_BATCH = 5000
+
+_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+class BundleError(ValueError):
+    """Uploaded file is not a readable case bundle"""
+
+
+# ==================== ENCODING ====================
+
+def _export_columns(table) -> list:
+    """
+    SELECT list for export. Datetimes are read as stored text where the
+    driver returns text (SQLite), skipping a parse/format round trip.
+    """
+    return [
+        type_coerce(column, String).label(column.name) if isinstance(column.type, DateTime) else column
+        for column in table.columns
+    ]
+
+
+def _iso(value) -> str:
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def _encoders(table) -> List[Tuple[int, Callable]]:
+    """(column position, encoder) for columns that are not JSON-native"""
+    encoders = []
+    for position, column in enumerate(table.columns):
+        if isinstance(column.type, DateTime):
+            encoders.append((position, _iso))
+        elif isinstance(column.type, Enum) and column.type.enum_class is not None:
+            encoders.append((position, lambda member: member.value))
+    return encoders
+
+
+def _encode_values(row, encoders) -> list:
+    values = list(row)
+    for position, encode in encoders:
+        if values[position] is not None:
+            values[position] = encode(values[position])
+    return values
+
+
+def _row_decoder(table, names: List[str]) -> Callable[[list], Dict[str, Any]]:
+    """Turns value lists (ordered as `names`) into insert params; unknown columns are dropped"""
+    fields = []
+    for position, name in enumerate(names):
+        if name not in table.c:
+            continue  # Column unknown to this schema version
+        column = table.c[name]
+        decode = None
+        if isinstance(column.type, DateTime):
+            decode = datetime.fromisoformat
+        elif isinstance(column.type, Enum) and column.type.enum_class is not None:
+            decode = column.type.enum_class
+        fields.append((position, name, decode))
+
+    def decode_row(values: list) -> Dict[str, Any]:
+        row = {}
+        for position, name, decode in fields:
+            value = values[position]
+            row[name] = decode(value) if decode is not None and value is not None else value
+        return row
+    return decode_row
+
+
+# ==================== EXPORT ====================
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable zip target whose written bytes are drained by the generator"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_case_bundle(case_id: int) -> Iterator[bytes]:
+    """
+    Zip bundle of a case as a byte stream (for StreamingResponse).
+    Opens its own session: the request's session is closed before the body is sent.
+    """
+    sink = _ChunkSink()
+    with SessionLocal() as db, \
+            zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as bundle:
+        case_table = Case.__table__
+        case_row = db.execute(
+            select(*_export_columns(case_table)).where(case_table.c.id == case_id)
+        ).one()
+        case_values = _encode_values(case_row, _encoders(case_table))
+        bundle.writestr("case.json", json.dumps(dict(zip(case_table.columns.keys(), case_values)), ensure_ascii=False))
+
+        counts = {}
+        for model, _ in _BUNDLE_TABLES:
+            table = model.__table__
+            encoders = _encoders(table)
+            count = 0
+            with bundle.open(f"{table.name}.ndjson", "w", force_zip64=True) as member:
+                member.write((_json.encode({"columns": table.columns.keys()}) + "\n").encode("utf-8"))
+                result = db.execute(
+                    select(*_export_columns(table)).where(table.c.case_id == case_id).order_by(table.c.id)
+                    .execution_options(yield_per=_EXPORT_BATCH)
+                )
+                for rows in result.partitions():
+                    member.write("".join(
+                        _json.encode(_encode_values(row, encoders)) + "\n" for row in rows
+                    ).encode("utf-8"))
+                    count += len(rows)
+                    yield sink.drain()
+            counts[table.name] = count
+
+        bundle.writestr("manifest.json", json.dumps({
+            "format": BUNDLE_FORMAT,
+            "version": BUNDLE_VERSION,
+            "exported_at": datetime.utcnow().isoformat(),
+            "case_id": case_id,
+            "case_number": case_row.case_number,
+            "tables": counts,
+            "evidence_files_included": False,
+        }, indent=2))
+    yield sink.drain()
+
+
+# ==================== IMPORT ====================
+
+def save_bundle(upload) -> str:
+    """Copy an uploaded bundle to a temp file for the import job"""
+    fd, path = tempfile.mkstemp(prefix="case-bundle-", suffix=".zip")
+    with os.fdopen(fd, "wb") as out:
+        shutil.copyfileobj(upload, out, 1024 * 1024)
+    return path
+
+
+def read_bundle_case(path: str) -> Dict[str, Any]:
+    """Validate a bundle file and return the fields for its new case"""
+    try:
+        with zipfile.ZipFile(path) as bundle:
+            _read_manifest(bundle)
+            obj = json.loads(bundle.read("case.json"))
+            fields = _row_decoder(Case.__table__, list(obj))(list(obj.values()))
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        raise BundleError(f"Not a case bundle: {e}")
+    return {k: v for k, v in fields.items() if k not in _CASE_EXCLUDED}
+
+
+def _read_manifest(bundle: zipfile.ZipFile) -> Dict[str, Any]:
+    manifest = json.loads(bundle.read("manifest.json"))
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError("Unknown bundle format")
+    if manifest.get("version", 0) > BUNDLE_VERSION:
+        raise BundleError(f"Bundle version {manifest.get('version')} is newer than supported ({BUNDLE_VERSION})")
+    return manifest
+
+
+def _import_table(
+    ctx: JobContext,
+    bundle: zipfile.ZipFile,
+    model,
+    refs: Dict[str, str],
+    id_maps: Dict[str, Dict[int, int]],
+    on_batch: Callable[[int], None]
+) -> int:
+    """Insert one NDJSON member in batches; returns the row count"""
+    table = model.__table__
+    keep_ids = table.name in _REFERENCED
+    id_map: Dict[int, int] = {}
+    statement = insert(table)
+    if keep_ids:
+        statement = statement.returning(table.c.id, sort_by_parameter_order=True)
+
+    def flush(rows, old_ids):
+        if keep_ids:
+            id_map.update(zip(old_ids, ctx.db.scalars(statement, rows).all()))
+        else:
+            ctx.db.execute(statement, rows)
+        ctx.db.commit()
+        on_batch(len(rows))
+
+    count = 0
+    rows: List[Dict[str, Any]] = []
+    old_ids: List[int] = []
+    with bundle.open(f"{table.name}.ndjson") as member:
+        lines = io.TextIOWrapper(member, encoding="utf-8")
+        decode_row = _row_decoder(table, json.loads(next(lines))["columns"])
+        for line in lines:
+            if not line.strip():
+                continue
+            row = decode_row(json.loads(line))
+            old_ids.append(row.pop("id", None))
+            row["case_id"] = ctx.case_id
+            for column, target in refs.items():
+                old = row.get(column)
+                if old is not None:
+                    new = id_maps[target].get(old)
+                    if new is None and not table.c[column].nullable:
+                        raise BundleError(f"{table.name}.{column} references missing {target} id {old}")
+                    row[column] = new
+            if table.name == "evidences":
+                row["collected_by"] = ctx.user_id
+            rows.append(row)
+            count += 1
+            if len(rows) >= _IMPORT_BATCH:
+                flush(rows, old_ids)
+                rows, old_ids = [], []
+    if rows:
+        flush(rows, old_ids)
+
+    if keep_ids:
+        id_maps[table.name] = id_map
+    return count
+
+
+@job_handler("case_import")
+def import_case_bundle(ctx: JobContext):
+    """
+    Fill the (already created) case from an uploaded bundle.
+    params: path - bundle file, removed when the job ends.
+    Batches are committed as they go: a failed import keeps the rows
+    imported so far - delete the case and import again.
+    """
+    path = ctx.params["path"]
+    try:
+        with zipfile.ZipFile(path) as bundle:
+            manifest = _read_manifest(bundle)
+            names = set(bundle.namelist())
+            total = max(1, sum(manifest.get("tables", {}).values()))
+            imported = 0
+            tables: Dict[str, int] = {}
+            id_maps: Dict[str, Dict[int, int]] = {}
+
+            for model, refs in _BUNDLE_TABLES:
+                name = model.__tablename__
+                if f"{name}.ndjson" not in names:
+                    id_maps[name] = {}
+                    continue
+
+                def on_batch(count, name=name):
+                    nonlocal imported
+                    imported += count
+                    ctx.report(imported * 99 // total, f"Importing {name} ({imported}/{total} rows)")
+
+                ctx.report(message=f"Importing {name}", force=True)
+                tables[name] = _import_table(ctx, bundle, model, refs, id_maps, on_batch)
+
+        # Graph caches and change-feed cursors must not survive the import
+        bump_graph_version(ctx.db, ctx.case_id)
+        record_rebuild(ctx.db, ctx.case_id, "money_flow")
+        record_rebuild(ctx.db, ctx.case_id, "call_network")
+        ctx.db.commit()
+        return {
+            "case_id": ctx.case_id,
+            "source_case_number": manifest.get("case_number"),
+            "rows_imported": imported,
+            "tables": tables,
+            "evidence_files_included": False,
+            "note": "Evidence records carry metadata and SHA-256 only - verify the original files against them",
+        }
+    finally:
+        os.remove(path)
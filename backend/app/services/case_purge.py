@@ -0,0 +1,96 @@
+"""
+Case Purge
+Permanent deletion of a soft-deleted case as the "case_purge" job.
+
+Child tables are emptied one by one with set-based DELETEs of at most
+_PURGE_BATCH rows, each committed on its own - no rows are loaded into the
+session, and locks are held for one batch only. Tables are visited
+children first (edges before nodes, links before entities, records before
+evidence), so the purge does not depend on database-side cascades. The case
+row goes last. Re-running picks up whatever is left, so an interrupted
+purge resumes after a worker restart.
+"""
+from sqlalchemy import delete, func, select
+
+from app.models.call_record import CallEntity, CallLink, CallRecord
+from app.models.case import Case
+from app.models.crypto import CryptoTransaction, CryptoWallet
+from app.models.evidence import Evidence
+from app.models.graph_change import GraphTombstone
+from app.models.location import LocationCluster, LocationPoint
+from app.models.money_flow import MoneyFlowEdge, MoneyFlowNode
+from app.services.jobs import JobContext, job_handler
+
+# Deletion order: rows referencing another case table come before it
+_PURGE_TABLES = [
+    GraphTombstone,
+    MoneyFlowEdge,
+    MoneyFlowNode,
+    CallLink,
+    CallRecord,
+    CallEntity,
+    LocationPoint,
+    LocationCluster,
+    CryptoTransaction,
+    CryptoWallet,
+    Evidence,
+]
+
+_PURGE_BATCH = 5000
+
+
+@job_handler("case_purge", resumable=True)
+def purge_case(ctx: JobContext):
+    """
+    Job: permanently delete a soft-deleted case and all its data.
+    Refuses to run if the case was restored in the meantime.
+    """
+    db = ctx.db
+    case_id = ctx.case_id
+    case_row = db.execute(
+        select(Case.is_active, Case.case_number).where(Case.id == case_id)
+    ).first()
+    if case_row is None:
+        return {"case_id": case_id, "rows_deleted": 0, "tables": {}}
+    if case_row.is_active:
+        raise RuntimeError("Case was restored - purge aborted")
+
+    remaining = {
+        model.__tablename__: db.scalar(
+            select(func.count()).select_from(model).where(model.case_id == case_id)
+        )
+        for model in _PURGE_TABLES
+    }
+    db.commit()
+    total = max(1, sum(remaining.values()))
+    ctx.report(0, f"Deleting {total} rows of case {case_row.case_number}", force=True)
+
+    deleted = 0
+    tables = {}
+    for model in _PURGE_TABLES:
+        table = model.__table__
+        if not remaining[table.name]:
+            continue
+        batch = select(table.c.id).where(table.c.case_id == case_id).limit(_PURGE_BATCH)
+        count = 0
+        while True:
+            rowcount = db.execute(
+                delete(table).where(table.c.id.in_(batch)),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            db.commit()
+            if not rowcount:
+                break
+            count += rowcount
+            deleted += rowcount
+            ctx.report(min(99, deleted * 100 // total), f"Deleting {table.name} ({deleted}/{total} rows)")
+        tables[table.name] = count
+
+    db.execute(delete(Case).where(Case.id == case_id), execution_options={"synchronize_session": False})
+    db.commit()
+    return {
+        "case_id": case_id,
+        "case_number": case_row.case_number,
+        "rows_deleted": deleted,
+        "tables": tables,
+    }
@@ -0,0 +1,356 @@
+"""
+Cell Tower Service
+Resolves cell ids (MCC / MNC / LAC / CID) to tower coordinates.
+
+Towers come from a locally loaded OpenCellID-style CSV
+(radio,mcc,net,area,cell,unit,lon,lat,range,...; optionally .gz) set in
+CELL_TOWER_DB_PATH. They are held in parallel typed arrays sorted by a
+packed 64-bit key (about 20 bytes per tower), searched with bisect.
+
+Used in bulk on import (call records, location points) and by the
+`cell_tower_resolve` job to backfill rows imported before resolution.
+"""
+import csv
+import gzip
+import heapq
+import logging
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.models.call_record import CallRecord
+from app.models.location import LocationPoint, LocationSource
+from app.services.jobs import JobContext, job_handler
+
+logger = logging.getLogger(__name__)
+
+# key = ((mcc * 1000 + mnc) << 44) | (lac << 28) | cid
+_LAC_BITS = 16
+_CID_BITS = 28
+_MAX_OPERATOR = 1 << 20
+
+# Rows per statement when backfilling
+_BACKFILL_BATCH = 2000
+
+# Towers sorted at a time while loading (each run is merged into the index)
+_SORT_RUN = 500000
+
+# (lat, lon, range_m)
+Tower = Tuple[float, float, int]
+# (mcc, mnc, lac, cid) - mcc/mnc may be None when the source doesn't record them
+CellKey = Tuple[Optional[int], Optional[int], int, int]
+
+_SEPARATORS = re.compile(r"[-:/_.\s]+")
+
+
+def pack_key(mcc: int, mnc: int, lac: int, cid: int) -> Optional[int]:
+    """Packed index key, or None if a part is out of range (e.g. 5G NR cell ids)"""
+    operator = mcc * 1000 + mnc
+    if not (0 <= operator < _MAX_OPERATOR and 0 <= lac < 1 << _LAC_BITS and 0 <= cid < 1 << _CID_BITS):
+        return None
+    return (operator << (_LAC_BITS + _CID_BITS)) | (lac << _CID_BITS) | cid
+
+
+def parse_cell(
+    cell_id: Optional[str],
+    lac: Optional[str] = None,
+    mcc: Optional[str] = None,
+    mnc: Optional[str] = None
+) -> Optional[CellKey]:
+    """
+    Cell key from stored fields.
+    cell_id may be a bare CID (with lac/mcc/mnc given separately),
+    "LAC-CID" or "MCC-MNC-LAC-CID" (any of - : / _ . as separator).
+    """
+    if not cell_id:
+        return None
+    parts = [p for p in _SEPARATORS.split(str(cell_id).strip()) if p]
+    if len(parts) == 4:
+        mcc, mnc, lac, cid = parts
+    elif len(parts) == 2:
+        lac, cid = parts
+    elif len(parts) == 1:
+        cid = parts[0]
+    else:
+        return None
+    try:
+        return (
+            int(mcc) if mcc else None,
+            int(mnc) if mnc else None,
+            int(lac),
+            int(cid)
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def _empty_columns() -> Tuple[array, array, array, array]:
+    """key, lat, lon, range_m columns"""
+    return array("Q"), array("f"), array("f"), array("I")
+
+
+def _sorted_run(columns: Tuple[array, array, array, array]) -> Tuple[array, array, array, array]:
+    """Columns reordered by key"""
+    keys = columns[0]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return tuple(array(column.typecode, (column[i] for i in order)) for column in columns)
+
+
+class CellTowerIndex:
+    """Sorted, packed in-memory tower table"""
+
+    def __init__(self, keys: array, lats: array, lons: array, ranges: array):
+        self._keys = keys
+        self._lats = lats
+        self._lons = lons
+        self._ranges = ranges
+        # Operators per country - for cell ids recorded without an MNC
+        self._mncs: Dict[int, List[int]] = {}
+        operators = sorted({k >> (_LAC_BITS + _CID_BITS) for k in keys})
+        for operator in operators:
+            self._mncs.setdefault(operator // 1000, []).append(operator % 1000)
+
+    @classmethod
+    def from_csv(cls, path: str, mccs: Optional[Iterable[int]] = None) -> "CellTowerIndex":
+        """
+        Load an OpenCellID-style CSV, keeping only the given countries if set.
+        Rows go straight into typed arrays in sorted runs of _SORT_RUN towers,
+        which are then merged - peak memory stays around twice the index size.
+        """
+        wanted = set(mccs) if mccs else None
+        runs: List[Tuple[array, array, array, array]] = []
+        run = _empty_columns()
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            for line in reader:
+                if len(line) < 9 or not line[1].isdigit():
+                    continue  # Header or malformed
+                try:
+                    mcc, mnc, lac, cid = int(line[1]), int(line[2]), int(line[3]), int(line[4])
+                    lon, lat, rng = float(line[6]), float(line[7]), int(float(line[8] or 0))
+                except ValueError:
+                    continue
+                if wanted and mcc not in wanted:
+                    continue
+                key = pack_key(mcc, mnc, lac, cid)
+                if key is not None:
+                    run[0].append(key)
+                    run[1].append(lat)
+                    run[2].append(lon)
+                    run[3].append(max(0, min(rng, 0xFFFFFFFF)))
+                    if len(run[0]) >= _SORT_RUN:
+                        runs.append(_sorted_run(run))
+                        run = _empty_columns()
+        if run[0]:
+            runs.append(_sorted_run(run))
+
+        keys, lats, lons, ranges = _empty_columns()
+        last = None
+        for key, lat, lon, rng in heapq.merge(*(zip(*r) for r in runs), key=itemgetter(0)):
+            if key == last:
+                continue  # Same cell listed per radio type - keep one
+            last = key
+            keys.append(key)
+            lats.append(lat)
+            lons.append(lon)
+            ranges.append(rng)
+        return cls(keys, lats, lons, ranges)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, mcc: int, mnc: int, lac: int, cid: int) -> Optional[Tower]:
+        key = pack_key(mcc, mnc, lac, cid)
+        if key is None:
+            return None
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            # float32 storage: ~0.1 m resolution, don't report more digits than that
+            return round(self._lats[i], 6), round(self._lons[i], 6), self._ranges[i]
+        return None
+
+    def resolve(self, cell: CellKey, default_mcc: Optional[int] = None) -> Optional[Tower]:
+        """
+        Tower of a cell key. Missing MCC/MNC are filled in only when exactly
+        one known operator has that LAC/CID (ambiguous ids stay unresolved).
+        """
+        mcc, mnc, lac, cid = cell
+        if mcc is None:
+            mcc = default_mcc
+        if mcc is not None and mnc is not None:
+            return self.lookup(mcc, mnc, lac, cid)
+        if mcc is None:
+            return None
+        found = [t for t in (self.lookup(mcc, m, lac, cid) for m in self._mncs.get(mcc, [])) if t]
+        return found[0] if len(found) == 1 else None
+
+    def resolve_many(self, cells: Iterable[CellKey], default_mcc: Optional[int] = None) -> Dict[CellKey, Optional[Tower]]:
+        """Resolve distinct cell keys (each looked up once)"""
+        return {cell: self.resolve(cell, default_mcc) for cell in set(cells)}
+
+
+_index: Optional[CellTowerIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_cell_index() -> Optional[CellTowerIndex]:
+    """
+    Configured tower index (None if not configured). Loaded at startup by
+    the app lifespan; scripts load it on first use.
+    """
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            if settings.CELL_TOWER_DB_PATH:
+                try:
+                    mccs = [int(m) for m in settings.CELL_TOWER_MCCS.split(",") if m.strip()]
+                    _index = CellTowerIndex.from_csv(settings.CELL_TOWER_DB_PATH, mccs)
+                    logger.info(f"Loaded {len(_index)} cell towers from {settings.CELL_TOWER_DB_PATH}")
+                except OSError as e:
+                    logger.error(f"Cell tower database not loaded: {e}")
+            _index_loaded = True
+    return _index
+
+
+def _default_mcc() -> Optional[int]:
+    return int(settings.CELL_TOWER_DEFAULT_MCC) if settings.CELL_TOWER_DEFAULT_MCC else None
+
+
+def resolve_cell(cell: CellKey) -> Optional[Tower]:
+    """Tower of one cell key (None if unknown or no database is configured)"""
+    index = get_cell_index()
+    return index.resolve(cell, _default_mcc()) if index else None
+
+
+def resolve_call_records(records: List[CallRecord]) -> int:
+    """Set cell_lat/cell_lon/cell_range_m on new call records. Returns resolved count."""
+    index = get_cell_index()
+    if index is None:
+        return 0
+    cells = {r: parse_cell(r.cell_id) for r in records if r.cell_id}
+    towers = index.resolve_many([c for c in cells.values() if c], _default_mcc())
+    resolved = 0
+    for record, cell in cells.items():
+        tower = towers.get(cell) if cell else None
+        if tower:
+            record.cell_lat, record.cell_lon, record.cell_range_m = tower
+            resolved += 1
+    return resolved
+
+
+def resolve_point_cells(points: Iterable) -> Dict[CellKey, Optional[Tower]]:
+    """
+    Towers for location point payloads/rows (anything with cell_id, cell_lac,
+    cell_mcc, cell_mnc), keyed by parse_cell of those fields.
+    """
+    index = get_cell_index()
+    if index is None:
+        return {}
+    cells = [parse_cell(p.cell_id, p.cell_lac, p.cell_mcc, p.cell_mnc) for p in points if p.cell_id]
+    return index.resolve_many([c for c in cells if c], _default_mcc())
+
+
+@job_handler("cell_tower_resolve", resumable=True)
+def resolve_case_cells(ctx: JobContext):
+    """
+    Job: backfill tower locations for a case.
+    - call records: cell_lat/cell_lon/cell_range_m
+    - cell tower location points: accuracy_meters (tower range) where missing
+    Idempotent - only unresolved rows are visited, in id order.
+    """
+    db = ctx.db
+    case_id = ctx.case_id
+    index = get_cell_index()
+    if index is None:
+        raise RuntimeError("Cell tower database is not configured (CELL_TOWER_DB_PATH)")
+    default_mcc = _default_mcc()
+
+    call_filter = [
+        CallRecord.case_id == case_id,
+        CallRecord.cell_id.isnot(None),
+        CallRecord.cell_lat.is_(None)
+    ]
+    point_filter = [
+        LocationPoint.case_id == case_id,
+        LocationPoint.cell_id.isnot(None),
+        LocationPoint.source == LocationSource.CELL_TOWER,
+        LocationPoint.accuracy_meters.is_(None)
+    ]
+    total_calls = db.query(CallRecord.id).filter(*call_filter).count()
+    total_points = db.query(LocationPoint.id).filter(*point_filter).count()
+    total = max(total_calls + total_points, 1)
+    ctx.report(0, f"Resolving {total_calls} call records, {total_points} location points", force=True)
+
+    scanned = calls_resolved = points_resolved = 0
+
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(CallRecord.id, CallRecord.cell_id)
+            .where(*call_filter, CallRecord.id > last_id)
+            .order_by(CallRecord.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        cells = {r.id: parse_cell(r.cell_id) for r in rows}
+        towers = index.resolve_many([c for c in cells.values() if c], default_mcc)
+        updates = [
+            {"id": row_id, "cell_lat": t[0], "cell_lon": t[1], "cell_range_m": t[2]}
+            for row_id, t in ((i, towers.get(c)) for i, c in cells.items() if c)
+            if t
+        ]
+        if updates:
+            db.execute(update(CallRecord), updates)
+        db.commit()
+        calls_resolved += len(updates)
+        scanned += len(rows)
+        ctx.check_cancelled()
+        ctx.report(int(100 * scanned / total), f"Scanned {scanned}/{total} rows")
+
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(
+                LocationPoint.id, LocationPoint.cell_id, LocationPoint.cell_lac,
+                LocationPoint.cell_mcc, LocationPoint.cell_mnc
+            )
+            .where(*point_filter, LocationPoint.id > last_id)
+            .order_by(LocationPoint.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        towers = resolve_point_cells(rows)
+        updates = []
+        for r in rows:
+            tower = towers.get(parse_cell(r.cell_id, r.cell_lac, r.cell_mcc, r.cell_mnc))
+            if tower:
+                updates.append({"id": r.id, "accuracy_meters": float(tower[2])})
+        if updates:
+            db.execute(update(LocationPoint), updates)
+        db.commit()
+        points_resolved += len(updates)
+        scanned += len(rows)
+        ctx.check_cancelled()
+        ctx.report(int(100 * scanned / total), f"Scanned {scanned}/{total} rows")
+
+    return {
+        "message": "Cell towers resolved",
+        "call_records_resolved": calls_resolved,
+        "location_points_resolved": points_resolved,
+        "rows_scanned": scanned,
+        "towers_loaded": len(index)
+    }
@@ -0,0 +1,216 @@
+"""
+Co-location Service
+Finds when suspects were at the same place at the same time.
+
+1. Points are hashed into space x time buckets (cells `distance_m` wide,
+   `window_minutes` long). Each suspect's fixes in a bucket are collapsed
+   into one presence record (centroid, time span, fix count), so a
+   million GPS fixes become one record per place per time window.
+2. Presence records are joined only against the adjacent buckets
+   (3 x 3 cells x 3 time slots, each pair visited once) and checked
+   against the distance/time thresholds.
+3. Matches per suspect pair are merged into meeting events.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.location import LocationPoint
+from app.services.location_timeline import location_fingerprint
+from app.utils.cache import TTLCache
+from app.utils.geo import METERS_PER_DEGREE
+
+_LOAD_BATCH = 10000
+_EPOCH = datetime(1970, 1, 1)
+
+# Forward half of the 3x3x3 neighbourhood: every adjacent bucket pair is visited once
+_FORWARD_OFFSETS = [
+    (dt, dx, dy)
+    for dt in (-1, 0, 1) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+    if (dt, dx, dy) > (0, 0, 0)
+]
+
+_colocation_cache = TTLCache(maxsize=32, ttl=600)
+
+
+def find_colocations(
+    db: Session,
+    case_id: int,
+    suspect_ids: Optional[List[str]] = None,
+    distance_m: float = 100,
+    window_minutes: float = 10,
+    min_matches: int = 1
+) -> Dict[str, Any]:
+    """
+    Meeting events between suspects of a case.
+    Cached per parameters, keyed by the case's location fingerprint.
+    """
+    key = (
+        case_id, location_fingerprint(db, case_id),
+        tuple(sorted(suspect_ids or [])), distance_m, window_minutes, min_matches
+    )
+    return _colocation_cache.get_or_set(
+        key, lambda: _find_colocations(db, case_id, suspect_ids, distance_m, window_minutes, min_matches)
+    )
+
+
+def _find_colocations(db, case_id, suspect_ids, distance_m, window_minutes, min_matches):
+    window_s = window_minutes * 60
+    person = func.coalesce(LocationPoint.suspect_id, LocationPoint.suspect_name)
+    filters = [
+        LocationPoint.case_id == case_id,
+        LocationPoint.timestamp.isnot(None),
+        person.isnot(None)
+    ]
+    if suspect_ids:
+        filters.append(person.in_(suspect_ids))
+
+    lat_min, lat_max = db.query(
+        func.min(LocationPoint.latitude), func.max(LocationPoint.latitude)
+    ).filter(*filters).one()
+    if lat_min is None:
+        return _result([], 0, 0)
+
+    # Cells at least distance_m wide everywhere in the data
+    max_abs_lat = min(max(abs(lat_min), abs(lat_max)), 89.0)
+    kx = METERS_PER_DEGREE * math.cos(math.radians(max_abs_lat)) / distance_m
+    ky = METERS_PER_DEGREE / distance_m
+
+    # 1. Presence records: (suspect, cell, time slot) -> [fixes, sum lat, sum lon, t min, t max]
+    presence: Dict[Tuple, List] = {}
+    scanned = 0
+    stream = db.query(
+        person, LocationPoint.latitude, LocationPoint.longitude, LocationPoint.timestamp
+    ).filter(*filters).yield_per(_LOAD_BATCH)
+    for suspect, lat, lon, timestamp in stream:
+        t = (timestamp - _EPOCH).total_seconds()
+        key = (suspect, math.floor(lon * kx), math.floor(lat * ky), math.floor(t / window_s))
+        record = presence.get(key)
+        if record is None:
+            presence[key] = [1, lat, lon, t, t]
+        else:
+            record[0] += 1
+            record[1] += lat
+            record[2] += lon
+            if t < record[3]:
+                record[3] = t
+            elif t > record[4]:
+                record[4] = t
+        scanned += 1
+
+    # Bucket index: (slot, cx, cy) -> [(suspect, fixes, x, y, t min, t max)]
+    # x/y: local projection in meters (planar distance is exact enough at these ranges)
+    mx = METERS_PER_DEGREE * math.cos(math.radians(max_abs_lat))
+    my = METERS_PER_DEGREE
+    buckets: Dict[Tuple[int, int, int], List[Tuple]] = {}
+    for (suspect, cx, cy, slot), (n, sum_lat, sum_lon, t_min, t_max) in presence.items():
+        buckets.setdefault((slot, cx, cy), []).append(
+            (suspect, n, sum_lon / n * mx, sum_lat / n * my, t_min, t_max)
+        )
+    suspects = {key[0] for key in presence}
+    del presence
+
+    if len(suspects) < 2:
+        return _result([], scanned, len(suspects))
+
+    # 2. Join adjacent buckets
+    matches: Dict[Tuple[str, str], List[Tuple]] = {}
+    max_d2 = distance_m * distance_m
+
+    def join(records_a, records_b, same_bucket):
+        for i, a in enumerate(records_a):
+            for b in (records_b[i + 1:] if same_bucket else records_b):
+                if a[0] == b[0]:
+                    continue
+                overlap_start = a[4] if a[4] > b[4] else b[4]
+                overlap_end = a[5] if a[5] < b[5] else b[5]
+                gap = overlap_start - overlap_end  # > 0: time between the two spans
+                if gap > window_s:
+                    continue
+                d2 = (a[2] - b[2]) ** 2 + (a[3] - b[3]) ** 2
+                if d2 > max_d2:
+                    continue
+                first, second = (a, b) if a[0] < b[0] else (b, a)
+                matches.setdefault((first[0], second[0]), []).append((
+                    min(overlap_start, overlap_end),
+                    max(overlap_start, overlap_end),
+                    math.sqrt(d2),
+                    max(0.0, gap),
+                    first[1] + second[1],
+                    (first[3] + second[3]) / 2 / my,
+                    (first[2] + second[2]) / 2 / mx,
+                ))
+
+    for (slot, cx, cy), records in buckets.items():
+        if len(records) > 1:
+            join(records, records, True)
+        for dt, dx, dy in _FORWARD_OFFSETS:
+            others = buckets.get((slot + dt, cx + dx, cy + dy))
+            if others:
+                join(records, others, False)
+
+    # 3. Merge matches into events
+    events = []
+    for (a, b), pair_matches in matches.items():
+        pair_matches.sort()
+        current: List[Tuple] = []
+        current_end = 0.0
+        for match in pair_matches:
+            if current and match[0] - current_end > window_s:
+                events.append(_event(a, b, current, distance_m, window_s))
+                current = []
+            if not current or match[1] > current_end:
+                current_end = match[1]
+            current.append(match)
+        if current:
+            events.append(_event(a, b, current, distance_m, window_s))
+
+    events = [e for e in events if e["matches"] >= min_matches]
+    events.sort(key=lambda e: (e["confidence"], e["duration_minutes"]), reverse=True)
+    return _result(events, scanned, len(suspects))
+
+
+def _event(a: str, b: str, group: List[Tuple], distance_m: float, window_s: float) -> Dict[str, Any]:
+    start = min(m[0] for m in group)
+    end = max(m[1] for m in group)
+    avg_distance = sum(m[2] for m in group) / len(group)
+    avg_gap = sum(m[3] for m in group) / len(group)
+    fixes = sum(m[4] for m in group)
+    # More matched windows, closer and more simultaneous = more confident
+    confidence = (
+        0.4 * min(1.0, len(group) / 3)
+        + 0.35 * (1 - avg_distance / distance_m)
+        + 0.25 * (1 - avg_gap / window_s)
+    )
+    return {
+        "suspects": [a, b],
+        "start": (_EPOCH + timedelta(seconds=start)).isoformat(),
+        "end": (_EPOCH + timedelta(seconds=end)).isoformat(),
+        "duration_minutes": round((end - start) / 60, 1),
+        "lat": sum(m[5] for m in group) / len(group),
+        "lng": sum(m[6] for m in group) / len(group),
+        "matches": len(group),
+        "fixes": fixes,
+        "avg_distance_m": round(avg_distance, 1),
+        "confidence": round(max(0.0, min(1.0, confidence)), 2),
+    }
+
+
+def _result(events: List[Dict], scanned: int, suspect_count: int) -> Dict[str, Any]:
+    pairs: Dict[Tuple[str, str], Dict] = {}
+    for e in events:
+        pair = pairs.setdefault(tuple(e["suspects"]), {
+            "suspects": e["suspects"], "events": 0, "total_minutes": 0.0, "max_confidence": 0.0
+        })
+        pair["events"] += 1
+        pair["total_minutes"] = round(pair["total_minutes"] + e["duration_minutes"], 1)
+        pair["max_confidence"] = max(pair["max_confidence"], e["confidence"])
+    return {
+        "events": events,
+        "pairs": sorted(pairs.values(), key=lambda p: p["total_minutes"], reverse=True),
+        "points_scanned": scanned,
+        "suspects": suspect_count,
+    }
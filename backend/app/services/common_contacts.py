@@ -0,0 +1,227 @@
+"""
+Common Contacts Service
+Cross-case lookup of phone numbers via the normalized-number index
+on call_records (partner_number_norm, case_id).
+
+Shared numbers are found with one grouped aggregate over the selected
+cases; per-case/device breakdowns are then fetched by index lookup for
+the top numbers only - no pairwise comparison of records.
+
+Records imported before the *_norm columns existed are normalized by the
+"call_number_backfill" job (POST /call-analysis/contacts/backfill).
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, distinct, or_, update, select
+from sqlalchemy.orm import Session
+
+from app.models.call_record import CallRecord
+from app.models.case import Case
+from app.services.jobs import JobContext, job_handler
+from app.utils.phone import normalize_phone
+
+# Records normalized per statement when backfilling older imports
+_BACKFILL_BATCH = 2000
+
+
+def _backfill_column(ctx: JobContext, source, target, marker: Optional[str]) -> int:
+    """Normalize `source` into `target` where target is still NULL, in id order"""
+    db = ctx.db
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(CallRecord.id, source)
+            .where(target.is_(None), source.isnot(None), CallRecord.id > last_id)
+            .order_by(CallRecord.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        db.execute(
+            update(CallRecord),
+            [{"id": row[0], target.key: normalize_phone(row[1]) or marker} for row in rows]
+        )
+        db.commit()
+        updated += len(rows)
+        ctx.check_cancelled()
+        ctx.report(message=f"Normalized {updated} {target.key} values")
+    return updated
+
+
+@job_handler("call_number_backfill", resumable=True)
+def backfill_normalized_numbers(ctx: JobContext):
+    """
+    Job: fill *_norm columns for records imported before they existed
+    (new records are normalized on insert). Each column is filled on its own
+    NULL condition; re-running continues with whatever is left.
+    """
+    ctx.report(0, "Normalizing contact numbers", force=True)
+    # "" marks contact numbers without digits so they are not picked up again
+    partner = _backfill_column(ctx, CallRecord.partner_number, CallRecord.partner_number_norm, "")
+    ctx.report(50, "Normalizing device numbers", force=True)
+    # Device numbers stay NULL there: the device key falls back to device id / IMEI
+    device = _backfill_column(ctx, CallRecord.device_number, CallRecord.device_number_norm, None)
+    return {"partner_numbers_normalized": partner, "device_numbers_normalized": device}
+
+
+def _device_key():
+    """Device identity: normalized number, else extraction device id / IMEI"""
+    return func.coalesce(CallRecord.device_number_norm, CallRecord.device_id, CallRecord.device_imei)
+
+
+def find_shared_contacts(
+    db: Session,
+    case_ids: List[int],
+    min_cases: int = 2,
+    min_devices: Optional[int] = None,
+    limit: int = 100
+) -> List[Dict]:
+    """
+    Numbers appearing in at least `min_cases` of `case_ids`
+    (or on at least `min_devices` devices), ranked by call volume.
+    """
+    case_count = func.count(distinct(CallRecord.case_id))
+    device_count = func.count(distinct(_device_key()))
+    total_calls = func.count(CallRecord.id)
+
+    having = case_count >= min_cases
+    if min_devices:
+        having = or_(having, device_count >= min_devices)
+
+    shared = db.query(
+        CallRecord.partner_number_norm,
+        case_count.label("case_count"),
+        device_count.label("device_count"),
+        total_calls.label("total_calls"),
+        func.sum(CallRecord.duration_seconds).label("total_duration"),
+        func.min(CallRecord.start_time).label("first_seen"),
+        func.max(CallRecord.start_time).label("last_seen"),
+    ).filter(
+        CallRecord.case_id.in_(case_ids),
+        CallRecord.partner_number_norm.isnot(None),
+        CallRecord.partner_number_norm != ""
+    ).group_by(
+        CallRecord.partner_number_norm
+    ).having(having).order_by(
+        total_calls.desc(), case_count.desc()
+    ).limit(limit).all()
+
+    if not shared:
+        return []
+
+    numbers = [row.partner_number_norm for row in shared]
+    breakdown = _breakdown(db, numbers, case_ids)
+
+    return [
+        {
+            "number": row.partner_number_norm,
+            "case_count": row.case_count,
+            "device_count": row.device_count,
+            "total_calls": row.total_calls,
+            "total_duration": row.total_duration or 0,
+            "first_seen": row.first_seen,
+            "last_seen": row.last_seen,
+            "names": breakdown[row.partner_number_norm]["names"],
+            "cases": breakdown[row.partner_number_norm]["cases"],
+        }
+        for row in shared
+    ]
+
+
+def lookup_number(db: Session, number: str, case_ids: List[int]) -> Optional[Dict]:
+    """
+    Every case/device where `number` appears - as a contact or as the device itself
+    """
+    normalized = normalize_phone(number)
+    if not normalized:
+        return None
+
+    breakdown = _breakdown(db, [normalized], case_ids)[normalized]
+
+    device_rows = db.query(
+        CallRecord.case_id,
+        func.max(CallRecord.device_owner).label("device_owner"),
+        func.count(CallRecord.id).label("record_count"),
+    ).filter(
+        CallRecord.device_number_norm == normalized,
+        CallRecord.case_id.in_(case_ids)
+    ).group_by(CallRecord.case_id).all()
+
+    case_names = _case_names(db, {r.case_id for r in device_rows})
+    return {
+        "number": normalized,
+        "total_calls": sum(c["total_calls"] for c in breakdown["cases"]),
+        "names": breakdown["names"],
+        "as_contact": breakdown["cases"],
+        "as_device": [
+            {
+                "case_id": r.case_id,
+                "case_number": case_names.get(r.case_id, (None, None))[0],
+                "case_title": case_names.get(r.case_id, (None, None))[1],
+                "device_owner": r.device_owner,
+                "record_count": r.record_count,
+            }
+            for r in device_rows
+        ],
+    }
+
+
+def _breakdown(db: Session, numbers: List[str], case_ids: List[int]) -> Dict[str, Dict]:
+    """Per number: cases -> devices with call counts (index seek on partner_number_norm)"""
+    rows = db.query(
+        CallRecord.partner_number_norm,
+        CallRecord.case_id,
+        _device_key().label("device"),
+        func.max(CallRecord.device_owner).label("device_owner"),
+        func.max(CallRecord.partner_name).label("partner_name"),
+        func.count(CallRecord.id).label("calls"),
+        func.sum(CallRecord.duration_seconds).label("duration"),
+    ).filter(
+        CallRecord.partner_number_norm.in_(numbers),
+        CallRecord.case_id.in_(case_ids)
+    ).group_by(
+        CallRecord.partner_number_norm, CallRecord.case_id, _device_key()
+    ).all()
+
+    case_names = _case_names(db, {r.case_id for r in rows})
+
+    result: Dict[str, Dict] = {n: {"names": set(), "cases": {}} for n in numbers}
+    for r in rows:
+        entry = result[r.partner_number_norm]
+        if r.partner_name:
+            entry["names"].add(r.partner_name)
+        case = entry["cases"].get(r.case_id)
+        if case is None:
+            case_number, title = case_names.get(r.case_id, (None, None))
+            case = entry["cases"][r.case_id] = {
+                "case_id": r.case_id,
+                "case_number": case_number,
+                "case_title": title,
+                "total_calls": 0,
+                "total_duration": 0,
+                "devices": [],
+            }
+        case["total_calls"] += r.calls
+        case["total_duration"] += r.duration or 0
+        case["devices"].append({
+            "device": r.device,
+            "device_owner": r.device_owner,
+            "calls": r.calls,
+            "duration": r.duration or 0,
+        })
+
+    for entry in result.values():
+        entry["names"] = sorted(entry["names"])
+        entry["cases"] = sorted(entry["cases"].values(), key=lambda c: c["total_calls"], reverse=True)
+        for case in entry["cases"]:
+            case["devices"].sort(key=lambda d: d["calls"], reverse=True)
+    return result
+
+
+def _case_names(db: Session, case_ids) -> Dict[int, tuple]:
+    if not case_ids:
+        return {}
+    rows = db.query(Case.id, Case.case_number, Case.title).filter(Case.id.in_(case_ids)).all()
+    return {r.id: (r.case_number, r.title) for r in rows}
@@ -0,0 +1,469 @@
+"""
+Flow Pattern Detection
+Laundering typologies over a case's transfers (MoneyFlowEdge and
+CryptoTransaction, in one pass):
+
+- fan_in: many distinct senders paying one account within a time window
+  (smurfing into a mule account)
+- fan_out: one account paying many distinct receivers within a window
+- structuring: repeated deposits just below a reporting threshold
+- round_trip: time-ordered cycles that bring money back to where it
+  started (depth and time limited)
+
+Transfers are grouped into per-account arrays sorted by time. Windows are
+scanned with two pointers, cycles are enumerated by a DFS that only
+follows later transfers (bisect on the sorted arrays). Money-flow nodes
+with a wallet address are the same account as that wallet in the crypto
+transactions.
+
+`detect_patterns` is a pure function over plain tuples so the job can run
+it in the process pool; the job handler loads transfers and writes the
+resulting scores back to nodes, crypto transactions and wallets.
+"""
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, case, or_, select, update
+
+from app.models.crypto import CryptoTransaction, CryptoWallet
+from app.models.money_flow import MoneyFlowNode, MoneyFlowEdge
+from app.services.jobs import JobContext, job_handler
+from app.services.money_flow_graph import bump_graph_version
+
+_EPOCH = datetime(1970, 1, 1)
+_LOAD_BATCH = 10000
+_WRITE_BATCH = 1000
+
+# Cycle search stops after this many transfer expansions
+_CYCLE_BUDGET = 2_000_000
+
+# Events kept in the job result (highest scores first) and transfers listed per event
+_MAX_EVENTS = 500
+_MAX_EVENT_TRANSFERS = 50
+
+DEFAULT_PARAMS = {
+    "window_hours": 24.0,
+    "min_counterparties": 5,
+    "structuring_threshold": None,  # Reporting threshold in the edges' currency; None = off
+    "structuring_margin": 0.1,  # "Just below" = within 10% under the threshold
+    "min_structuring_count": 3,
+    "max_cycle_length": 4,
+    "cycle_window_hours": 72.0,
+    "min_return_ratio": 0.5,  # Share of the first transfer that must come back
+    "include_crypto": True,
+    "write_scores": True,
+}
+
+# (source account, destination account, time in epoch seconds, amount)
+Transfer = Tuple[int, int, float, float]
+
+
+def detect_patterns(
+    transfers: List[Transfer],
+    params: Dict[str, Any],
+    structuring_scope: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Pattern events over transfers. Accounts and transfers are referred to by
+    their list indexes. Only the first `structuring_scope` transfers (same
+    currency) are checked for structuring (all if None).
+    """
+    p = {**DEFAULT_PARAMS, **{k: v for k, v in params.items() if v is not None}}
+    window_s = p["window_hours"] * 3600
+    min_count = p["min_counterparties"]
+
+    incoming: Dict[int, List[Tuple[float, int, int]]] = {}
+    outgoing: Dict[int, List[Tuple[float, int, int]]] = {}
+    for i, (u, v, t, _) in enumerate(transfers):
+        if u == v:
+            continue
+        outgoing.setdefault(u, []).append((t, v, i))
+        incoming.setdefault(v, []).append((t, u, i))
+    for items in incoming.values():
+        items.sort()
+    for items in outgoing.values():
+        items.sort()
+
+    events: List[Dict[str, Any]] = []
+    for account, items in incoming.items():
+        if len(items) >= min_count:
+            for lo, hi in _dense_windows(items, window_s, min_count):
+                events.append(_window_event("fan_in", account, items[lo:hi + 1], transfers, min_count))
+    for account, items in outgoing.items():
+        if len(items) >= min_count:
+            for lo, hi in _dense_windows(items, window_s, min_count):
+                events.append(_window_event("fan_out", account, items[lo:hi + 1], transfers, min_count))
+
+    threshold = p["structuring_threshold"]
+    if threshold:
+        floor = threshold * (1 - p["structuring_margin"])
+        scope = len(transfers) if structuring_scope is None else structuring_scope
+        for account, items in incoming.items():
+            # Each deposit counts on its own: key the window by transfer index
+            below = [(t, i, i) for t, _, i in items if i < scope and floor <= transfers[i][3] < threshold]
+            if len(below) >= p["min_structuring_count"]:
+                for lo, hi in _dense_windows(below, window_s, p["min_structuring_count"]):
+                    events.append(_window_event(
+                        "structuring", account, below[lo:hi + 1], transfers, p["min_structuring_count"]
+                    ))
+
+    cycles, truncated = _round_trips(transfers, outgoing, p)
+    events.extend(cycles)
+
+    events.sort(key=lambda e: (e["score"], e["total_amount"]), reverse=True)
+    return {"events": events, "cycles_truncated": truncated}
+
+
+def _dense_windows(items: List[Tuple[float, int, int]], window_s: float, min_count: int) -> List[Tuple[int, int]]:
+    """
+    Index ranges of time-sorted (t, counterparty, transfer) items where some
+    window of window_s seconds holds at least min_count distinct
+    counterparties. Overlapping qualifying windows are merged.
+    """
+    ranges: List[List[int]] = []
+    counts: Dict[int, int] = {}
+    lo = 0
+    for hi, (t, other, _) in enumerate(items):
+        counts[other] = counts.get(other, 0) + 1
+        while items[lo][0] < t - window_s:
+            gone = items[lo][1]
+            counts[gone] -= 1
+            if not counts[gone]:
+                del counts[gone]
+            lo += 1
+        if len(counts) >= min_count:
+            if ranges and lo <= ranges[-1][1]:
+                ranges[-1][1] = hi
+            else:
+                ranges.append([lo, hi])
+    return [(lo, hi) for lo, hi in ranges]
+
+
+def _window_event(
+    pattern: str,
+    account: int,
+    items: List[Tuple[float, int, int]],
+    transfers: List[Transfer],
+    min_count: int
+) -> Dict[str, Any]:
+    refs = [i for _, _, i in items]
+    counterparties = {transfers[i][0] if pattern != "fan_out" else transfers[i][1] for i in refs}
+    counterparties.discard(account)
+    extra = len(refs if pattern == "structuring" else counterparties) - min_count
+    base = {"fan_in": 50, "fan_out": 45, "structuring": 60}[pattern]
+    return {
+        "pattern": pattern,
+        "hub": account,
+        "accounts": [account] + sorted(counterparties),
+        "transfers": refs,
+        "start": items[0][0],
+        "end": items[-1][0],
+        "total_amount": sum(transfers[i][3] for i in refs),
+        "counterparties": len(counterparties),
+        "score": min(95, base + 3 * extra),
+    }
+
+
+def _round_trips(
+    transfers: List[Transfer],
+    outgoing: Dict[int, List[Tuple[float, int, int]]],
+    p: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Cycles u -> ... -> u of at most max_cycle_length transfers, each no
+    earlier than the previous one, all within cycle_window_hours of the
+    first, returning at least min_return_ratio of the first amount.
+    Each cycle is reported once (by its set of transfers).
+    """
+    max_len = p["max_cycle_length"]
+    window_s = p["cycle_window_hours"] * 3600
+    min_ratio = p["min_return_ratio"]
+    out_times = {u: [t for t, _, _ in items] for u, items in outgoing.items()}
+
+    events: List[Dict[str, Any]] = []
+    seen: Set[frozenset] = set()
+    budget = _CYCLE_BUDGET
+
+    # Start from every transfer in time order - budget exhaustion drops the latest ones
+    for first in sorted(range(len(transfers)), key=lambda i: transfers[i][2]):
+        u, v, t0, amount0 = transfers[first]
+        if u == v or u not in out_times or amount0 <= 0:
+            continue
+        deadline = t0 + window_s
+        # Frames: (account, arrival time, next position in its outgoing list)
+        path_accounts = [u, v]
+        path_refs = [first]
+        stack = [(v, t0, bisect_left(out_times.get(v, []), t0))]
+        while stack:
+            if budget <= 0:
+                return events, True
+            account, t_arrive, pos = stack[-1]
+            items = outgoing.get(account, [])
+            end = bisect_right(out_times.get(account, []), deadline)
+            if pos >= end or len(path_refs) >= max_len:
+                stack.pop()
+                path_accounts.pop()
+                path_refs.pop()
+                continue
+            t, nxt, ref = items[pos]
+            stack[-1] = (account, t_arrive, pos + 1)
+            budget -= 1
+            if ref in path_refs:
+                continue
+            if nxt == u:
+                if transfers[ref][3] >= min_ratio * amount0:
+                    refs = path_refs + [ref]
+                    key = frozenset(refs)
+                    if key not in seen:
+                        seen.add(key)
+                        events.append(_cycle_event(path_accounts, refs, transfers))
+                continue
+            if nxt in path_accounts:
+                continue
+            path_accounts.append(nxt)
+            path_refs.append(ref)
+            stack.append((nxt, t, bisect_left(out_times.get(nxt, []), t)))
+    return events, False
+
+
+def _cycle_event(accounts: List[int], refs: List[int], transfers: List[Transfer]) -> Dict[str, Any]:
+    amount_out = transfers[refs[0]][3]
+    amount_back = transfers[refs[-1]][3]
+    # Shorter, fuller round trips are the clearer signal
+    score = 70 + (10 if amount_back >= 0.9 * amount_out else 0) + (5 if len(refs) <= 3 else 0)
+    return {
+        "pattern": "round_trip",
+        "hub": accounts[0],
+        "accounts": list(accounts),
+        "transfers": refs,
+        "start": transfers[refs[0]][2],
+        "end": transfers[refs[-1]][2],
+        "total_amount": amount_out,
+        "returned_amount": amount_back,
+        "counterparties": len(accounts) - 1,
+        "score": score,
+    }
+
+
+# ==================== JOB ====================
+
+@job_handler("flow_patterns")
+def detect_flow_patterns(ctx: JobContext):
+    """
+    Job: detect fan-in/fan-out/structuring/round-trip patterns for a case
+    and (optionally) raise risk scores of the accounts and transfers involved.
+    """
+    db = ctx.db
+    case_id = ctx.case_id
+    params = {**DEFAULT_PARAMS, **{k: v for k, v in ctx.params.items() if v is not None}}
+
+    ctx.report(0, "Loading transfers", force=True)
+    # Accounts: money-flow nodes with a wallet address share the wallet's account
+    accounts: Dict[Tuple[str, Any], int] = {}
+    account_keys: List[Tuple[str, Any]] = []
+    node_account: Dict[int, int] = {}
+
+    def account_of(key: Tuple[str, Any]) -> int:
+        index = accounts.get(key)
+        if index is None:
+            index = accounts[key] = len(account_keys)
+            account_keys.append(key)
+        return index
+
+    for node_id, wallet in db.execute(
+        select(MoneyFlowNode.id, MoneyFlowNode.wallet_address).where(MoneyFlowNode.case_id == case_id)
+    ):
+        node_account[node_id] = account_of(("wallet", wallet) if wallet else ("node", node_id))
+
+    transfers: List[Transfer] = []
+    sources: List[Tuple[str, int]] = []  # Per transfer: ("edge" | "crypto", row id)
+    stream = db.execute(
+        select(
+            MoneyFlowEdge.id, MoneyFlowEdge.from_node_id, MoneyFlowEdge.to_node_id,
+            MoneyFlowEdge.amount, MoneyFlowEdge.transaction_date
+        ).where(MoneyFlowEdge.case_id == case_id, MoneyFlowEdge.transaction_date.isnot(None))
+        .execution_options(yield_per=_LOAD_BATCH)
+    )
+    for edge_id, from_id, to_id, amount, when in stream:
+        u, v = node_account.get(from_id), node_account.get(to_id)
+        if u is None or v is None:
+            continue
+        transfers.append((u, v, (when - _EPOCH).total_seconds(), amount or 0.0))
+        sources.append(("edge", edge_id))
+    edge_count = len(transfers)
+
+    if params["include_crypto"]:
+        stream = db.execute(
+            select(
+                CryptoTransaction.id, CryptoTransaction.from_address, CryptoTransaction.to_address,
+                CryptoTransaction.amount_usd, CryptoTransaction.amount, CryptoTransaction.timestamp
+            ).where(CryptoTransaction.case_id == case_id, CryptoTransaction.timestamp.isnot(None))
+            .execution_options(yield_per=_LOAD_BATCH)
+        )
+        for tx_id, from_address, to_address, amount_usd, amount, when in stream:
+            transfers.append((
+                account_of(("wallet", from_address)),
+                account_of(("wallet", to_address)),
+                (when - _EPOCH).total_seconds(),
+                amount_usd if amount_usd is not None else (amount or 0.0)
+            ))
+            sources.append(("crypto", tx_id))
+            if len(transfers) % _LOAD_BATCH == 0:
+                ctx.report(None, f"Loaded {len(transfers)} transfers")
+
+    if not transfers:
+        return {"message": "No dated transfers found", "transfers_scanned": 0, "events": []}
+
+    ctx.report(20, f"Scanning {len(transfers)} transfers", force=True)
+    # Structuring thresholds are in the money-flow currency - crypto (USD) is left out
+    found = ctx.run_cpu(detect_patterns, transfers, params, edge_count)
+    events = found["events"]
+
+    counts: Dict[str, int] = {}
+    for e in events:
+        counts[e["pattern"]] = counts.get(e["pattern"], 0) + 1
+
+    scores_written = {}
+    if params["write_scores"] and events:
+        ctx.report(80, "Writing risk scores", force=True)
+        scores_written = _write_scores(db, case_id, events, account_keys, sources)
+        ctx.check_cancelled()
+        db.commit()
+
+    return {
+        "message": f"Found {len(events)} pattern events",
+        "transfers_scanned": len(transfers),
+        "counts": counts,
+        "cycles_truncated": found["cycles_truncated"],
+        "scores_written": scores_written,
+        "events": [_event_result(e, account_keys, sources) for e in events[:_MAX_EVENTS]],
+    }
+
+
+def _event_result(event: Dict[str, Any], account_keys: List[Tuple[str, Any]], sources: List[Tuple[str, int]]) -> Dict[str, Any]:
+    def account(index: int) -> Dict[str, Any]:
+        kind, value = account_keys[index]
+        return {"node_id": value} if kind == "node" else {"wallet_address": value}
+
+    refs = event["transfers"][:_MAX_EVENT_TRANSFERS]
+    result = {
+        "pattern": event["pattern"],
+        "score": event["score"],
+        "account": account(event["hub"]),
+        "accounts": [account(a) for a in event["accounts"][:_MAX_EVENT_TRANSFERS]],
+        "edge_ids": [row_id for kind, row_id in (sources[i] for i in refs) if kind == "edge"],
+        "crypto_transaction_ids": [row_id for kind, row_id in (sources[i] for i in refs) if kind == "crypto"],
+        "transfer_count": len(event["transfers"]),
+        "counterparties": event["counterparties"],
+        "total_amount": round(event["total_amount"], 2),
+        "start": (_EPOCH + timedelta(seconds=event["start"])).isoformat(),
+        "end": (_EPOCH + timedelta(seconds=event["end"])).isoformat(),
+    }
+    if "returned_amount" in event:
+        result["returned_amount"] = round(event["returned_amount"], 2)
+    return result
+
+
+def _write_scores(
+    db,
+    case_id: int,
+    events: List[Dict[str, Any]],
+    account_keys: List[Tuple[str, Any]],
+    sources: List[Tuple[str, int]]
+) -> Dict[str, int]:
+    """
+    Raise (never lower) risk scores: the event's hub and cycle members get the
+    event score, other counterparties half of it. Wallets also get the
+    pattern names added to risk_flags.
+    """
+    account_scores: Dict[int, int] = {}
+    account_patterns: Dict[int, Set[str]] = {}
+    transfer_scores: Dict[int, int] = {}
+    for e in events:
+        full = set(e["accounts"]) if e["pattern"] == "round_trip" else {e["hub"]}
+        for a in e["accounts"]:
+            score = e["score"] if a in full else e["score"] // 2
+            if score > account_scores.get(a, 0):
+                account_scores[a] = score
+            if a in full:
+                account_patterns.setdefault(a, set()).add(e["pattern"])
+        for i in e["transfers"]:
+            if e["score"] > transfer_scores.get(i, 0):
+                transfer_scores[i] = e["score"]
+
+    node_scores: Dict[int, int] = {}
+    wallet_scores: Dict[str, int] = {}
+    for a, score in account_scores.items():
+        kind, value = account_keys[a]
+        if kind == "node":
+            node_scores[value] = score
+        else:
+            wallet_scores[value] = score
+    # Money-flow nodes that carry a wallet address share its score
+    if wallet_scores:
+        for node_id, wallet in db.execute(
+            select(MoneyFlowNode.id, MoneyFlowNode.wallet_address)
+            .where(MoneyFlowNode.case_id == case_id, MoneyFlowNode.wallet_address.isnot(None))
+        ):
+            if wallet in wallet_scores:
+                node_scores[node_id] = wallet_scores[wallet]
+
+    tx_scores = {sources[i][1]: s for i, s in transfer_scores.items() if sources[i][0] == "crypto"}
+
+    nodes_updated = _raise_scores(db, MoneyFlowNode, node_scores)
+    if nodes_updated:
+        bump_graph_version(db, case_id)
+    transactions_updated = _raise_scores(db, CryptoTransaction, tx_scores)
+
+    wallets_updated = 0
+    if wallet_scores:
+        wallet_patterns = {account_keys[a][1]: p for a, p in account_patterns.items() if account_keys[a][0] == "wallet"}
+        addresses = list(wallet_scores)
+        wallets = []
+        for start in range(0, len(addresses), _WRITE_BATCH):
+            wallets.extend(db.query(CryptoWallet).filter(
+                CryptoWallet.case_id == case_id,
+                CryptoWallet.address.in_(addresses[start:start + _WRITE_BATCH])
+            ))
+        for wallet in wallets:
+            score = wallet_scores.get(wallet.address)
+            if score is None:
+                continue
+            wallet.risk_score = max(wallet.risk_score or 0, score)
+            patterns = wallet_patterns.get(wallet.address)
+            if patterns:
+                try:
+                    flags = json.loads(wallet.risk_flags) if wallet.risk_flags else []
+                except ValueError:
+                    flags = []
+                wallet.risk_flags = json.dumps(sorted(set(flags) | patterns))
+            wallets_updated += 1
+
+    return {"nodes": nodes_updated, "crypto_transactions": transactions_updated, "wallets": wallets_updated}
+
+
+def _raise_scores(db, model, scores: Dict[int, int]) -> int:
+    """risk_score = max(risk_score, new score) per row id, batched executemany"""
+    if not scores:
+        return 0
+    # Core UPDATE (rows deleted meanwhile are skipped); CASE keeps higher existing scores.
+    # updated_at moves only for raised scores - it drives the graph change feed
+    table = model.__table__
+    score = bindparam("score")
+    raised = or_(table.c.risk_score.is_(None), table.c.risk_score < score)
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            risk_score=case((raised, score), else_=table.c.risk_score),
+            updated_at=case((raised, bindparam("now")), else_=table.c.updated_at)
+        )
+    )
+    now = datetime.utcnow()
+    rows = [{"row_id": row_id, "score": score, "now": now} for row_id, score in scores.items()]
+    for start in range(0, len(rows), _WRITE_BATCH):
+        db.execute(stmt, rows[start:start + _WRITE_BATCH])
+    return len(rows)
+
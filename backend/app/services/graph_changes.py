@@ -0,0 +1,103 @@
+"""
+Graph Change Feed
+Delta sync for the money-flow and call-network graphs.
+
+Inserts and updates are found through the rows' own `updated_at` -
+bulk/Core writers to node, edge, entity and link tables set it (or call
+record_rebuild); deletions are recorded as GraphTombstone rows in the same
+transaction as the delete. Clients keep the returned cursor and ask for changes since it:
+
+    GET .../changes                 -> full snapshot (reset=true) + cursor
+    GET .../changes?since=<cursor>  -> upserted rows + deleted ids + cursor
+
+The cursor lags the server clock by a few seconds so rows committed by
+concurrent transactions are never skipped; a change may therefore be sent
+twice, which is harmless for upserts and deletes by id. A whole-graph
+rebuild (e.g. call network regeneration) or a cursor older than the
+tombstone retention answers with a full snapshot instead.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.graph_change import GraphTombstone
+
+# Tombstones older than this are pruned; older cursors get a full snapshot
+TOMBSTONE_RETENTION = timedelta(days=30)
+# Cursor lag behind the clock (covers in-flight transactions and clock skew)
+_CURSOR_OVERLAP = timedelta(seconds=5)
+_WHOLE_GRAPH = "all"
+
+
+def record_deletions(db: Session, case_id: int, graph: str, object_type: str, ids: Iterable[int]):
+    """Tombstone deleted objects - call in the deleting transaction"""
+    rows = [
+        {"case_id": case_id, "graph": graph, "object_type": object_type, "object_id": object_id}
+        for object_id in ids
+    ]
+    if rows:
+        db.execute(insert(GraphTombstone), rows)
+    _prune(db, case_id, graph)
+
+
+def record_rebuild(db: Session, case_id: int, graph: str):
+    """Mark the whole graph as replaced - clients resync from a full snapshot"""
+    db.add(GraphTombstone(case_id=case_id, graph=graph, object_type=_WHOLE_GRAPH))
+    _prune(db, case_id, graph)
+
+
+def _prune(db: Session, case_id: int, graph: str):
+    db.query(GraphTombstone).filter(
+        GraphTombstone.case_id == case_id,
+        GraphTombstone.graph == graph,
+        GraphTombstone.deleted_at < datetime.utcnow() - TOMBSTONE_RETENTION
+    ).delete(synchronize_session=False)
+
+
+def get_changes(
+    db: Session,
+    case_id: int,
+    graph: str,
+    models: Dict[str, Any],
+    since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Changes of a case graph since a cursor.
+    models: object type -> model (e.g. {"node": MoneyFlowNode, "edge": MoneyFlowEdge}).
+    Returns {"cursor", "reset", "changed": {type: [rows]}, "deleted": {type: [ids]}};
+    clients apply deletions before upserts (ids can be reused after a delete).
+    """
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)  # Stored times are naive UTC
+    now = datetime.utcnow()
+    cursor = now - _CURSOR_OVERLAP
+
+    reset = since is None or since < now - TOMBSTONE_RETENTION
+    deleted: Dict[str, List[int]] = {object_type: [] for object_type in models}
+    if not reset:
+        tombstones = db.execute(
+            select(GraphTombstone.object_type, GraphTombstone.object_id).where(
+                GraphTombstone.case_id == case_id,
+                GraphTombstone.graph == graph,
+                GraphTombstone.deleted_at > since
+            )
+        ).all()
+        for object_type, object_id in tombstones:
+            if object_type == _WHOLE_GRAPH:
+                reset = True
+                break
+            if object_type in deleted:
+                deleted[object_type].append(object_id)
+    if reset:
+        deleted = {object_type: [] for object_type in models}
+
+    changed: Dict[str, List[Any]] = {}
+    for object_type, model in models.items():
+        query = db.query(model).filter(model.case_id == case_id)
+        if not reset:
+            query = query.filter(model.updated_at > since)
+        changed[object_type] = query.order_by(model.id).all()
+
+    return {"cursor": cursor, "reset": reset, "changed": changed, "deleted": deleted}
@@ -0,0 +1,342 @@
+"""
+Graph Layout Service
+Server-side force-directed layout for the money-flow and call-network views.
+
+Fruchterman-Reingold with a Barnes-Hut quadtree for the repulsive forces
+(O(n log n) per iteration instead of O(n^2)), run as a background job:
+- full: every node is placed again
+- incremental: nodes that already have a position (laid out before or
+  dragged by the user) stay where they are; only new nodes are placed,
+  starting next to their positioned neighbours
+
+`force_layout` is a pure function over plain lists so iterations can run
+in the process pool; the job handler runs them in chunks to report
+progress and honour cancellation, then stores all coordinates in bulk.
+"""
+import math
+import random
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.models.call_record import CallEntity, CallLink
+from app.models.money_flow import MoneyFlowNode, MoneyFlowEdge
+from app.services.jobs import JobContext, job_handler
+from app.services.money_flow_graph import bump_graph_version
+
+# Ideal edge length (graph canvas units)
+EDGE_LENGTH = 100.0
+# Barnes-Hut opening angle: larger = faster, less exact
+_THETA = 0.9
+_LEAF_SIZE = 8
+# Pull towards the centre so disconnected components stay together
+_GRAVITY = 0.02
+_CHUNK_ITERATIONS = 10
+_WRITE_BATCH = 1000
+
+# (u, v, weight) between node indexes
+LayoutEdge = Tuple[int, int, float]
+
+
+def initial_positions(
+    n: int,
+    edges: List[LayoutEdge],
+    xs: List[Optional[float]],
+    ys: List[Optional[float]],
+    seed: int = 0
+) -> Tuple[List[float], List[float]]:
+    """
+    Starting coordinates: known positions are kept, unplaced nodes start at
+    the centroid of their placed neighbours (jittered) or at random.
+    """
+    rng = random.Random(seed)
+    placed = [i for i in range(n) if xs[i] is not None and ys[i] is not None]
+    if placed:
+        cx = sum(xs[i] for i in placed) / len(placed)
+        cy = sum(ys[i] for i in placed) / len(placed)
+    else:
+        cx = cy = 0.0
+    spread = EDGE_LENGTH * math.sqrt(n) / 2
+
+    neighbours: List[List[int]] = [[] for _ in range(n)]
+    for u, v, _ in edges:
+        neighbours[u].append(v)
+        neighbours[v].append(u)
+
+    out_x = [0.0] * n
+    out_y = [0.0] * n
+    for i in range(n):
+        if xs[i] is not None and ys[i] is not None:
+            out_x[i], out_y[i] = xs[i], ys[i]
+            continue
+        anchors = [j for j in neighbours[i] if xs[j] is not None and ys[j] is not None]
+        if anchors:
+            out_x[i] = sum(xs[j] for j in anchors) / len(anchors) + rng.uniform(-1, 1) * EDGE_LENGTH
+            out_y[i] = sum(ys[j] for j in anchors) / len(anchors) + rng.uniform(-1, 1) * EDGE_LENGTH
+        else:
+            out_x[i] = cx + rng.uniform(-spread, spread)
+            out_y[i] = cy + rng.uniform(-spread, spread)
+    return out_x, out_y
+
+
+def force_layout(
+    xs: List[float],
+    ys: List[float],
+    edges: List[LayoutEdge],
+    movable: Optional[List[int]],
+    iterations: int,
+    start_temperature: float,
+    end_temperature: float
+) -> Tuple[List[float], List[float]]:
+    """
+    Run Fruchterman-Reingold iterations, cooling linearly between the two
+    temperatures (maximum move per iteration). Only `movable` nodes move
+    (all nodes if None); every node still repels and attracts.
+    """
+    n = len(xs)
+    xs, ys = list(xs), list(ys)
+    if n < 2 or iterations <= 0:
+        return xs, ys
+    nodes = list(range(n)) if movable is None else movable
+    is_movable = [movable is None] * n
+    for i in nodes:
+        is_movable[i] = True
+    k = EDGE_LENGTH
+    k2 = k * k
+    theta2 = _THETA * _THETA
+
+    for step in range(iterations):
+        temperature = start_temperature + (end_temperature - start_temperature) * step / max(iterations - 1, 1)
+        tree = _QuadTree(xs, ys)
+        cx, cy = tree.mass_x[0], tree.mass_y[0]
+        dx_acc = [0.0] * n
+        dy_acc = [0.0] * n
+
+        # Repulsion (Barnes-Hut) and gravity
+        for i in nodes:
+            xi, yi = xs[i], ys[i]
+            fx = fy = 0.0
+            stack = [0]
+            while stack:
+                c = stack.pop()
+                points = tree.points[c]
+                if points is not None:
+                    for j in points:
+                        if j == i:
+                            continue
+                        dx, dy = xi - xs[j], yi - ys[j]
+                        d2 = dx * dx + dy * dy
+                        if d2 < 1e-6:
+                            # Coincident nodes: push apart in a fixed direction per pair
+                            dx, dy, d2 = (1e-3 if i < j else -1e-3), 0.0, 1e-6
+                        f = k2 / d2
+                        fx += dx * f
+                        fy += dy * f
+                    continue
+                dx, dy = xi - tree.mass_x[c], yi - tree.mass_y[c]
+                d2 = dx * dx + dy * dy
+                size = tree.size[c]
+                if size * size < theta2 * d2:
+                    f = k2 * tree.mass[c] / d2
+                    fx += dx * f
+                    fy += dy * f
+                else:
+                    stack.extend(tree.children[c])
+            dx_acc[i] = fx - _GRAVITY * (xi - cx)
+            dy_acc[i] = fy - _GRAVITY * (yi - cy)
+
+        # Attraction along edges
+        for u, v, w in edges:
+            mu, mv = is_movable[u], is_movable[v]
+            if not (mu or mv):
+                continue
+            dx, dy = xs[u] - xs[v], ys[u] - ys[v]
+            d = math.sqrt(dx * dx + dy * dy)
+            if d == 0:
+                continue
+            f = d * w / k  # |F| = d^2 / k, applied to the unit vector
+            if mu:
+                dx_acc[u] -= dx * f
+                dy_acc[u] -= dy * f
+            if mv:
+                dx_acc[v] += dx * f
+                dy_acc[v] += dy * f
+
+        # Move, limited by the temperature
+        for i in nodes:
+            dx, dy = dx_acc[i], dy_acc[i]
+            d = math.sqrt(dx * dx + dy * dy)
+            if d > 0:
+                step_len = min(d, temperature) / d
+                xs[i] += dx * step_len
+                ys[i] += dy * step_len
+
+    return xs, ys
+
+
+class _QuadTree:
+    """
+    Barnes-Hut quadtree in flat lists. Cell 0 is the root; leaves keep their
+    point indexes (points[c]), inner cells their children (children[c]).
+    """
+
+    def __init__(self, xs: List[float], ys: List[float]):
+        self.xs = xs
+        self.ys = ys
+        self.mass: List[int] = []
+        self.mass_x: List[float] = []
+        self.mass_y: List[float] = []
+        self.size: List[float] = []
+        self.children: List[List[int]] = []
+        self.points: List[Optional[List[int]]] = []
+
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
+        size = max(max_x - min_x, max_y - min_y, 1e-3)
+        self._build(list(range(len(xs))), min_x, min_y, size)
+
+    def _build(self, root_points: List[int], x0: float, y0: float, size: float):
+        xs, ys = self.xs, self.ys
+        # (cell, points, x0, y0, size) - iterative, cells are created before their children
+        stack = [(self._new_cell(root_points, size), root_points, x0, y0, size)]
+        while stack:
+            cell, points, x0, y0, size = stack.pop()
+            if len(points) <= _LEAF_SIZE or size < 1e-3:
+                self.points[cell] = points
+                continue
+            half = size / 2
+            mx, my = x0 + half, y0 + half
+            quadrants: Tuple[List[int], ...] = ([], [], [], [])
+            for p in points:
+                quadrants[(xs[p] >= mx) + 2 * (ys[p] >= my)].append(p)
+            for q, q_points in enumerate(quadrants):
+                if not q_points:
+                    continue
+                child = self._new_cell(q_points, half)
+                self.children[cell].append(child)
+                stack.append((child, q_points, mx if q & 1 else x0, my if q & 2 else y0, half))
+
+    def _new_cell(self, points: List[int], size: float) -> int:
+        m = len(points)
+        self.mass.append(m)
+        self.mass_x.append(sum(self.xs[p] for p in points) / m)
+        self.mass_y.append(sum(self.ys[p] for p in points) / m)
+        self.size.append(size)
+        self.children.append([])
+        self.points.append(None)
+        return len(self.mass) - 1
+
+
+# ==================== JOBS ====================
+
+# Node table, edge endpoint columns and edge weight per graph kind
+_GRAPHS = {
+    "money_flow": (MoneyFlowNode, MoneyFlowEdge.from_node_id, MoneyFlowEdge.to_node_id, None),
+    "call_network": (CallEntity, CallLink.source_entity_id, CallLink.target_entity_id, CallLink.weight),
+}
+
+
+@job_handler("money_flow_layout")
+def layout_money_flow(ctx: JobContext):
+    """Job: force-directed layout of a case's money-flow graph"""
+    return _run_layout(ctx, "money_flow")
+
+
+@job_handler("call_network_layout")
+def layout_call_network(ctx: JobContext):
+    """Job: force-directed layout of a case's call network"""
+    return _run_layout(ctx, "call_network")
+
+
+def _run_layout(ctx: JobContext, graph: str):
+    db = ctx.db
+    case_id = ctx.case_id
+    incremental = ctx.params.get("incremental", True)
+    node_model, source_col, target_col, weight_col = _GRAPHS[graph]
+
+    ctx.report(0, "Loading graph", force=True)
+    rows = db.execute(
+        select(node_model.id, node_model.x_position, node_model.y_position)
+        .where(node_model.case_id == case_id)
+        .order_by(node_model.id)
+    ).all()
+    if not rows:
+        return {"message": "Graph is empty", "nodes_positioned": 0}
+    node_ids = [r.id for r in rows]
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    n = len(node_ids)
+
+    # Undirected, parallel edges merged; heavier pairs pull harder (log-scaled)
+    pairs: Dict[Tuple[int, int], float] = {}
+    edge_cols = [source_col, target_col] + ([weight_col] if weight_col is not None else [])
+    for row in db.execute(select(*edge_cols).where(source_col.table.c.case_id == case_id)):
+        u, v = index.get(row[0]), index.get(row[1])
+        if u is None or v is None or u == v:
+            continue
+        pair = (u, v) if u < v else (v, u)
+        weight = (row[2] or 1) if weight_col is not None else 1
+        pairs[pair] = pairs.get(pair, 0.0) + weight
+    edges = [(u, v, 1.0 + math.log(w)) for (u, v), w in pairs.items()]
+
+    if incremental:
+        xs = [r.x_position for r in rows]
+        ys = [r.y_position for r in rows]
+        movable = [i for i in range(n) if xs[i] is None or ys[i] is None]
+        if not movable:
+            return {"message": "All nodes already have positions", "nodes_positioned": 0}
+        if len(movable) == n:
+            movable = None
+    else:
+        xs = [None] * n
+        ys = [None] * n
+        movable = None
+    xs, ys = initial_positions(n, edges, xs, ys, seed=case_id or 0)
+
+    if movable is None:
+        iterations = ctx.params.get("iterations") or 150
+        start_temperature = EDGE_LENGTH * math.sqrt(n) / 4
+    else:
+        # New nodes already start next to their neighbours - short, cool run
+        iterations = ctx.params.get("iterations") or 60
+        start_temperature = EDGE_LENGTH * 2
+    end_temperature = EDGE_LENGTH / 50
+
+    done = 0
+    while done < iterations:
+        chunk = min(_CHUNK_ITERATIONS, iterations - done)
+        t0 = start_temperature + (end_temperature - start_temperature) * done / iterations
+        t1 = start_temperature + (end_temperature - start_temperature) * (done + chunk) / iterations
+        xs, ys = ctx.run_cpu(force_layout, xs, ys, edges, movable, chunk, t0, t1)
+        done += chunk
+        ctx.report(5 + int(85 * done / iterations), f"Iteration {done}/{iterations}")
+
+    ctx.report(90, "Saving positions", force=True)
+    table = node_model.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("node_id"))
+        .values(x_position=bindparam("x"), y_position=bindparam("y"), updated_at=bindparam("now"))
+    )
+    now = datetime.utcnow()
+    moved = range(n) if movable is None else movable
+    rows_out = [
+        {"node_id": node_ids[i], "x": round(xs[i], 2), "y": round(ys[i], 2), "now": now}
+        for i in moved
+    ]
+    # Core UPDATE: nodes deleted meanwhile are simply skipped
+    for start in range(0, len(rows_out), _WRITE_BATCH):
+        db.execute(stmt, rows_out[start:start + _WRITE_BATCH])
+    if graph == "money_flow":
+        bump_graph_version(db, case_id)
+    ctx.check_cancelled()
+    db.commit()
+
+    return {
+        "message": "Layout completed",
+        "nodes_positioned": len(rows_out),
+        "nodes": n,
+        "edges": len(edges),
+        "iterations": iterations,
+        "incremental": movable is not None
+    }
@@ -0,0 +1,317 @@
+"""
+Background Job Runner
+=====================
+In-process job subsystem for heavy analytics.
+
+- Jobs are persisted in `background_jobs` so status/progress survive across
+  API workers (any worker can answer a status poll or accept a cancel).
+- Each job runs on a small thread pool owned by the worker that accepted it.
+- CPU-bound steps are pushed to a process pool via `JobContext.run_cpu`,
+  so they never hold the GIL of the API worker.
+
+Usage:
+
+    @job_handler("call_network")
+    def generate_call_network(ctx: JobContext):
+        ctx.report(10, "Loading records")
+        stats = ctx.run_cpu(build_call_network, rows)
+        ...
+        return {"entities_created": 10}
+
+    job = submit_job(db, "call_network", case_id=1, user_id=current_user.id)
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, is_sqlite
+from app.models.job import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes (heartbeat + cancel check)
+_REPORT_INTERVAL = 0.5
+
+_handlers: Dict[str, Callable] = {}
+_resumable: set = set()
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+def job_handler(job_type: str, resumable: bool = False):
+    """
+    Register a function as the handler for `job_type`.
+    Resumable handlers are re-queued (instead of failed) when their worker died.
+    """
+    def decorator(func: Callable) -> Callable:
+        _handlers[job_type] = func
+        if resumable:
+            _resumable.add(job_type)
+        return func
+    return decorator
+
+
+class JobContext:
+    """Handed to job handlers: params, own DB session, progress and cancellation"""
+
+    def __init__(self, job_id: int, job_type: str, case_id: Optional[int], user_id: Optional[int],
+                 params: Dict[str, Any], db: Session):
+        self.job_id = job_id
+        self.job_type = job_type
+        self.case_id = case_id
+        self.user_id = user_id
+        self.params = params
+        self.db = db
+        self._last_report = 0.0
+        self._progress = 0
+
+    def report(self, progress: Optional[int] = None, message: Optional[str] = None, force: bool = False):
+        """
+        Persist progress (0-100) and heartbeat, throttled.
+        Also checks for cancellation - raises JobCancelled.
+        """
+        if progress is not None:
+            self._progress = max(0, min(100, int(progress)))
+        now = time.monotonic()
+        if not force and now - self._last_report < _REPORT_INTERVAL:
+            return
+        self._last_report = now
+
+        # SQLite has a single writer: while the handler's write transaction is
+        # open the status update would block - keep progress in memory until
+        # commit, but still read the cancel flag (readers are not blocked)
+        write_status = not (is_sqlite and self._sqlite_write_pending())
+
+        values = {"progress": self._progress, "updated_at": datetime.utcnow()}
+        if message is not None:
+            values["message"] = message[:500]
+
+        # Use a short-lived session so handler transactions are not committed early
+        with SessionLocal() as session:
+            if write_status:
+                session.execute(update(BackgroundJob).where(BackgroundJob.id == self.job_id).values(**values))
+            cancel_requested = session.execute(
+                select(BackgroundJob.cancel_requested).where(BackgroundJob.id == self.job_id)
+            ).scalar()
+            session.commit()
+
+        if cancel_requested:
+            raise JobCancelled()
+
+    def _sqlite_write_pending(self) -> bool:
+        if not self.db.in_transaction():
+            return False
+        return bool(self.db.connection().connection.dbapi_connection.in_transaction)
+
+    def check_cancelled(self):
+        """Force a cancellation check (and heartbeat)"""
+        self.report(force=True)
+
+    def run_cpu(self, func: Callable, *args, **kwargs):
+        """
+        Run a CPU-bound, picklable top-level function in the process pool.
+        Falls back to inline execution when the pool is disabled.
+        """
+        if _process_pool is None:
+            return func(*args, **kwargs)
+        return _process_pool.submit(func, *args, **kwargs).result()
+
+
+# ==================== LIFECYCLE ====================
+
+def start_job_runner():
+    """Create pools and recover jobs interrupted by a previous worker. Call on startup."""
+    global _thread_pool, _process_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.JOB_THREAD_WORKERS),
+            thread_name_prefix="job"
+        )
+    if _process_pool is None and settings.JOB_PROCESS_WORKERS > 0:
+        # spawn: safe to start from a threaded server process
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.JOB_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    _recover_stale_jobs()
+
+
+def shutdown_job_runner():
+    """Stop pools. Running jobs are recovered by the next startup."""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _recover_stale_jobs():
+    """
+    Running jobs without heartbeat for JOB_STALE_SECONDS lost their worker.
+    Old pending jobs are only queued here as well (they may be waiting behind
+    a busy pool elsewhere - the claim in _run_job lets one worker run them).
+    """
+    threshold = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    try:
+        with SessionLocal() as db:
+            stale = db.query(BackgroundJob).filter(
+                BackgroundJob.status == JobStatus.RUNNING,
+                BackgroundJob.updated_at < threshold
+            ).all()
+            requeue = list(db.scalars(
+                select(BackgroundJob.id).where(
+                    BackgroundJob.status == JobStatus.PENDING,
+                    BackgroundJob.updated_at < threshold
+                )
+            ))
+            for job in stale:
+                if job.job_type in _resumable and not job.cancel_requested:
+                    job.status = JobStatus.PENDING
+                    job.message = "Resumed after interruption"
+                    job.updated_at = datetime.utcnow()
+                    requeue.append(job.id)
+                else:
+                    job.status = JobStatus.FAILED
+                    job.error = "Interrupted: worker stopped before the job finished"
+                    job.finished_at = datetime.utcnow()
+            db.commit()
+        for job_id in requeue:
+            _schedule(job_id)
+        if requeue or stale:
+            logger.info(f"Recovered {len(stale)} stale jobs, queued {len(requeue)} jobs")
+    except Exception as e:
+        logger.error(f"Error recovering stale jobs: {e}")
+
+
+# ==================== SUBMIT / CANCEL ====================
+
+def submit_job(
+    db: Session,
+    job_type: str,
+    case_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    params: Optional[Dict[str, Any]] = None
+) -> BackgroundJob:
+    """Persist a new job and schedule it on this worker"""
+    if job_type not in _handlers:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    job = BackgroundJob(
+        job_type=job_type,
+        case_id=case_id,
+        created_by=user_id,
+        status=JobStatus.PENDING,
+        progress=0,
+        params=json.dumps(params or {}, default=str)
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _schedule(job.id)
+    return job
+
+
+def find_active_job(db: Session, job_type: str, case_id: Optional[int]) -> Optional[BackgroundJob]:
+    """Pending/running job of a type for a case (to avoid duplicate submissions)"""
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.job_type == job_type,
+        BackgroundJob.case_id == case_id,
+        BackgroundJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+    ).order_by(BackgroundJob.id.desc()).first()
+
+
+def request_cancel(db: Session, job: BackgroundJob) -> BackgroundJob:
+    """
+    Flag a job for cancellation. Pending jobs are cancelled right away,
+    running jobs stop at their next progress report.
+    """
+    if job.is_finished:
+        return job
+    job.cancel_requested = True
+    if job.status == JobStatus.PENDING:
+        job.status = JobStatus.CANCELLED
+        job.finished_at = datetime.utcnow()
+        job.message = "Cancelled"
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _schedule(job_id: int):
+    if _thread_pool is None:
+        # Runner not started (e.g. scripts/tests) - run synchronously
+        _run_job(job_id)
+        return
+    _thread_pool.submit(_run_job, job_id)
+
+
+# ==================== EXECUTION ====================
+
+def _finish(job_id: int, **values):
+    values.setdefault("finished_at", datetime.utcnow())
+    values["updated_at"] = datetime.utcnow()
+    with SessionLocal() as session:
+        session.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(**values))
+        session.commit()
+
+
+def _run_job(job_id: int):
+    with SessionLocal() as db:
+        # Claim the job (only one worker may move it to RUNNING)
+        claimed = db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == JobStatus.PENDING)
+            .values(status=JobStatus.RUNNING, started_at=datetime.utcnow(), updated_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+
+        job = db.get(BackgroundJob, job_id)
+        handler = _handlers.get(job.job_type)
+        ctx = JobContext(
+            job_id=job.id,
+            job_type=job.job_type,
+            case_id=job.case_id,
+            user_id=job.created_by,
+            params=json.loads(job.params) if job.params else {},
+            db=db
+        )
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type {job.job_type}")
+            if asyncio.iscoroutinefunction(handler):
+                result = asyncio.run(handler(ctx))
+            else:
+                result = handler(ctx)
+            _finish(
+                job_id,
+                status=JobStatus.COMPLETED,
+                progress=100,
+                message="Completed",
+                result=json.dumps(result, default=str) if result is not None else None
+            )
+        except JobCancelled:
+            db.rollback()
+            _finish(job_id, status=JobStatus.CANCELLED, message="Cancelled")
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Job {job_id} ({job.job_type}) failed")
+            _finish(job_id, status=JobStatus.FAILED, message="Failed", error=str(e)[:2000])
@@ -0,0 +1,297 @@
+"""
+Location Analysis Service
+Stay-point detection and density clustering of location points.
+
+Pipeline (per case):
+1. Stream points ordered by person + time and reduce each person's track
+   to stay points (stayed within `distance_m` for `min_stay_minutes`).
+   This runs in constant memory and shrinks millions of raw GPS fixes
+   to the places where someone actually stopped.
+2. Grid-based DBSCAN over the stay points of all persons, so neighbourhood
+   queries only touch nearby cells.
+3. Replace the generated `LocationCluster` rows with the result.
+"""
+import math
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.models.location import LocationPoint, LocationCluster
+from app.services.jobs import JobContext, job_handler
+from app.utils.geo import METERS_PER_DEGREE, haversine_m
+
+# Rows fetched per round trip when streaming points
+_LOAD_BATCH = 10000
+
+DEFAULT_PARAMS = {
+    "distance_m": 200,  # Max movement while staying
+    "min_stay_minutes": 15,  # Min time to count as a stay
+    "eps_m": 150,  # DBSCAN neighbourhood radius
+    "min_visits": 2,  # DBSCAN min samples (stays) per cluster
+}
+
+# Stay: (visitor, lat, lon, arrive, leave, label)
+StayPoint = Tuple[str, float, float, datetime, datetime, Optional[str]]
+
+
+class StayPointDetector:
+    """
+    Streaming stay-point detection for one person's time-ordered track.
+    Keeps only the current candidate window in memory.
+    """
+
+    def __init__(self, visitor: str, distance_m: float, min_stay_minutes: float):
+        self.visitor = visitor
+        self.distance_m = distance_m
+        self.min_stay = timedelta(minutes=min_stay_minutes)
+        self._window: deque = deque()  # (lat, lon, start, end, label)
+        self.stays: List[StayPoint] = []
+
+    def add(self, lat: float, lon: float, timestamp: datetime,
+            duration_minutes: Optional[int] = None, label: Optional[str] = None):
+        end = timestamp + timedelta(minutes=duration_minutes) if duration_minutes else timestamp
+        window = self._window
+        if window and haversine_m(window[0][0], window[0][1], lat, lon) > self.distance_m:
+            if not self._emit():
+                # Not a stay - slide the anchor forward until the new point fits
+                while window and haversine_m(window[0][0], window[0][1], lat, lon) > self.distance_m:
+                    window.popleft()
+        window.append((lat, lon, timestamp, end, label))
+
+    def finish(self) -> List[StayPoint]:
+        self._emit()
+        return self.stays
+
+    def _emit(self) -> bool:
+        window = self._window
+        if not window:
+            return False
+        arrive = window[0][2]
+        leave = max(p[3] for p in window)
+        if leave - arrive < self.min_stay:
+            return False
+        lat = sum(p[0] for p in window) / len(window)
+        lon = sum(p[1] for p in window) / len(window)
+        labels = [p[4] for p in window if p[4]]
+        label = Counter(labels).most_common(1)[0][0] if labels else None
+        self.stays.append((self.visitor, lat, lon, arrive, leave, label))
+        window.clear()
+        return True
+
+
+def cluster_stay_points(stays: List[StayPoint], eps_m: float, min_visits: int) -> List[Dict[str, Any]]:
+    """
+    Grid-based DBSCAN over stay points (haversine distance).
+    Returns one summary dict per cluster, busiest first.
+
+    Cells are eps/sqrt(2) wide, so all points of a cell are within eps of
+    each other: a cell holding `min_visits` points is entirely core and
+    needs no per-point neighbourhood queries. Core cells are then merged
+    with union-find, which keeps dense places (a home visited every night)
+    linear instead of quadratic.
+    """
+    if not stays:
+        return []
+
+    side = eps_m / math.sqrt(2)
+    abs_lats = [abs(s[1]) for s in stays]
+    cos_min = math.cos(math.radians(min(max(abs_lats), 89.0)))
+    cos_max = math.cos(math.radians(min(min(abs_lats), 89.0)))
+    # Project at the latitude nearest the equator: cells are never wider
+    # than `side` on the ground, and at least side * cos_min / cos_max wide
+    kx = METERS_PER_DEGREE * cos_max / side
+    ky = METERS_PER_DEGREE / side
+    reach_x = math.ceil(eps_m / (side * cos_min / cos_max))
+    reach_y = math.ceil(eps_m / side)
+
+    cells: Dict[Tuple[int, int], List[int]] = {}
+    for i, s in enumerate(stays):
+        cells.setdefault((math.floor(s[2] * kx), math.floor(s[1] * ky)), []).append(i)
+
+    def near_cells(cell: Tuple[int, int]):
+        cx, cy = cell
+        for dx in range(-reach_x, reach_x + 1):
+            for dy in range(-reach_y, reach_y + 1):
+                key = (cx + dx, cy + dy)
+                if (dx or dy) and key in cells:
+                    yield key
+
+    def within(i: int, j: int) -> bool:
+        return haversine_m(stays[i][1], stays[i][2], stays[j][1], stays[j][2]) <= eps_m
+
+    # 1. Core points
+    core = [False] * len(stays)
+    for cell, members in cells.items():
+        if len(members) >= min_visits:
+            for i in members:
+                core[i] = True
+            continue
+        neighbour_cells = list(near_cells(cell))
+        for i in members:
+            count = len(members)
+            for other in neighbour_cells:
+                for j in cells[other]:
+                    if within(i, j):
+                        count += 1
+                        if count >= min_visits:
+                            break
+                if count >= min_visits:
+                    break
+            core[i] = count >= min_visits
+
+    core_cells = {}
+    for cell, members in cells.items():
+        core_members = [i for i in members if core[i]]
+        if core_members:
+            core_cells[cell] = core_members
+
+    # 2. Merge core cells that have core points within eps
+    parent = {cell: cell for cell in core_cells}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cell, members in core_cells.items():
+        for other in near_cells(cell):
+            if other <= cell or other not in core_cells:
+                continue
+            a, b = find(cell), find(other)
+            if a != b and any(within(i, j) for i in members for j in core_cells[other]):
+                parent[b] = a
+
+    # 3. Core cells form clusters; border points join any core neighbour
+    groups: Dict[Tuple[int, int], List[StayPoint]] = {}
+    for cell, members in cells.items():
+        for i in members:
+            if cell in core_cells:
+                root = find(cell)  # Same cell = within eps of a core point
+            else:
+                root = next(
+                    (find(other) for other in near_cells(cell)
+                     if other in core_cells and any(within(i, j) for j in core_cells[other])),
+                    None
+                )
+            if root is not None:
+                groups.setdefault(root, []).append(stays[i])
+
+    clusters = [_summarize(group) for group in groups.values()]
+    clusters.sort(key=lambda c: (c["visit_count"], c["total_duration_minutes"]), reverse=True)
+    return clusters
+
+
+def _summarize(group: List[StayPoint]) -> Dict[str, Any]:
+    center_lat = sum(s[1] for s in group) / len(group)
+    center_lon = sum(s[2] for s in group) / len(group)
+    radius = max(haversine_m(center_lat, center_lon, s[1], s[2]) for s in group)
+    visitors = {s[0] for s in group}
+    labels = [s[5] for s in group if s[5]]
+    return {
+        "name": Counter(labels).most_common(1)[0][0] if labels else None,
+        "cluster_type": "meeting_point" if len(visitors) > 1 else None,
+        "center_lat": center_lat,
+        "center_lon": center_lon,
+        "radius_meters": round(max(radius, 50.0), 1),
+        "visit_count": len(group),
+        "total_duration_minutes": int(sum((s[4] - s[3]).total_seconds() for s in group) // 60),
+        "unique_visitors": len(visitors),
+        "first_visit": min(s[3] for s in group),
+        "last_visit": max(s[4] for s in group),
+    }
+
+
+@job_handler("location_clustering")
+def generate_location_clusters(ctx: JobContext):
+    """
+    Job: detect stay points and rebuild generated location clusters for a case
+    """
+    db = ctx.db
+    case_id = ctx.case_id
+    params = {**DEFAULT_PARAMS, **{k: v for k, v in ctx.params.items() if v is not None}}
+
+    ctx.report(0, "Loading location points", force=True)
+    total = db.query(LocationPoint).filter(
+        LocationPoint.case_id == case_id,
+        LocationPoint.timestamp.isnot(None)
+    ).count()
+
+    stays: List[StayPoint] = []
+    detector: Optional[StayPointDetector] = None
+    track_key = None
+    processed = 0
+
+    stream = db.query(
+        LocationPoint.suspect_id,
+        LocationPoint.suspect_name,
+        LocationPoint.device_id,
+        LocationPoint.latitude,
+        LocationPoint.longitude,
+        LocationPoint.timestamp,
+        LocationPoint.duration_minutes,
+        LocationPoint.location_name
+    ).filter(
+        LocationPoint.case_id == case_id,
+        LocationPoint.timestamp.isnot(None)
+    ).order_by(
+        LocationPoint.suspect_id,
+        LocationPoint.suspect_name,
+        LocationPoint.device_id,
+        LocationPoint.timestamp
+    ).yield_per(_LOAD_BATCH)
+
+    for suspect_id, suspect_name, device_id, lat, lon, timestamp, duration, name in stream:
+        key = (suspect_id, suspect_name, device_id)
+        if key != track_key:
+            if detector:
+                stays.extend(detector.finish())
+            track_key = key
+            detector = StayPointDetector(
+                suspect_id or suspect_name or device_id or "unknown",
+                params["distance_m"],
+                params["min_stay_minutes"]
+            )
+        detector.add(lat, lon, timestamp, duration, name)
+        processed += 1
+        if processed % _LOAD_BATCH == 0:
+            ctx.report(int(60 * processed / max(total, 1)), f"Scanned {processed}/{total} points")
+    if detector:
+        stays.extend(detector.finish())
+
+    ctx.report(60, f"Clustering {len(stays)} stay points", force=True)
+    clusters = ctx.run_cpu(cluster_stay_points, stays, params["eps_m"], params["min_visits"])
+    ctx.report(90, "Saving clusters", force=True)
+
+    # Replace generated clusters only - manually created ones are kept
+    db.query(LocationCluster).filter(
+        LocationCluster.case_id == case_id,
+        LocationCluster.is_generated == True
+    ).delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    rows = []
+    for index, c in enumerate(clusters, start=1):
+        rows.append({
+            **c,
+            "case_id": case_id,
+            "name": c["name"] or f"Place {index}",
+            "is_generated": True,
+            "created_at": now,
+            "updated_at": now,
+        })
+    if rows:
+        db.execute(insert(LocationCluster), rows)
+
+    ctx.check_cancelled()
+    db.commit()
+
+    return {
+        "message": "Location clusters generated",
+        "points_processed": processed,
+        "stay_points": len(stays),
+        "clusters_created": len(rows),
+        "params": params
+    }
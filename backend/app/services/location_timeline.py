@@ -0,0 +1,206 @@
+"""
+Location Timeline Service
+Downsampled timelines for map display.
+
+Each person's track is simplified independently:
+- zoom: radial-distance filter + Douglas-Peucker with a tolerance of about
+  two screen pixels at that map zoom level, so the drawn route is unchanged
+- bucket_minutes: keep the first fix of every time bucket
+
+Results are cached per case + zoom level, keyed by a data fingerprint so
+imports and edits (on any worker) invalidate them automatically.
+"""
+import math
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.location import LocationPoint
+from app.utils.cache import TTLCache
+from app.utils.geo import METERS_PER_DEGREE
+
+# Meters per pixel at zoom 0 on the equator (Web Mercator, 256px tiles)
+_METERS_PER_PIXEL_Z0 = 156543.03
+_TOLERANCE_PIXELS = 2
+
+# Rows fetched per round trip when streaming / loading points
+_LOAD_BATCH = 10000
+_ID_CHUNK = 500
+_EPOCH = datetime(1970, 1, 1)
+
+_timeline_cache = TTLCache(maxsize=32, ttl=600)
+
+
+def point_to_dict(p: LocationPoint) -> dict:
+    """Location point in the format used by the timeline map"""
+    return {
+        "id": str(p.id),
+        "lat": p.latitude,
+        "lng": p.longitude,
+        "timestamp": p.timestamp.isoformat() if p.timestamp else None,
+        "label": p.location_name or f"Point {p.id}",
+        "source": p.source.value if p.source else "unknown",
+        "accuracy": p.accuracy_meters,
+        "address": p.address,
+        "notes": p.notes,
+        "personId": p.suspect_id,
+        "personName": p.suspect_name,
+        "locationType": p.location_type
+    }
+
+
+def zoom_tolerance_m(zoom: int) -> float:
+    """Simplification tolerance (meters) for a web map zoom level"""
+    return _TOLERANCE_PIXELS * _METERS_PER_PIXEL_Z0 / (2 ** zoom)
+
+
+def simplify_track(lats: array, lons: array, tolerance_m: float) -> List[int]:
+    """
+    Indexes of the points to keep (radial filter, then Douglas-Peucker).
+    First and last points are always kept.
+    """
+    n = len(lats)
+    if n <= 2:
+        return list(range(n))
+
+    kx = METERS_PER_DEGREE * math.cos(math.radians(lats[0]))
+    ky = METERS_PER_DEGREE
+    tol2 = tolerance_m * tolerance_m
+
+    # Radial filter: drop fixes within tolerance of the previous kept one
+    candidates = [0]
+    px, py = lons[0] * kx, lats[0] * ky
+    for i in range(1, n - 1):
+        x, y = lons[i] * kx, lats[i] * ky
+        if (x - px) ** 2 + (y - py) ** 2 > tol2:
+            candidates.append(i)
+            px, py = x, y
+    candidates.append(n - 1)
+
+    xs = [lons[i] * kx for i in candidates]
+    ys = [lats[i] * ky for i in candidates]
+    keep = [False] * len(candidates)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(candidates) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        seg2 = dx * dx + dy * dy
+        max_d2, index = -1.0, first
+        for i in range(first + 1, last):
+            if seg2 == 0:
+                d2 = (xs[i] - ax) ** 2 + (ys[i] - ay) ** 2
+            else:
+                cross = (xs[i] - ax) * dy - (ys[i] - ay) * dx
+                d2 = cross * cross / seg2
+            if d2 > max_d2:
+                max_d2, index = d2, i
+        if max_d2 > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [candidates[i] for i, k in enumerate(keep) if k]
+
+
+def bucket_track(times: List[Optional[datetime]], bucket_seconds: int) -> List[int]:
+    """Indexes of the first point of every time bucket (untimed points are kept)"""
+    kept = []
+    last_bucket = None
+    for i, t in enumerate(times):
+        if t is None:
+            kept.append(i)
+            continue
+        bucket = int((t - _EPOCH).total_seconds()) // bucket_seconds
+        if bucket != last_bucket:
+            kept.append(i)
+            last_bucket = bucket
+    return kept
+
+
+def location_fingerprint(db: Session, case_id: int) -> Tuple[int, Optional[int], Optional[datetime]]:
+    """Changes whenever points are added, removed or edited (updated_at)"""
+    count, max_id, last_update = db.query(
+        func.count(LocationPoint.id), func.max(LocationPoint.id), func.max(LocationPoint.updated_at)
+    ).filter(LocationPoint.case_id == case_id).one()
+    return count, max_id, last_update
+
+
+def get_downsampled_points(
+    db: Session,
+    case_id: int,
+    zoom: Optional[int] = None,
+    bucket_minutes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Simplified points of every track in a case (cached).
+    Returns {"points": [...], "totalPoints": n}.
+    """
+    fingerprint = location_fingerprint(db, case_id)
+    key = (case_id, fingerprint, zoom, bucket_minutes)
+    return _timeline_cache.get_or_set(
+        key, lambda: _downsample(db, case_id, zoom, bucket_minutes, fingerprint[0])
+    )
+
+
+def _downsample(db: Session, case_id: int, zoom: Optional[int], bucket_minutes: Optional[int], total: int):
+    kept_ids: List[int] = []
+
+    def flush(ids, lats, lons, times):
+        if not ids:
+            return
+        if bucket_minutes:
+            indexes = bucket_track(times, bucket_minutes * 60)
+        else:
+            indexes = simplify_track(lats, lons, zoom_tolerance_m(zoom))
+        kept_ids.extend(ids[i] for i in indexes)
+
+    stream = db.query(
+        LocationPoint.id,
+        LocationPoint.suspect_id,
+        LocationPoint.suspect_name,
+        LocationPoint.device_id,
+        LocationPoint.latitude,
+        LocationPoint.longitude,
+        LocationPoint.timestamp
+    ).filter(
+        LocationPoint.case_id == case_id
+    ).order_by(
+        LocationPoint.suspect_id,
+        LocationPoint.suspect_name,
+        LocationPoint.device_id,
+        LocationPoint.timestamp
+    ).yield_per(_LOAD_BATCH)
+
+    track_key = None
+    ids, lats, lons, times = array("q"), array("d"), array("d"), []
+    for point_id, suspect_id, suspect_name, device_id, lat, lon, timestamp in stream:
+        key = (suspect_id, suspect_name, device_id)
+        if key != track_key:
+            flush(ids, lats, lons, times)
+            track_key = key
+            ids, lats, lons, times = array("q"), array("d"), array("d"), []
+        ids.append(point_id)
+        lats.append(lat)
+        lons.append(lon)
+        times.append(timestamp)
+    flush(ids, lats, lons, times)
+
+    points = []
+    for start in range(0, len(kept_ids), _ID_CHUNK):
+        chunk = kept_ids[start:start + _ID_CHUNK]
+        points.extend(
+            point_to_dict(p)
+            for p in db.query(LocationPoint).filter(LocationPoint.id.in_(chunk)).all()
+        )
+    # Same order as the full timeline (untimed points first)
+    points.sort(key=lambda p: (p["timestamp"] is not None, p["timestamp"] or ""))
+
+    return {"points": points, "totalPoints": total}
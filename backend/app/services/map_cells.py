@@ -0,0 +1,158 @@
+"""
+Map Cells Service
+Server-side aggregation of map data into grid cells.
+
+Points are grouped in SQL on their indexed `grid_cell` column (0.01 degree
+world grid, see app/utils/geo.py). Zoomed out, 2^k x 2^k base cells are
+merged so a cell covers roughly 64 screen pixels; each cell carries its
+point count, centroid, distinct people and time range. A map of millions
+of points renders from a few hundred cells.
+
+Aggregates are cached per zoom level for the whole data set and sliced to
+the requested bounding box, so panning never hits the database.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.location import LocationPoint
+from app.models.login_history import LoginHistory
+from app.services.location_timeline import location_fingerprint
+from app.utils.cache import TTLCache
+from app.utils.geo import GRID_COLS, GRID_DEGREES
+
+# Target on-screen cell size (Web Mercator, 256px tiles)
+_CELL_PIXELS = 64
+
+_location_cells_cache = TTLCache(maxsize=64, ttl=600)
+# Login windows slide with the clock - keep entries short-lived
+_login_cells_cache = TTLCache(maxsize=32, ttl=60)
+
+
+def cell_factor(zoom: int) -> int:
+    """Base grid cells per aggregated cell side at a map zoom level (power of two)"""
+    base_cells = _CELL_PIXELS * 360 / (256 * 2 ** zoom) / GRID_DEGREES
+    if base_cells <= 1:
+        return 1
+    return 2 ** int(math.log2(base_cells))
+
+
+def aggregate_cells(
+    db: Session,
+    cell_col,
+    lat_col,
+    lon_col,
+    time_col,
+    identity_col,
+    filters: list,
+    factor: int
+) -> List[Dict[str, Any]]:
+    """
+    GROUP BY aggregated cell: count, centroid, distinct identities, time range.
+    Rows without a grid cell are skipped.
+    """
+    row = (cell_col // GRID_COLS // factor).label("row")
+    col = ((cell_col % GRID_COLS) // factor).label("col")
+    query = select(
+        row, col,
+        func.count().label("count"),
+        func.avg(lat_col).label("lat"),
+        func.avg(lon_col).label("lng"),
+        func.count(func.distinct(identity_col)).label("people"),
+        func.min(time_col).label("first"),
+        func.max(time_col).label("last")
+    ).where(cell_col.isnot(None), *filters).group_by(row, col)
+
+    size = factor * GRID_DEGREES
+    cells = []
+    for r in db.execute(query):
+        south = r.row * size - 90
+        west = r.col * size - 180
+        cells.append({
+            "lat": float(r.lat),
+            "lng": float(r.lng),
+            "count": r.count,
+            "people": r.people,
+            "firstSeen": r.first.isoformat() if r.first else None,
+            "lastSeen": r.last.isoformat() if r.last else None,
+            "bounds": [round(south, 6), round(west, 6), round(south + size, 6), round(west + size, 6)],
+        })
+    return cells
+
+
+def cells_in_bbox(
+    cells: List[Dict[str, Any]],
+    south: Optional[float] = None,
+    west: Optional[float] = None,
+    north: Optional[float] = None,
+    east: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Cells intersecting a bounding box (all cells if no box is given)"""
+    if None in (south, west, north, east):
+        return cells
+    return [
+        c for c in cells
+        if c["bounds"][0] <= north and c["bounds"][2] >= south
+        and c["bounds"][1] <= east and c["bounds"][3] >= west
+    ]
+
+
+def get_location_cells(
+    db: Session,
+    case_id: int,
+    zoom: int,
+    suspect_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Aggregated location cells of a case at a zoom level (cached)"""
+    factor = cell_factor(zoom)
+    key = (case_id, location_fingerprint(db, case_id), factor, suspect_id, start, end)
+
+    def build():
+        filters = [LocationPoint.case_id == case_id]
+        if suspect_id:
+            filters.append(LocationPoint.suspect_id == suspect_id)
+        if start:
+            filters.append(LocationPoint.timestamp >= start)
+        if end:
+            filters.append(LocationPoint.timestamp <= end)
+        cells = aggregate_cells(
+            db,
+            LocationPoint.grid_cell,
+            LocationPoint.latitude,
+            LocationPoint.longitude,
+            LocationPoint.timestamp,
+            func.coalesce(LocationPoint.suspect_id, LocationPoint.suspect_name),
+            filters,
+            factor
+        )
+        return {"cells": cells, "cellDegrees": factor * GRID_DEGREES}
+
+    return _location_cells_cache.get_or_set(key, build)
+
+
+def get_login_cells(db: Session, days: int, zoom: int) -> Dict[str, Any]:
+    """Aggregated successful-login cells of the last `days` days (cached briefly)"""
+    factor = cell_factor(zoom)
+    latest_id = db.query(func.max(LoginHistory.id)).scalar()
+    key = (days, factor, latest_id)
+
+    def build():
+        start_date = datetime.utcnow() - timedelta(days=days)
+        cells = aggregate_cells(
+            db,
+            LoginHistory.grid_cell,
+            LoginHistory.latitude,
+            LoginHistory.longitude,
+            LoginHistory.login_at,
+            LoginHistory.user_id,
+            [LoginHistory.login_at >= start_date, LoginHistory.login_success == True],
+            factor
+        )
+        return {"cells": cells, "cellDegrees": factor * GRID_DEGREES}
+
+    return _login_cells_cache.get_or_set(key, build)
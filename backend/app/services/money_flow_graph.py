@@ -0,0 +1,499 @@
+"""
+Money Flow Graph Analysis
+Follow-the-money queries over a case's MoneyFlowNode / MoneyFlowEdge graph.
+
+The graph is loaded once into compact adjacency lists and cached per
+graph version, so repeated queries never touch the database:
+- k_shortest_paths: Yen's algorithm (fewest hops), A*-guided by exact
+  hop distances to the targets
+- temporal_paths: all simple paths whose transfers happen in time order
+- max_flow: Dinic's algorithm on summed transfer amounts between node sets
+
+Node sets are supported everywhere (e.g. all victim accounts -> all
+suspect wallets).
+"""
+import heapq
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.case import Case
+from app.models.money_flow import MoneyFlowNode, MoneyFlowEdge
+from app.utils.cache import TTLCache
+
+_EPOCH = datetime(1970, 1, 1)
+_INF = float("inf")
+_SUPER = -1  # Virtual node linked to every source
+
+# Temporal path search stops after this many edge expansions
+_TEMPORAL_BUDGET = 500_000
+
+_graph_cache = TTLCache(maxsize=16, ttl=1800)
+
+
+class FlowGraph:
+    """
+    Directed multigraph in index form.
+    Nodes are 0..n-1 (node_ids[i] is the database id); parallel transfers
+    between the same pair are kept per edge and also collapsed per pair.
+    """
+
+    def __init__(self, node_ids: List[int], edges: List[Tuple[int, int, int, Optional[float], Optional[datetime]]]):
+        self.node_ids = node_ids
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        n = len(node_ids)
+
+        # Per edge: database id, endpoints, amount, time (epoch seconds, None if undated)
+        self.edge_ids: List[int] = []
+        self.edge_src: List[int] = []
+        self.edge_dst: List[int] = []
+        self.edge_amount: List[float] = []
+        self.edge_time: List[Optional[float]] = []
+
+        # Per pair: edge indexes; collapsed successor/predecessor lists
+        self.pair_edges: Dict[Tuple[int, int], List[int]] = {}
+        self.succ: List[List[int]] = [[] for _ in range(n)]
+        self.pred: List[List[int]] = [[] for _ in range(n)]
+        # Dated outgoing edges per node, sorted by time (temporal search)
+        self.out_times: List[List[float]] = [[] for _ in range(n)]
+        self.out_timed: List[List[int]] = [[] for _ in range(n)]
+
+        timed: List[List[Tuple[float, int]]] = [[] for _ in range(n)]
+        for edge_id, from_id, to_id, amount, when in edges:
+            u, v = self.index.get(from_id), self.index.get(to_id)
+            if u is None or v is None:
+                continue
+            e = len(self.edge_ids)
+            t = (when - _EPOCH).total_seconds() if when else None
+            self.edge_ids.append(edge_id)
+            self.edge_src.append(u)
+            self.edge_dst.append(v)
+            self.edge_amount.append(amount or 0.0)
+            self.edge_time.append(t)
+            pair = self.pair_edges.get((u, v))
+            if pair is None:
+                self.pair_edges[(u, v)] = [e]
+                self.succ[u].append(v)
+                self.pred[v].append(u)
+            else:
+                pair.append(e)
+            if t is not None:
+                timed[u].append((t, e))
+
+        for u, items in enumerate(timed):
+            items.sort()
+            self.out_times[u] = [t for t, _ in items]
+            self.out_timed[u] = [e for _, e in items]
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids)
+
+    def indexes(self, node_ids: Iterable[int]) -> Set[int]:
+        return {self.index[i] for i in node_ids if i in self.index}
+
+    def hops_to(self, targets: Set[int]) -> List[float]:
+        """Fewest hops from every node to the target set (reverse BFS)"""
+        dist = [_INF] * len(self.node_ids)
+        queue = deque()
+        for t in targets:
+            dist[t] = 0
+            queue.append(t)
+        while queue:
+            v = queue.popleft()
+            d = dist[v] + 1
+            for u in self.pred[v]:
+                if dist[u] == _INF:
+                    dist[u] = d
+                    queue.append(u)
+        return dist
+
+    def edge_dict(self, e: int) -> Dict[str, Any]:
+        t = self.edge_time[e]
+        return {
+            "id": self.edge_ids[e],
+            "from_node_id": self.node_ids[self.edge_src[e]],
+            "to_node_id": self.node_ids[self.edge_dst[e]],
+            "amount": self.edge_amount[e],
+            "transaction_date": (_EPOCH + timedelta(seconds=t)).isoformat() if t is not None else None,
+        }
+
+
+# ==================== LOADING / CACHE ====================
+
+def graph_version(db: Session, case_id: int) -> int:
+    """Case's graph version counter (see bump_graph_version)"""
+    return db.scalar(select(Case.graph_version).where(Case.id == case_id)) or 0
+
+
+def bump_graph_version(db: Session, case_id: int):
+    """
+    Mark the case's graph as changed. Call in the same transaction as every
+    node/edge write so cached graphs and ETags are never served stale.
+    """
+    db.execute(
+        update(Case)
+        .where(Case.id == case_id)
+        .values(graph_version=Case.graph_version + 1)
+    )
+
+
+def get_flow_graph(db: Session, case_id: int) -> FlowGraph:
+    """Adjacency structure of a case's graph, built once per graph version"""
+    key = (case_id, graph_version(db, case_id))
+    return _graph_cache.get_or_set(key, lambda: _load_graph(db, case_id))
+
+
+def _load_graph(db: Session, case_id: int) -> FlowGraph:
+    node_ids = list(db.scalars(
+        select(MoneyFlowNode.id).where(MoneyFlowNode.case_id == case_id).order_by(MoneyFlowNode.id)
+    ))
+    edges = db.execute(
+        select(
+            MoneyFlowEdge.id, MoneyFlowEdge.from_node_id, MoneyFlowEdge.to_node_id,
+            MoneyFlowEdge.amount, MoneyFlowEdge.transaction_date
+        ).where(MoneyFlowEdge.case_id == case_id).order_by(MoneyFlowEdge.id)
+    ).all()
+    return FlowGraph(node_ids, edges)
+
+
+# ==================== K SHORTEST PATHS ====================
+
+def k_shortest_paths(
+    graph: FlowGraph,
+    sources: Iterable[int],
+    targets: Iterable[int],
+    k: int = 3,
+    min_amount: float = 0
+) -> List[Dict[str, Any]]:
+    """
+    Up to k loopless paths with the fewest hops from any source to any
+    target (Yen's algorithm). Parallel transfers between two nodes count
+    as one hop; pairs whose total amount is below min_amount are ignored.
+    """
+    src = graph.indexes(sources)
+    dst = graph.indexes(targets)
+    if not src or not dst:
+        return []
+
+    blocked_pairs: Set[Tuple[int, int]] = set()
+    if min_amount > 0:
+        blocked_pairs = {
+            pair for pair, edges in graph.pair_edges.items()
+            if sum(graph.edge_amount[e] for e in edges) < min_amount
+        }
+    h = graph.hops_to(dst)
+
+    def spur_path(start: int, banned_nodes: Set[int], banned_pairs: Set[Tuple[int, int]]) -> Optional[List[int]]:
+        # A* on hop count: h is exact on the full graph and a lower bound with removals
+        if start == _SUPER:
+            frontier = [(h[s], 0, s, _SUPER) for s in src if s not in banned_nodes and (_SUPER, s) not in banned_pairs]
+        else:
+            frontier = [(h[start], 0, start, None)]
+        heapq.heapify(frontier)
+        parent: Dict[int, Optional[int]] = {_SUPER: None}
+        while frontier:
+            _, g, u, p = heapq.heappop(frontier)
+            if u in parent:
+                continue
+            parent[u] = p
+            if u in dst:
+                path = [u]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return path
+            for v in graph.succ[u]:
+                if v in parent or v in banned_nodes or h[v] == _INF:
+                    continue
+                if (u, v) in blocked_pairs or (u, v) in banned_pairs:
+                    continue
+                heapq.heappush(frontier, (g + 1 + h[v], g + 1, v, u))
+        return None
+
+    first = spur_path(_SUPER, set(), set())
+    if first is None:
+        return []
+    found = [first]  # Paths start with _SUPER
+    candidates: List[Tuple[int, List[int]]] = []
+    seen = {tuple(first)}
+
+    while len(found) < k:
+        previous = found[-1]
+        for i in range(len(previous) - 1):
+            spur = previous[i]
+            root = previous[:i + 1]
+            banned_pairs = {
+                (p[i], p[i + 1]) for p in found
+                if len(p) > i + 1 and p[:i + 1] == root
+            }
+            # Root nodes (other than the spur) may not be revisited
+            spur_tail = spur_path(spur, set(root[1:i]), banned_pairs)
+            if spur_tail is None:
+                continue
+            path = root[:-1] + spur_tail
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (len(path), path))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates)[1])
+
+    return [_path_result(graph, p[1:]) for p in found]
+
+
+def _path_result(graph: FlowGraph, path: List[int]) -> Dict[str, Any]:
+    hops = []
+    for u, v in zip(path, path[1:]):
+        edges = graph.pair_edges[(u, v)]
+        hops.append({
+            "from_node_id": graph.node_ids[u],
+            "to_node_id": graph.node_ids[v],
+            "edge_ids": [graph.edge_ids[e] for e in edges],
+            "amount": sum(graph.edge_amount[e] for e in edges),
+            "transfers": len(edges),
+        })
+    return {
+        "node_ids": [graph.node_ids[u] for u in path],
+        "hops": hops,
+        "length": len(hops),
+        # Most that can have passed along the whole path
+        "bottleneck_amount": min((hop["amount"] for hop in hops), default=0.0),
+    }
+
+
+# ==================== TIME-ORDERED PATHS ====================
+
+def temporal_paths(
+    graph: FlowGraph,
+    sources: Iterable[int],
+    targets: Iterable[int],
+    max_depth: int = 6,
+    max_paths: int = 100,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_gap_hours: Optional[float] = None,
+    min_amount: float = 0
+) -> Dict[str, Any]:
+    """
+    All simple paths (up to max_depth transfers) from a source to a target
+    whose transfers happen in non-decreasing time order, optionally with at
+    most max_gap_hours between consecutive transfers. Undated transfers are
+    skipped. Returns {"paths": [...], "truncated": bool}.
+    """
+    src = graph.indexes(sources)
+    dst = graph.indexes(targets)
+    if not src or not dst:
+        return {"paths": [], "truncated": False}
+
+    h = graph.hops_to(dst)
+    t_min = (start - _EPOCH).total_seconds() if start else -_INF
+    t_max = (end - _EPOCH).total_seconds() if end else _INF
+    max_gap = max_gap_hours * 3600 if max_gap_hours is not None else None
+
+    paths: List[List[int]] = []
+    budget = _TEMPORAL_BUDGET
+    truncated = False
+
+    for s in sorted(src, key=lambda i: graph.node_ids[i]):
+        if h[s] > max_depth:
+            continue
+        # Iterative DFS; frame = (node, time of arrival, next position in out_timed)
+        on_path = {s}
+        edge_path: List[int] = []
+        stack = [(s, t_min, bisect_left(graph.out_times[s], t_min))]
+        while stack:
+            u, t_arrive, pos = stack[-1]
+            times, out = graph.out_times[u], graph.out_timed[u]
+            depth = len(edge_path)
+            next_edge = None
+            while pos < len(out):
+                t = times[pos]
+                if t > t_max or (max_gap is not None and depth and t - t_arrive > max_gap):
+                    pos = len(out)
+                    break
+                e = out[pos]
+                pos += 1
+                budget -= 1
+                v = graph.edge_dst[e]
+                if v in on_path or depth + 1 + h[v] > max_depth or graph.edge_amount[e] < min_amount:
+                    continue
+                next_edge = e
+                break
+            stack[-1] = (u, t_arrive, pos)
+
+            if budget <= 0:
+                truncated = True
+                break
+            if next_edge is None:
+                stack.pop()
+                on_path.discard(u)
+                if edge_path:
+                    edge_path.pop()
+                continue
+
+            v = graph.edge_dst[next_edge]
+            t = graph.edge_time[next_edge]
+            edge_path.append(next_edge)
+            if v in dst:
+                paths.append(list(edge_path))
+                edge_path.pop()
+                if len(paths) >= max_paths:
+                    truncated = True
+                    break
+                continue
+            on_path.add(v)
+            stack.append((v, t, bisect_left(graph.out_times[v], t)))
+        if truncated:
+            break
+
+    results = []
+    for edge_path in paths:
+        edges = [graph.edge_dict(e) for e in edge_path]
+        results.append({
+            "node_ids": [edges[0]["from_node_id"]] + [e["to_node_id"] for e in edges],
+            "edges": edges,
+            "length": len(edges),
+            "bottleneck_amount": min(e["amount"] for e in edges),
+            "start": edges[0]["transaction_date"],
+            "end": edges[-1]["transaction_date"],
+        })
+    results.sort(key=lambda p: (p["length"], p["start"]))
+    return {"paths": results, "truncated": truncated}
+
+
+# ==================== MAX FLOW ====================
+
+def max_flow(
+    graph: FlowGraph,
+    sources: Iterable[int],
+    targets: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    top: int = 100
+) -> Dict[str, Any]:
+    """
+    Maximum amount that can have moved from the source set to the target
+    set, with each node pair's capacity = sum of its transfers (optionally
+    within a time window). Dinic's algorithm. Returns the flow value, the
+    pairs carrying flow (largest first) and the minimum cut.
+    """
+    src = graph.indexes(sources)
+    dst = graph.indexes(targets) - src
+    if not src or not dst:
+        return {"max_flow": 0.0, "flows": [], "min_cut": []}
+
+    t_min = (start - _EPOCH).total_seconds() if start else -_INF
+    t_max = (end - _EPOCH).total_seconds() if end else _INF
+
+    n = len(graph.node_ids)
+    S, T = n, n + 1
+    # Residual graph as parallel arrays; edge i and i ^ 1 are a forward/backward pair
+    head: List[List[int]] = [[] for _ in range(n + 2)]
+    to: List[int] = []
+    cap: List[float] = []
+
+    def add(u: int, v: int, c: float):
+        head[u].append(len(to)); to.append(v); cap.append(c)
+        head[v].append(len(to)); to.append(u); cap.append(0.0)
+
+    pair_arcs: Dict[Tuple[int, int], int] = {}
+    for (u, v), edges in graph.pair_edges.items():
+        c = sum(
+            graph.edge_amount[e] for e in edges
+            if graph.edge_amount[e] > 0 and (
+                (start is None and end is None)
+                or (graph.edge_time[e] is not None and t_min <= graph.edge_time[e] <= t_max)
+            )
+        )
+        if c > 0:
+            pair_arcs[(u, v)] = len(to)
+            add(u, v, c)
+    for s in src:
+        add(S, s, _INF)
+    for t in dst:
+        add(t, T, _INF)
+
+    eps = 1e-9
+    total = 0.0
+    while True:
+        level = [-1] * (n + 2)
+        level[S] = 0
+        queue = deque([S])
+        while queue:
+            u = queue.popleft()
+            for i in head[u]:
+                if cap[i] > eps and level[to[i]] < 0:
+                    level[to[i]] = level[u] + 1
+                    queue.append(to[i])
+        if level[T] < 0:
+            break
+        it = [0] * (n + 2)
+
+        # Iterative blocking-flow DFS
+        while True:
+            path: List[int] = []  # Arc indexes from S
+            u = S
+            while u != T:
+                arcs = head[u]
+                while it[u] < len(arcs):
+                    i = arcs[it[u]]
+                    if cap[i] > eps and level[to[i]] == level[u] + 1:
+                        break
+                    it[u] += 1
+                if it[u] == len(arcs):
+                    if u == S:
+                        break
+                    level[u] = -1  # Dead end
+                    i = path.pop()
+                    u = to[i ^ 1]
+                    it[u] += 1
+                    continue
+                i = arcs[it[u]]
+                path.append(i)
+                u = to[i]
+            if u != T:
+                break
+            pushed = min(cap[i] for i in path)
+            for i in path:
+                cap[i] -= pushed
+                cap[i ^ 1] += pushed
+            total += pushed
+
+    # Minimum cut: pairs from the residual-reachable side to the rest
+    reachable = [False] * (n + 2)
+    reachable[S] = True
+    queue = deque([S])
+    while queue:
+        u = queue.popleft()
+        for i in head[u]:
+            if cap[i] > eps and not reachable[to[i]]:
+                reachable[to[i]] = True
+                queue.append(to[i])
+
+    flows = []
+    cut = []
+    for (u, v), i in pair_arcs.items():
+        flow = cap[i ^ 1]
+        entry = {
+            "from_node_id": graph.node_ids[u],
+            "to_node_id": graph.node_ids[v],
+            "capacity": cap[i] + flow,
+        }
+        if flow > eps:
+            flows.append({**entry, "flow": flow})
+        if reachable[u] and not reachable[v]:
+            cut.append(entry)
+    flows.sort(key=lambda f: f["flow"], reverse=True)
+    cut.sort(key=lambda c: c["capacity"], reverse=True)
+
+    return {
+        "max_flow": total,
+        "flows": flows[:top],
+        "flow_pairs": len(flows),
+        "min_cut": cut[:top],
+    }
@@ -0,0 +1,161 @@
+"""
+Full-Text Search
+Indexed search for cases, support tickets and users.
+
+SQLite: FTS5 external-content tables (`<table>_fts`) with the trigram
+tokenizer - substring matching like the old ilike('%term%'), and Thai text
+needs no word breaking. Triggers keep them in sync, so ORM, Core and bulk
+writes all update the index. Created by init_db.
+
+Azure SQL: full-text indexes from migration 019 (CHANGE_TRACKING AUTO),
+queried with CONTAINSTABLE prefix terms.
+
+Every whitespace-separated term must appear in one of the indexed columns;
+matches are ranked by relevance (bm25 / full-text RANK). Without an index,
+and for terms shorter than a trigram, search falls back to ilike.
+"""
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import and_, literal_column, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query, Session
+
+logger = logging.getLogger(__name__)
+
+# Indexed table -> searched columns
+SEARCH_COLUMNS = {
+    "cases": ("case_number", "title", "description"),
+    "support_tickets": ("ticket_number", "subject", "description"),
+    "users": ("email", "first_name", "last_name"),
+}
+# SQLite bm25 column weights (identifiers and titles rank above free text)
+_BM25_WEIGHTS = {
+    "cases": (10.0, 5.0, 1.0),
+    "support_tickets": (10.0, 5.0, 1.0),
+    "users": (5.0, 2.0, 2.0),
+}
+_TRIGRAM = 3
+
+# Table -> full-text index exists (checked once per process)
+_indexed: Dict[str, bool] = {}
+
+
+def setup_search(engine: Engine):
+    """Create missing SQLite FTS5 tables and sync triggers (Azure SQL: migration 019)"""
+    if engine.dialect.name != "sqlite":
+        return
+    for table_name, columns in SEARCH_COLUMNS.items():
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": f"{table_name}_fts"}
+            ).first()
+        if exists:
+            continue
+        try:
+            with engine.begin() as conn:
+                for statement in _sqlite_ddl(table_name, columns):
+                    conn.execute(text(statement))
+        except DBAPIError as e:
+            # e.g. SQLite built without FTS5/trigram - searches use ilike
+            logger.warning(f"Full-text index for {table_name} not created: {e}")
+
+
+def _sqlite_ddl(table_name: str, columns: Sequence[str]) -> List[str]:
+    fts = f"{table_name}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    weights = ", ".join(str(w) for w in _BM25_WEIGHTS[table_name])
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table_name}', "
+        f"content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({weights})')",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",  # Index existing rows
+    ]
+
+
+def _has_index(db: Session, table_name: str) -> bool:
+    if table_name not in _indexed:
+        dialect = db.get_bind().dialect.name
+        row = None
+        if dialect == "sqlite":
+            row = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": f"{table_name}_fts"}
+            ).first()
+        elif dialect == "mssql":
+            row = db.execute(
+                text("SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(:name)"),
+                {"name": table_name}
+            ).first()
+        _indexed[table_name] = row is not None
+    return _indexed[table_name]
+
+
+def apply_search(query: Query, model, term: str) -> Tuple[Query, list]:
+    """
+    Restrict a query on `model` to rows matching a search string.
+    Returns (query, order_by): order_by puts the best matches first and is
+    empty for the ilike fallback - use as query.order_by(*order_by, <default>).
+    """
+    table_name = model.__tablename__
+    columns = SEARCH_COLUMNS[table_name]
+    terms = term.split()
+    if not terms:
+        return query, []
+    if not _has_index(query.session, table_name):
+        return query.filter(_ilike_all(model, columns, terms)), []
+
+    if query.session.get_bind().dialect.name == "sqlite":
+        indexed = [t for t in terms if len(t) >= _TRIGRAM]
+        short = [t for t in terms if len(t) < _TRIGRAM]
+        if not indexed:
+            return query.filter(_ilike_all(model, columns, terms)), []
+        fts = f"{table_name}_fts"
+        match = " ".join(_quote(t) for t in indexed)  # Implicit AND
+        hits = select(
+            literal_column("rowid").label("id"),
+            literal_column("rank").label("score")  # bm25: lower is better
+        ).select_from(text(fts)).where(
+            text(f"{fts} MATCH :search_query").bindparams(search_query=match)
+        ).subquery()
+        if short:
+            query = query.filter(_ilike_all(model, columns, short))
+        order_by = [hits.c.score.asc()]
+    else:
+        words = [t.replace('"', "") for t in terms]
+        if not all(words):
+            return query.filter(_ilike_all(model, columns, terms)), []
+        match = " AND ".join(f'"{w}*"' for w in words)  # Prefix terms
+        hits = select(
+            literal_column("[KEY]").label("id"),
+            literal_column("[RANK]").label("score")  # Higher is better
+        ).select_from(
+            text(f"CONTAINSTABLE({table_name}, ({', '.join(columns)}), :search_query)")
+            .bindparams(search_query=match)
+        ).subquery()
+        order_by = [hits.c.score.desc()]
+
+    return query.join(hits, hits.c.id == model.id), order_by
+
+
+def _quote(term: str) -> str:
+    """FTS5 string literal - operators and punctuation match literally"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _ilike_all(model, columns: Sequence[str], terms: Sequence[str]):
+    return and_(*(
+        or_(*(getattr(model, column).ilike(f"%{t}%") for column in columns))
+        for t in terms
+    ))
@@ -0,0 +1,55 @@
+"""
+Blocking Work
+Keeps CPU-heavy and blocking calls off the event loop of an API worker.
+
+- run_cpu_bound: bcrypt and similar CPU-heavy calls run on a small,
+  bounded thread pool (CPU_POOL_WORKERS). bcrypt releases the GIL, so the
+  loop keeps serving other requests while hashes are computed; during a
+  login storm excess calls queue on the pool instead of taking every core.
+  call_cpu_bound is the same for sync endpoints (the worker thread waits).
+- Sync (`def`) endpoints and dependencies run on anyio's worker threads;
+  configure_threadpool sizes that limiter (BLOCKING_THREADS).
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import anyio.to_thread
+
+from app.config import settings
+
+_cpu_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_cpu_pool() -> ThreadPoolExecutor:
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.CPU_POOL_WORKERS),
+            thread_name_prefix="cpu"
+        )
+    return _cpu_pool
+
+
+async def run_cpu_bound(func: Callable, *args, **kwargs) -> Any:
+    """Await a CPU-heavy call (that releases the GIL) on the bounded pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_cpu_pool(), functools.partial(func, *args, **kwargs))
+
+
+def call_cpu_bound(func: Callable, *args, **kwargs) -> Any:
+    """Blocking form of run_cpu_bound for sync (`def`) endpoints"""
+    return _get_cpu_pool().submit(func, *args, **kwargs).result()
+
+
+def configure_threadpool():
+    """Size the thread limiter for sync endpoints. Call on startup (inside the event loop)."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(1, settings.BLOCKING_THREADS)
+
+
+def shutdown_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
@@ -0,0 +1,57 @@
+"""
+Case Access
+Authorization for case-scoped endpoints without reloading the Case row.
+
+Access depends on two facts of a case: that it is active (not soft-deleted)
+and which organization owns it. Those are cached per case for a short TTL;
+the permission itself is then checked against the already-loaded user, so
+a case-scoped request costs at most one query for authorization and
+usually none. Case updates and deletes call invalidate_case_access; other
+worker processes see a soft delete within the TTL.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.case import Case
+from app.models.user import User, UserRole
+from app.utils.cache import TTLCache
+
+# case_id -> organization_id of an active case
+_case_owner_cache = TTLCache(maxsize=4096, ttl=30)
+_MISSING = object()
+
+
+def check_case_access(case_id: int, current_user: User, db: Session) -> Optional[int]:
+    """
+    Raise 404 for a missing or deleted case and 403 for a case of another
+    organization (super admins see all). Returns the case's organization id.
+    """
+    organization_id = _case_owner_cache.get(case_id, _MISSING)
+    if organization_id is _MISSING:
+        row = db.execute(
+            select(Case.organization_id).where(Case.id == case_id, Case.is_active == True)
+        ).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Case not found"
+            )
+        organization_id = row[0]
+        _case_owner_cache.set(case_id, organization_id)
+
+    if current_user.role != UserRole.SUPER_ADMIN:
+        if organization_id != current_user.organization_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+
+    return organization_id
+
+
+def invalidate_case_access(case_id: int):
+    """Forget a case's cached access facts - call after updating or deleting it"""
+    _case_owner_cache.delete(case_id)
@@ -0,0 +1,59 @@
+"""
+Geo Utilities
+Distance math and grid cells for location analysis
+"""
+import math
+from typing import List, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180  # Same sphere as haversine_m
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters"""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+# ==================== GRID CELLS ====================
+# Fixed world grid used to index location_points (~1.1 km cells).
+# cell = row * GRID_COLS + col, so a row's cells form one contiguous range.
+
+GRID_DEGREES = 0.01
+GRID_COLS = int(round(360 / GRID_DEGREES))
+GRID_ROWS = int(round(180 / GRID_DEGREES))
+
+
+def _grid_row(lat: float) -> int:
+    return min(GRID_ROWS - 1, max(0, math.floor((lat + 90) / GRID_DEGREES)))
+
+
+def _grid_col(lon: float) -> int:
+    return min(GRID_COLS - 1, max(0, math.floor((lon + 180) / GRID_DEGREES)))
+
+
+def grid_cell(lat: float, lon: float) -> int:
+    """Grid cell id of a coordinate"""
+    return _grid_row(lat) * GRID_COLS + _grid_col(lon)
+
+
+def grid_cell_ranges(
+    south: float, west: float, north: float, east: float, max_ranges: int = 64
+) -> List[Tuple[int, int]]:
+    """
+    Inclusive cell-id ranges covering a bounding box: one range per grid row.
+    Large boxes collapse into a single range (still an index range scan;
+    callers filter the exact lat/lon bounds anyway).
+    """
+    row_min, row_max = _grid_row(south), _grid_row(north)
+    col_min, col_max = _grid_col(west), _grid_col(east)
+    if row_max - row_min + 1 > max_ranges:
+        return [(row_min * GRID_COLS + col_min, row_max * GRID_COLS + col_max)]
+    return [
+        (row * GRID_COLS + col_min, row * GRID_COLS + col_max)
+        for row in range(row_min, row_max + 1)
+    ]
@@ -0,0 +1,227 @@
+"""
+GeoIP
+Local IP -> location lookup for login tracking.
+
+Source: a city-level range CSV set in GEOIP_DB_PATH (optionally .gz), in
+either of the free formats
+    DB-IP Lite:       ip_start,ip_end,continent,country_code,region,city,lat,lon
+    IP2Location LITE: ip_from,ip_to,country_code,country_name,region,city,lat,lon
+                      (addresses as integers)
+
+On first use the CSV is compiled into a compact binary range table next
+to it (`<csv>.bin`, rebuilt when the CSV is newer). The table is memory
+mapped read-only, so every worker process on the host shares one copy in
+the page cache, and looked up by binary search; a small LRU sits in front.
+
+Table layout (little endian):
+    header      magic, IPv4 range count, IPv6 range count, location count
+    IPv4 ranges start u32, end u32, location u32           (sorted by start)
+    IPv6 ranges start 16B big endian, end 16B, location u32 (sorted by start)
+    locations   lat f32, lon f32, 4 x string offset u32 (country, country_code, region, city)
+    strings     NUL-terminated UTF-8
+"""
+import csv
+import gzip
+import ipaddress
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"IGGEOIP1"
+_HEADER = struct.Struct("<8sIII")
+_V4 = struct.Struct("<III")
+_V6 = struct.Struct("<16s16sI")
+_LOCATION = struct.Struct("<ffIIII")
+_NO_STRING = 0xFFFFFFFF
+
+_FIELDS = ("country", "country_code", "region", "city")
+
+
+def _parse_address(value: str) -> Tuple[int, int]:
+    """(ip version, integer address) of a dotted/colon or integer address"""
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        if number < 1 << 32:
+            return 4, number
+        if number >> 32 == 0xFFFF:  # IPv4-mapped (IP2Location IPv6 files)
+            return 4, number & 0xFFFFFFFF
+        return 6, number
+    address = ipaddress.ip_address(value)
+    if address.version == 6 and address.ipv4_mapped:
+        return 4, int(address.ipv4_mapped)
+    return address.version, int(address)
+
+
+def _read_csv(path: str) -> Iterator[Tuple[int, int, int, tuple]]:
+    """(version, start, end, (lat, lon, country, country_code, region, city)) per row"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        for line in csv.reader(f):
+            if len(line) < 8:
+                continue
+            try:
+                version, start = _parse_address(line[0])
+                _, end = _parse_address(line[1])
+                lat, lon = float(line[6]), float(line[7])
+            except ValueError:
+                continue  # Header or malformed
+            if line[0].strip().isdigit():  # IP2Location
+                country_code, country, region, city = line[2], line[3], line[4], line[5]
+            else:  # DB-IP
+                country_code, country, region, city = line[3], None, line[4], line[5]
+            if country_code in ("-", "ZZ", ""):
+                continue  # Reserved / unknown ranges
+            yield version, start, end, (lat, lon, country, country_code, region or None, city or None)
+
+
+def build_table(csv_path: str, table_path: str) -> int:
+    """Compile a range CSV into the binary table (written atomically). Returns range count."""
+    locations: Dict[tuple, int] = {}
+    strings: Dict[str, int] = {}
+    blob = bytearray()
+
+    def string_offset(value: Optional[str]) -> int:
+        if not value:
+            return _NO_STRING
+        if value not in strings:
+            strings[value] = len(blob)
+            blob.extend(value.encode("utf-8") + b"\0")
+        return strings[value]
+
+    counts = {4: 0, 6: 0}
+    last = {4: -1, 6: -1}
+    directory = os.path.dirname(os.path.abspath(table_path))
+    with tempfile.TemporaryFile(dir=directory) as v4, tempfile.TemporaryFile(dir=directory) as v6:
+        for version, start, end, location in _read_csv(csv_path):
+            if start < last[version]:
+                raise ValueError(f"{csv_path} is not sorted by start address")
+            last[version] = start
+            if location not in locations:
+                locations[location] = len(locations)
+            index = locations[location]
+            if version == 4:
+                v4.write(_V4.pack(start, end, index))
+            else:
+                v6.write(_V6.pack(start.to_bytes(16, "big"), end.to_bytes(16, "big"), index))
+            counts[version] += 1
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(_HEADER.pack(_MAGIC, counts[4], counts[6], len(locations)))
+                for section in (v4, v6):
+                    section.seek(0)
+                    while chunk := section.read(1024 * 1024):
+                        out.write(chunk)
+                for lat, lon, *names in locations:
+                    out.write(_LOCATION.pack(lat, lon, *(string_offset(n) for n in names)))
+                out.write(blob)
+            os.replace(temp_path, table_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return counts[4] + counts[6]
+
+
+class GeoIPTable:
+    """Memory-mapped range table"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._v4_count, self._v6_count, location_count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a GeoIP table")
+        self._v4_offset = _HEADER.size
+        self._v6_offset = self._v4_offset + self._v4_count * _V4.size
+        self._locations_offset = self._v6_offset + self._v6_count * _V6.size
+        self._strings_offset = self._locations_offset + location_count * _LOCATION.size
+
+    def __len__(self):
+        return self._v4_count + self._v6_count
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Location of an address, None if unknown or not an address"""
+        try:
+            version, number = _parse_address(ip)
+        except ValueError:
+            return None
+        if version == 4:
+            index = self._search(number, self._v4_offset, self._v4_count, _V4)
+        else:
+            index = self._search(number.to_bytes(16, "big"), self._v6_offset, self._v6_count, _V6)
+        return self._location(index) if index is not None else None
+
+    def _search(self, key, offset: int, count: int, record: struct.Struct) -> Optional[int]:
+        """Location index of the range containing key (rightmost start <= key)"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if record.unpack_from(self._map, offset + mid * record.size)[0] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        _, end, location = record.unpack_from(self._map, offset + (lo - 1) * record.size)
+        return location if key <= end else None
+
+    def _location(self, index: int) -> Dict[str, Any]:
+        lat, lon, *offsets = _LOCATION.unpack_from(self._map, self._locations_offset + index * _LOCATION.size)
+        result: Dict[str, Any] = {"latitude": round(lat, 4), "longitude": round(lon, 4)}
+        for field, offset in zip(_FIELDS, offsets):
+            result[field] = self._string(offset)
+        return result
+
+    def _string(self, offset: int) -> Optional[str]:
+        if offset == _NO_STRING:
+            return None
+        start = self._strings_offset + offset
+        return self._map[start:self._map.find(b"\0", start)].decode("utf-8")
+
+
+_table: Optional[GeoIPTable] = None
+_table_loaded = False
+_table_lock = threading.Lock()
+
+
+def get_geoip_table() -> Optional[GeoIPTable]:
+    """Configured table, compiled/mapped on first use (None if not configured)"""
+    global _table, _table_loaded
+    if _table_loaded:
+        return _table
+    with _table_lock:
+        if not _table_loaded:
+            path = settings.GEOIP_DB_PATH
+            if path:
+                try:
+                    table_path = path if path.endswith(".bin") else f"{path}.bin"
+                    if table_path != path and (
+                        not os.path.exists(table_path)
+                        or os.path.getmtime(table_path) < os.path.getmtime(path)
+                    ):
+                        count = build_table(path, table_path)
+                        logger.info(f"Compiled {count} GeoIP ranges from {path}")
+                    _table = GeoIPTable(table_path)
+                    logger.info(f"Mapped {len(_table)} GeoIP ranges from {table_path}")
+                except (OSError, ValueError) as e:
+                    logger.error(f"GeoIP database not loaded: {e}")
+            _table_loaded = True
+    return _table
+
+
+@lru_cache(maxsize=4096)
+def lookup_ip(ip: str) -> Optional[Dict[str, Any]]:
+    """Cached table lookup (None if unknown or no database is configured)"""
+    table = get_geoip_table()
+    return table.lookup(ip) if table else None
@@ -1,11 +1,28 @@
 """
 Login Tracking Utilities
-Parse user agent and get IP geolocation
+Parse user agent, get IP geolocation and record login attempts
+
+Login attempts are recorded off the request path: log_login_attempt
+captures the request details and queues them; a writer thread resolves
+locations and inserts LoginHistory rows in batches. When the writer is
+not started (scripts), attempts are written inline.
 """
-import re
-import httpx
+import logging
+import queue
+import threading
+from datetime import datetime
 from typing import Optional, Dict, Any
 
+from app.config import settings
+from app.database import SessionLocal
+from app.models.login_history import LoginHistory
+from app.utils.geoip import lookup_ip
+
+logger = logging.getLogger(__name__)
+
+# Rows per commit of the writer thread
+_WRITE_BATCH = 200
+
 
 def parse_user_agent(user_agent: str) -> Dict[str, str]:
     """
@@ -68,10 +85,21 @@ def parse_user_agent(user_agent: str) -> Dict[str, str]:
     }
 
 
-async def get_ip_geolocation(ip_address: str) -> Dict[str, Any]:
+_NO_LOCATION = {
+    "country": None,
+    "country_code": None,
+    "region": None,
+    "city": None,
+    "latitude": None,
+    "longitude": None,
+    "isp": None
+}
+
+
+def get_ip_geolocation(ip_address: str) -> Dict[str, Any]:
     """
-    Get geolocation info from IP address using ip-api.com (free service)
-    Rate limit: 45 requests per minute
+    Get geolocation info from IP address using the local GeoIP table
+    (see utils.geoip - no network call, no rate limit)
     """
     # Skip private/local IPs
     if not ip_address or ip_address in ["127.0.0.1", "localhost", "::1"]:
@@ -100,41 +128,8 @@ async def get_ip_geolocation(ip_address: str) -> Dict[str, Any]:
             "isp": "Private Network"
         }
     
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            # ip-api.com - free, no API key needed
-            response = await client.get(
-                f"http://ip-api.com/json/{ip_address}",
-                params={
-                    "fields": "status,message,country,countryCode,region,regionName,city,lat,lon,isp"
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get("status") == "success":
-                    return {
-                        "country": data.get("country"),
-                        "country_code": data.get("countryCode"),
-                        "region": data.get("regionName"),
-                        "city": data.get("city"),
-                        "latitude": data.get("lat"),
-                        "longitude": data.get("lon"),
-                        "isp": data.get("isp")
-                    }
-    except Exception as e:
-        print(f"Error getting IP geolocation: {e}")
-    
-    return {
-        "country": None,
-        "country_code": None,
-        "region": None,
-        "city": None,
-        "latitude": None,
-        "longitude": None,
-        "isp": None
-    }
+    location = lookup_ip(ip_address)
+    return {**_NO_LOCATION, **location} if location else dict(_NO_LOCATION)
 
 
 def get_client_ip(request) -> str:
@@ -163,7 +158,105 @@ def get_client_ip(request) -> str:
         return "unknown"
     
     # Strip port if present (e.g., "192.168.1.1:8080" -> "192.168.1.1")
-    if ":" in ip and not ip.startswith("["):  # Don't break IPv6
+    if ip.count(":") == 1:  # Bare IPv6 has several colons
         ip = ip.split(":")[0]
+    elif ip.startswith("["):  # "[2001:db8::1]:8080"
+        ip = ip[1:].split("]")[0]
     
     return ip
+
+
+# ==================== LOGIN HISTORY WRITER ====================
+
+_queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=settings.LOGIN_LOG_QUEUE_SIZE)
+_writer: Optional[threading.Thread] = None
+
+
+def log_login_attempt(
+    user_id: int,
+    request,
+    success: bool = True,
+    failure_reason: str = None
+):
+    """Queue a login attempt for the history (never blocks or fails the login)"""
+    user_agent = request.headers.get("User-Agent", "")
+    attempt = {
+        "user_id": user_id,
+        "login_at": datetime.utcnow(),
+        "ip_address": get_client_ip(request),
+        "user_agent": user_agent[:500] if user_agent else None,
+        "login_success": success,
+        "failure_reason": failure_reason
+    }
+    if _writer is None:
+        _write_attempts([attempt])
+        return
+    try:
+        _queue.put_nowait(attempt)
+    except queue.Full:
+        logger.warning(f"Login history queue full - attempt of user {user_id} not recorded")
+
+
+def _history_row(attempt: Dict[str, Any]) -> LoginHistory:
+    ua_info = parse_user_agent(attempt["user_agent"])
+    geo_info = get_ip_geolocation(attempt["ip_address"])
+    return LoginHistory(
+        **attempt,
+        device_type=ua_info["device_type"],
+        browser=ua_info["browser"],
+        os=ua_info["os"],
+        country=geo_info.get("country"),
+        country_code=geo_info.get("country_code"),
+        region=geo_info.get("region"),
+        city=geo_info.get("city"),
+        latitude=geo_info.get("latitude"),
+        longitude=geo_info.get("longitude"),
+        isp=geo_info.get("isp")
+    )
+
+
+def _write_attempts(attempts):
+    try:
+        with SessionLocal() as db:
+            db.add_all([_history_row(a) for a in attempts])
+            db.commit()
+    except Exception as e:
+        logger.error(f"Error logging {len(attempts)} login attempts: {e}")
+
+
+def _run_writer():
+    while True:
+        attempt = _queue.get()
+        batch = []
+        stop = False
+        while attempt is not None:
+            batch.append(attempt)
+            if len(batch) >= _WRITE_BATCH:
+                break
+            try:
+                attempt = _queue.get_nowait()
+            except queue.Empty:
+                break
+        else:
+            stop = True
+        if batch:
+            _write_attempts(batch)
+        if stop:
+            return
+
+
+def start_login_logger():
+    """Start the history writer thread. Call on startup."""
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(target=_run_writer, name="login-history", daemon=True)
+        _writer.start()
+
+
+def shutdown_login_logger(timeout: float = 5.0):
+    """Write queued attempts and stop the writer"""
+    global _writer
+    if _writer is not None:
+        _queue.put(None)
+        _writer.join(timeout)
+        _writer = None
@@ -0,0 +1,36 @@
+"""
+Phone Number Utilities
+Normalize phone numbers so the same line matches across imports
+"""
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D")
+
+# Thailand country code - numbers are stored in national format (0XXXXXXXXX)
+_COUNTRY_CODE = "66"
+
+
+def normalize_phone(number: Optional[str]) -> Optional[str]:
+    """
+    Normalize a phone number to digits in national format.
+
+    "+66 81-234-5678", "0066812345678", "66812345678" and "081 234 5678"
+    all become "0812345678". Other international numbers keep their
+    country code. Returns None when there are no digits (e.g. "Unknown").
+    """
+    if not number:
+        return None
+    digits = _NON_DIGITS.sub("", number)
+    if not digits:
+        return None
+
+    if digits.startswith("00"):
+        digits = digits[2:]
+        international = True
+    else:
+        international = number.lstrip().startswith("+")
+
+    if digits.startswith(_COUNTRY_CODE) and (international or len(digits) in (10, 11)):
+        return "0" + digits[len(_COUNTRY_CODE):]
+    return digits[:32]
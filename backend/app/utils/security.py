@@ -1,6 +1,16 @@
 """
 Security Utilities
 Password hashing and JWT token handling
+
+get_current_user keeps a short-TTL, per-process snapshot of each
+authenticated user, so most requests skip the user lookup. Tokens carry
+the user's token_version ("tv" claim): a token whose version differs from
+the cached one forces a reload, and one that differs from the database is
+rejected. Code that changes a user calls invalidate_principal after
+commit; revoke_tokens additionally retires the user's issued tokens.
+
+Tokens issued at login also carry their session ("sid" claim), checked
+against the in-memory denylist of utils.sessions.
 """
 import logging
 import bcrypt
@@ -9,11 +19,14 @@ from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
+from app.utils.blocking import run_cpu_bound
+from app.utils.cache import TTLCache
+from app.utils.sessions import is_session_revoked, touch_session
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +35,9 @@ logger = logging.getLogger(__name__)
 # Bearer token security
 security = HTTPBearer()
 
+# user id -> detached User snapshot (merged into the request session on use)
+_principal_cache = TTLCache(maxsize=4096, ttl=settings.PRINCIPAL_CACHE_TTL)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password using bcrypt"""
@@ -39,6 +55,16 @@ def get_password_hash(password: str) -> str:
     ).decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password off the event loop (for async handlers)"""
+    return await run_cpu_bound(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash off the event loop (for async handlers)"""
+    return await run_cpu_bound(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -99,11 +125,33 @@ async def get_current_user(
         logger.error("User ID is None")
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    # Ended session (logout / forced sign-out) - in-memory check, no query
+    session_id = payload.get("sid")
+    if session_id is not None:
+        if is_session_revoked(session_id):
+            logger.error(f"Ended session for user {user_id}")
+            raise credentials_exception
+        touch_session(session_id)
     
-    if user is None:
-        logger.error(f"User {user_id} not found")
-        raise credentials_exception
+    user_id = int(user_id)
+    token_version = payload.get("tv", 0)
+    cached = _principal_cache.get(user_id)
+    if cached is not None and cached.token_version == token_version:
+        # No SELECT: attach a copy of the snapshot to this session
+        user = db.merge(cached, load=False)
+    else:
+        user = db.query(User).filter(User.id == user_id).first()
+        
+        if user is None:
+            logger.error(f"User {user_id} not found")
+            raise credentials_exception
+        
+        if user.token_version != token_version:
+            logger.error(f"Revoked token for user {user_id}")
+            raise credentials_exception
+        
+        if settings.PRINCIPAL_CACHE_TTL > 0:
+            _principal_cache.set(user_id, _snapshot(user))
     
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is disabled")
@@ -112,6 +160,23 @@ async def get_current_user(
     return user
 
 
+def _snapshot(user: User) -> User:
+    """Detached copy of a user's columns, shareable between sessions"""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def invalidate_principal(user_id: int):
+    """Drop a user's cached snapshot - call after committing changes to the user"""
+    _principal_cache.delete(user_id)
+
+
+def revoke_tokens(user: User):
+    """Invalidate every token issued to the user (takes effect on commit)"""
+    user.token_version = (user.token_version or 0) + 1
+
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
@@ -0,0 +1,163 @@
+"""
+Sessions
+Server-side sessions for issued tokens (user_sessions), checked on every
+request without a query.
+
+Each login opens a UserSession whose session_token is carried in the
+access and refresh tokens as the "sid" claim. Every worker keeps an
+in-memory denylist of sessions ended within the access token lifetime
+(older access tokens have expired anyway); get_current_user only checks
+that set and marks the session as seen. A background thread, every
+SESSION_SYNC_SECONDS:
+- pulls sessions ended by any worker into the denylist
+- writes the buffered last_active_at times in one batch (write-behind)
+
+Logout and forced sign-out take effect at once on the worker that handled
+them and within SESSION_SYNC_SECONDS everywhere else. Refresh checks the
+session row itself.
+"""
+import logging
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.session import UserSession
+
+logger = logging.getLogger(__name__)
+
+# session_token -> expired_at of ended sessions
+_revoked: Dict[str, datetime] = {}
+# session_token -> last request time, waiting to be written
+_touched: Dict[str, datetime] = {}
+_lock = threading.Lock()
+_last_sync: Optional[datetime] = None
+_stop = threading.Event()
+_syncer: Optional[threading.Thread] = None
+
+
+def open_session(db: Session, user_id: int, ip_address: Optional[str], user_agent: Optional[str]) -> str:
+    """Create a session for a login and return its id (the "sid" claim). Commit is up to the caller."""
+    session_id = secrets.token_urlsafe(32)
+    db.add(UserSession(
+        user_id=user_id,
+        session_token=session_id,
+        ip_address=ip_address,
+        user_agent=user_agent[:500] if user_agent else None,
+        is_active=True
+    ))
+    return session_id
+
+
+def is_session_revoked(session_id: str) -> bool:
+    return session_id in _revoked
+
+
+def touch_session(session_id: str):
+    """Record activity; written to last_active_at by the next sync"""
+    seen = datetime.utcnow()
+    with _lock:
+        _touched[session_id] = seen
+
+
+def end_sessions(db: Session, user_id: Optional[int] = None, session_id: Optional[str] = None) -> int:
+    """
+    End one session or all active sessions of a user (commits).
+    Returns the number of sessions ended.
+    """
+    query = select(UserSession.session_token).where(UserSession.is_active == True)
+    if session_id is not None:
+        query = query.where(UserSession.session_token == session_id)
+    if user_id is not None:
+        query = query.where(UserSession.user_id == user_id)
+    session_ids: List[str] = list(db.scalars(query))
+    if not session_ids:
+        return 0
+
+    now = datetime.utcnow()
+    db.execute(
+        update(UserSession)
+        .where(UserSession.session_token.in_(session_ids))
+        .values(is_active=False, expired_at=now),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    with _lock:
+        for sid in session_ids:
+            _revoked[sid] = now
+    return len(session_ids)
+
+
+# ==================== SYNC ====================
+
+def sync_sessions():
+    """Pull sessions ended elsewhere and write buffered activity"""
+    global _last_sync, _touched
+    now = datetime.utcnow()
+    horizon = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Overlap the previous window: rows may commit after their expired_at was set
+    since = horizon if _last_sync is None else max(
+        horizon, _last_sync - timedelta(seconds=2 * settings.SESSION_SYNC_SECONDS)
+    )
+
+    with _lock:
+        touched, _touched = _touched, {}
+
+    with SessionLocal() as db:
+        if touched:
+            sessions = UserSession.__table__
+            db.execute(
+                update(sessions)
+                .where(sessions.c.session_token == bindparam("sid"), sessions.c.is_active == True)
+                .values(last_active_at=bindparam("seen")),
+                [{"sid": sid, "seen": seen} for sid, seen in touched.items()]
+            )
+        rows = db.execute(
+            select(UserSession.session_token, UserSession.expired_at)
+            .where(UserSession.is_active == False, UserSession.expired_at >= since)
+        ).all()
+        db.commit()
+
+    with _lock:
+        for sid, expired_at in rows:
+            _revoked[sid] = expired_at
+        for sid in [sid for sid, expired_at in _revoked.items() if expired_at < horizon]:
+            del _revoked[sid]
+    _last_sync = now
+
+
+def _run_syncer():
+    while True:
+        try:
+            sync_sessions()
+        except Exception as e:
+            logger.error(f"Session sync failed: {e}")
+        if _stop.wait(settings.SESSION_SYNC_SECONDS):
+            return
+
+
+def start_session_sync():
+    """Load recent revocations and start the sync thread. Call on startup."""
+    global _syncer
+    if _syncer is None:
+        _stop.clear()
+        _syncer = threading.Thread(target=_run_syncer, name="session-sync", daemon=True)
+        _syncer.start()
+
+
+def shutdown_session_sync(timeout: float = 5.0):
+    """Stop the sync thread and write buffered activity"""
+    global _syncer
+    if _syncer is not None:
+        _stop.set()
+        _syncer.join(timeout)
+        _syncer = None
+        try:
+            sync_sessions()
+        except Exception as e:
+            logger.error(f"Session sync failed: {e}")
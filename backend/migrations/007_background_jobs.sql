@@ -0,0 +1,45 @@
+-- Migration 007: Create background_jobs table
+-- Persisted status/progress for the in-process job runner
+
+IF OBJECT_ID(N'background_jobs', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[background_jobs] (
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [job_type] NVARCHAR(100) NOT NULL,
+        
+        -- Scope (no FK: jobs may outlive the case, e.g. permanent delete)
+        [case_id] INT NULL,
+        [created_by] INT NULL,
+        
+        -- Status
+        [status] NVARCHAR(20) NOT NULL DEFAULT 'PENDING',
+        [progress] INT NULL DEFAULT 0,
+        [message] NVARCHAR(500) NULL,
+        [cancel_requested] BIT NULL DEFAULT 0,
+        
+        -- Payload (JSON)
+        [params] NVARCHAR(MAX) NULL,
+        [result] NVARCHAR(MAX) NULL,
+        [error] NVARCHAR(MAX) NULL,
+        
+        -- Timestamps
+        [created_at] DATETIME NULL DEFAULT GETUTCDATE(),
+        [started_at] DATETIME NULL,
+        [finished_at] DATETIME NULL,
+        [updated_at] DATETIME NULL DEFAULT GETUTCDATE(),
+        
+        CONSTRAINT [FK_background_jobs_user] FOREIGN KEY ([created_by])
+            REFERENCES [dbo].[users]([id])
+    );
+
+    CREATE INDEX [IX_background_jobs_job_type] ON [dbo].[background_jobs]([job_type]);
+    CREATE INDEX [IX_background_jobs_case_id] ON [dbo].[background_jobs]([case_id]);
+    CREATE INDEX [IX_background_jobs_status] ON [dbo].[background_jobs]([status]);
+
+    PRINT 'Created background_jobs table with indexes';
+END
+ELSE
+BEGIN
+    PRINT 'background_jobs table already exists';
+END
+GO
@@ -0,0 +1,49 @@
+-- Migration 008: Normalized phone numbers on call_records
+-- Indexed number -> case lookup for cross-case common contacts.
+-- Existing rows are normalized by the call_number_backfill job
+-- (POST /api/v1/call-analysis/contacts/backfill) once this has run.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'call_records') AND name = 'partner_number_norm'
+)
+BEGIN
+    ALTER TABLE [dbo].[call_records] ADD [partner_number_norm] NVARCHAR(32) NULL;
+    PRINT 'Added partner_number_norm column';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'call_records') AND name = 'device_number_norm'
+)
+BEGIN
+    ALTER TABLE [dbo].[call_records] ADD [device_number_norm] NVARCHAR(32) NULL;
+    PRINT 'Added device_number_norm column';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'call_records') AND name = 'ix_call_records_partner_norm_case'
+)
+BEGIN
+    CREATE INDEX [ix_call_records_partner_norm_case]
+        ON [dbo].[call_records] ([partner_number_norm], [case_id])
+        INCLUDE ([device_number_norm], [duration_seconds], [start_time]);
+    PRINT 'Created ix_call_records_partner_norm_case';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'call_records') AND name = 'ix_call_records_device_norm_case'
+)
+BEGIN
+    CREATE INDEX [ix_call_records_device_norm_case]
+        ON [dbo].[call_records] ([device_number_norm], [case_id]);
+    PRINT 'Created ix_call_records_device_norm_case';
+END
+GO
+
+PRINT 'Migration 008 completed successfully';
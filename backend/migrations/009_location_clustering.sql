@@ -0,0 +1,26 @@
+-- Migration 009: Generated location clusters
+-- Marks clusters created by stay-point clustering and indexes
+-- per-person location tracks.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'location_clusters') AND name = 'is_generated'
+)
+BEGIN
+    ALTER TABLE [dbo].[location_clusters] ADD [is_generated] BIT NULL DEFAULT 0;
+    PRINT 'Added is_generated column';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'location_points') AND name = 'ix_location_points_case_suspect_time'
+)
+BEGIN
+    CREATE INDEX [ix_location_points_case_suspect_time]
+        ON [dbo].[location_points] ([case_id], [suspect_id], [timestamp]);
+    PRINT 'Created ix_location_points_case_suspect_time';
+END
+GO
+
+PRINT 'Migration 009 completed successfully';
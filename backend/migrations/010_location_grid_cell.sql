@@ -0,0 +1,48 @@
+-- Migration 010: Spatial grid cell on location_points
+-- grid_cell = row * 36000 + col on a 0.01 degree world grid (see app/utils/geo.py).
+-- Existing rows are filled below, in batches (same formula as grid_cell()).
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'location_points') AND name = 'grid_cell'
+)
+BEGIN
+    ALTER TABLE [dbo].[location_points] ADD [grid_cell] INT NULL;
+    PRINT 'Added grid_cell column';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'location_points') AND name = 'ix_location_points_case_cell_time'
+)
+BEGIN
+    CREATE INDEX [ix_location_points_case_cell_time]
+        ON [dbo].[location_points] ([case_id], [grid_cell], [timestamp]);
+    PRINT 'Created ix_location_points_case_cell_time';
+END
+GO
+
+-- Backfill: row = FLOOR((lat + 90) / 0.01), col = FLOOR((lon + 180) / 0.01), clamped to the grid
+DECLARE @filled INT = 1;
+WHILE @filled > 0
+BEGIN
+    UPDATE TOP (50000) [dbo].[location_points]
+    SET [grid_cell] =
+        (CASE
+            WHEN FLOOR(([latitude] + 90) / 0.01) < 0 THEN 0
+            WHEN FLOOR(([latitude] + 90) / 0.01) > 17999 THEN 17999
+            ELSE CAST(FLOOR(([latitude] + 90) / 0.01) AS INT)
+        END) * 36000
+        + (CASE
+            WHEN FLOOR(([longitude] + 180) / 0.01) < 0 THEN 0
+            WHEN FLOOR(([longitude] + 180) / 0.01) > 35999 THEN 35999
+            ELSE CAST(FLOOR(([longitude] + 180) / 0.01) AS INT)
+        END)
+    WHERE [grid_cell] IS NULL;
+    SET @filled = @@ROWCOUNT;
+END
+PRINT 'Filled grid_cell of existing points';
+GO
+
+PRINT 'Migration 010 completed successfully';
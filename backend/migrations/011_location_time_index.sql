@@ -0,0 +1,15 @@
+-- Migration 011: Time window index on location_points
+-- Serves full-detail timeline windows next to the downsampled timeline.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'location_points') AND name = 'ix_location_points_case_time'
+)
+BEGIN
+    CREATE INDEX [ix_location_points_case_time]
+        ON [dbo].[location_points] ([case_id], [timestamp]);
+    PRINT 'Created ix_location_points_case_time';
+END
+GO
+
+PRINT 'Migration 011 completed successfully';
@@ -0,0 +1,48 @@
+-- Migration 012: Grid cell on login_history for aggregated login maps
+-- Same 0.01 degree world grid as location_points.grid_cell (see app/utils/geo.py).
+-- Existing rows with coordinates are filled below, in batches.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'login_history') AND name = 'grid_cell'
+)
+BEGIN
+    ALTER TABLE [dbo].[login_history] ADD [grid_cell] INT NULL;
+    PRINT 'Added grid_cell column';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'login_history') AND name = 'ix_login_history_login_at_cell'
+)
+BEGIN
+    CREATE INDEX [ix_login_history_login_at_cell]
+        ON [dbo].[login_history] ([login_at], [grid_cell]);
+    PRINT 'Created ix_login_history_login_at_cell';
+END
+GO
+
+-- Backfill: same formula as location_points (migration 010), on the float value
+DECLARE @filled INT = 1;
+WHILE @filled > 0
+BEGIN
+    UPDATE TOP (50000) [dbo].[login_history]
+    SET [grid_cell] =
+        (CASE
+            WHEN FLOOR((CAST([latitude] AS FLOAT) + 90) / 0.01) < 0 THEN 0
+            WHEN FLOOR((CAST([latitude] AS FLOAT) + 90) / 0.01) > 17999 THEN 17999
+            ELSE CAST(FLOOR((CAST([latitude] AS FLOAT) + 90) / 0.01) AS INT)
+        END) * 36000
+        + (CASE
+            WHEN FLOOR((CAST([longitude] AS FLOAT) + 180) / 0.01) < 0 THEN 0
+            WHEN FLOOR((CAST([longitude] AS FLOAT) + 180) / 0.01) > 35999 THEN 35999
+            ELSE CAST(FLOOR((CAST([longitude] AS FLOAT) + 180) / 0.01) AS INT)
+        END)
+    WHERE [grid_cell] IS NULL AND [latitude] IS NOT NULL AND [longitude] IS NOT NULL;
+    SET @filled = @@ROWCOUNT;
+END
+PRINT 'Filled grid_cell of existing logins';
+GO
+
+PRINT 'Migration 012 completed successfully';
@@ -0,0 +1,17 @@
+-- Migration 013: Resolved cell tower position on call_records
+-- Filled on import and by the cell_tower_resolve job from the local cell tower database.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'call_records') AND name = 'cell_lat'
+)
+BEGIN
+    ALTER TABLE [dbo].[call_records] ADD
+        [cell_lat] FLOAT NULL,
+        [cell_lon] FLOAT NULL,
+        [cell_range_m] INT NULL;
+    PRINT 'Added cell_lat, cell_lon, cell_range_m columns';
+END
+GO
+
+PRINT 'Migration 013 completed successfully';
@@ -0,0 +1,26 @@
+-- Migration 014: case_id indexes on money flow tables
+-- Graph analysis loads and fingerprints a whole case graph at a time.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'money_flow_nodes') AND name = 'ix_money_flow_nodes_case_id'
+)
+BEGIN
+    CREATE INDEX [ix_money_flow_nodes_case_id]
+        ON [dbo].[money_flow_nodes] ([case_id]);
+    PRINT 'Created ix_money_flow_nodes_case_id';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'money_flow_edges') AND name = 'ix_money_flow_edges_case_id'
+)
+BEGIN
+    CREATE INDEX [ix_money_flow_edges_case_id]
+        ON [dbo].[money_flow_edges] ([case_id]);
+    PRINT 'Created ix_money_flow_edges_case_id';
+END
+GO
+
+PRINT 'Migration 014 completed successfully';
@@ -0,0 +1,14 @@
+-- Migration 015: Money-flow graph version counter on cases
+-- Bumped by every node/edge write; keys the cached graph and its ETag.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'cases') AND name = 'graph_version'
+)
+BEGIN
+    ALTER TABLE [dbo].[cases] ADD [graph_version] INT NOT NULL DEFAULT 0;
+    PRINT 'Added graph_version column';
+END
+GO
+
+PRINT 'Migration 015 completed successfully';
@@ -0,0 +1,16 @@
+-- Migration 016: Layout positions on call_entities
+-- Filled by the call_network_layout job; kept across network regeneration.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'call_entities') AND name = 'x_position'
+)
+BEGIN
+    ALTER TABLE [dbo].[call_entities] ADD
+        [x_position] FLOAT NULL,
+        [y_position] FLOAT NULL;
+    PRINT 'Added x_position, y_position columns';
+END
+GO
+
+PRINT 'Migration 016 completed successfully';
@@ -0,0 +1,95 @@
+-- Migration 017: Graph change feed (delta sync)
+-- Tombstones for deleted graph objects and (case_id, updated_at) indexes for
+-- "changed since" queries. The composite indexes replace the case_id-only
+-- indexes of migration 014 on the money flow tables.
+
+IF OBJECT_ID(N'graph_tombstones', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[graph_tombstones] (
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [case_id] INT NOT NULL,
+        [graph] NVARCHAR(20) NOT NULL,
+        [object_type] NVARCHAR(20) NOT NULL,
+        [object_id] INT NULL,
+        [deleted_at] DATETIME NOT NULL DEFAULT GETUTCDATE(),
+        
+        CONSTRAINT [FK_graph_tombstones_case] FOREIGN KEY ([case_id])
+            REFERENCES [dbo].[cases]([id]) ON DELETE CASCADE
+    );
+
+    CREATE INDEX [ix_graph_tombstones_case_graph_deleted]
+        ON [dbo].[graph_tombstones] ([case_id], [graph], [deleted_at]);
+
+    PRINT 'Created graph_tombstones table';
+END
+ELSE
+BEGIN
+    PRINT 'graph_tombstones table already exists';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'money_flow_nodes') AND name = 'ix_money_flow_nodes_case_updated'
+)
+BEGIN
+    CREATE INDEX [ix_money_flow_nodes_case_updated]
+        ON [dbo].[money_flow_nodes] ([case_id], [updated_at]);
+    PRINT 'Created ix_money_flow_nodes_case_updated';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'money_flow_edges') AND name = 'ix_money_flow_edges_case_updated'
+)
+BEGIN
+    CREATE INDEX [ix_money_flow_edges_case_updated]
+        ON [dbo].[money_flow_edges] ([case_id], [updated_at]);
+    PRINT 'Created ix_money_flow_edges_case_updated';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'call_entities') AND name = 'ix_call_entities_case_updated'
+)
+BEGIN
+    CREATE INDEX [ix_call_entities_case_updated]
+        ON [dbo].[call_entities] ([case_id], [updated_at]);
+    PRINT 'Created ix_call_entities_case_updated';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'call_links') AND name = 'ix_call_links_case_updated'
+)
+BEGIN
+    CREATE INDEX [ix_call_links_case_updated]
+        ON [dbo].[call_links] ([case_id], [updated_at]);
+    PRINT 'Created ix_call_links_case_updated';
+END
+GO
+
+IF EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'money_flow_nodes') AND name = 'ix_money_flow_nodes_case_id'
+)
+BEGIN
+    DROP INDEX [ix_money_flow_nodes_case_id] ON [dbo].[money_flow_nodes];
+    PRINT 'Dropped ix_money_flow_nodes_case_id';
+END
+GO
+
+IF EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'money_flow_edges') AND name = 'ix_money_flow_edges_case_id'
+)
+BEGIN
+    DROP INDEX [ix_money_flow_edges_case_id] ON [dbo].[money_flow_edges];
+    PRINT 'Dropped ix_money_flow_edges_case_id';
+END
+GO
+
+PRINT 'Migration 017 completed successfully';
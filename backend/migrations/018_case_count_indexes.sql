@@ -0,0 +1,27 @@
+-- Migration 018: case_id indexes for per-case item counts
+-- The case list counts each case's records with correlated COUNT subqueries;
+-- call_records and crypto_transactions had no index leading with case_id.
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'call_records') AND name = 'ix_call_records_case_id'
+)
+BEGIN
+    CREATE INDEX [ix_call_records_case_id]
+        ON [dbo].[call_records] ([case_id]);
+    PRINT 'Created ix_call_records_case_id';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'crypto_transactions') AND name = 'ix_crypto_transactions_case_id'
+)
+BEGIN
+    CREATE INDEX [ix_crypto_transactions_case_id]
+        ON [dbo].[crypto_transactions] ([case_id]);
+    PRINT 'Created ix_crypto_transactions_case_id';
+END
+GO
+
+PRINT 'Migration 018 completed successfully';
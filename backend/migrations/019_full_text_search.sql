@@ -0,0 +1,56 @@
+-- Migration 019: Full-text search for cases, support tickets and users
+-- Replaces ilike('%term%') table scans in the list endpoints (app/services/search.py).
+-- CHANGE_TRACKING AUTO keeps the indexes in sync with writes. The KEY INDEX must
+-- be the table's primary key index, whose generated name is looked up here.
+-- SQLite uses FTS5 tables created at startup instead.
+
+IF NOT EXISTS (SELECT * FROM sys.fulltext_catalogs WHERE name = 'investigates_search')
+BEGIN
+    CREATE FULLTEXT CATALOG [investigates_search];
+    PRINT 'Created investigates_search catalog';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(N'cases'))
+BEGIN
+    DECLARE @pk SYSNAME = (
+        SELECT name FROM sys.indexes
+        WHERE object_id = OBJECT_ID(N'cases') AND is_primary_key = 1
+    );
+    EXEC(N'CREATE FULLTEXT INDEX ON [dbo].[cases]
+        ([case_number], [title] LANGUAGE 1054, [description] LANGUAGE 1054)
+        KEY INDEX [' + @pk + N'] ON [investigates_search]
+        WITH CHANGE_TRACKING AUTO');
+    PRINT 'Created full-text index on cases';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(N'support_tickets'))
+BEGIN
+    DECLARE @pk SYSNAME = (
+        SELECT name FROM sys.indexes
+        WHERE object_id = OBJECT_ID(N'support_tickets') AND is_primary_key = 1
+    );
+    EXEC(N'CREATE FULLTEXT INDEX ON [dbo].[support_tickets]
+        ([ticket_number], [subject] LANGUAGE 1054, [description] LANGUAGE 1054)
+        KEY INDEX [' + @pk + N'] ON [investigates_search]
+        WITH CHANGE_TRACKING AUTO');
+    PRINT 'Created full-text index on support_tickets';
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(N'users'))
+BEGIN
+    DECLARE @pk SYSNAME = (
+        SELECT name FROM sys.indexes
+        WHERE object_id = OBJECT_ID(N'users') AND is_primary_key = 1
+    );
+    EXEC(N'CREATE FULLTEXT INDEX ON [dbo].[users]
+        ([email], [first_name] LANGUAGE 1054, [last_name] LANGUAGE 1054)
+        KEY INDEX [' + @pk + N'] ON [investigates_search]
+        WITH CHANGE_TRACKING AUTO');
+    PRINT 'Created full-text index on users';
+END
+GO
+
+PRINT 'Migration 019 completed successfully';
@@ -0,0 +1,15 @@
+-- Migration 020: Token version on users
+-- Carried in JWTs as the "tv" claim; bumping it revokes every issued token
+-- of the user (password reset, deactivation).
+
+IF NOT EXISTS (
+    SELECT * FROM sys.columns
+    WHERE object_id = OBJECT_ID(N'users') AND name = 'token_version'
+)
+BEGIN
+    ALTER TABLE [dbo].[users] ADD [token_version] INT NOT NULL DEFAULT 0;
+    PRINT 'Added token_version column';
+END
+GO
+
+PRINT 'Migration 020 completed successfully';
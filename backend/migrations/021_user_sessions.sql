@@ -0,0 +1,53 @@
+-- Migration 021: Server-side sessions
+-- One row per login; the access/refresh tokens carry session_token as the
+-- "sid" claim. Workers poll recently ended sessions into their in-memory
+-- denylist (is_active = 0, expired_at >= last sync).
+
+IF OBJECT_ID(N'user_sessions', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[user_sessions] (
+        [id] INT IDENTITY(1,1) PRIMARY KEY,
+        [user_id] INT NOT NULL,
+        
+        -- Session Info
+        [session_token] NVARCHAR(255) NOT NULL,
+        [device_id] NVARCHAR(255) NULL,
+        [device_info] NVARCHAR(MAX) NULL,
+        [ip_address] NVARCHAR(50) NULL,
+        [user_agent] NVARCHAR(500) NULL,
+        
+        -- Status
+        [is_active] BIT NULL DEFAULT 1,
+        
+        -- Timestamps
+        [created_at] DATETIME NULL DEFAULT GETUTCDATE(),
+        [last_active_at] DATETIME NULL DEFAULT GETUTCDATE(),
+        [expired_at] DATETIME NULL,
+        
+        CONSTRAINT [FK_user_sessions_user] FOREIGN KEY ([user_id])
+            REFERENCES [dbo].[users]([id])
+    );
+
+    CREATE UNIQUE INDEX [ix_user_sessions_session_token] ON [dbo].[user_sessions] ([session_token]);
+    CREATE INDEX [ix_user_sessions_user_id] ON [dbo].[user_sessions] ([user_id]);
+
+    PRINT 'Created user_sessions table';
+END
+ELSE
+BEGIN
+    PRINT 'user_sessions table already exists';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'user_sessions') AND name = 'ix_user_sessions_active_expired'
+)
+BEGIN
+    CREATE INDEX [ix_user_sessions_active_expired]
+        ON [dbo].[user_sessions] ([is_active], [expired_at]);
+    PRINT 'Created ix_user_sessions_active_expired';
+END
+GO
+
+PRINT 'Migration 021 completed successfully';
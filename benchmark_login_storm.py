@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+InvestiGate API - Login Storm Benchmark
+Measures latency of unrelated endpoints while many logins run at once.
+
+Every login computes a bcrypt hash check (~200ms of CPU). If that work runs
+on the event loop, each login stalls every other request on the worker;
+this script shows it as p99 of the probe endpoints.
+
+Phases:
+    1. baseline - probes only
+    2. storm    - probes while --logins threads log in back to back
+
+Usage:
+    pip install httpx
+    uvicorn app.main:app --port 8000          (from backend/)
+    python benchmark_login_storm.py --url http://localhost:8000/api/v1
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import httpx
+
+ADMIN_EMAIL = "admin@test.com"
+ADMIN_PASSWORD = "admin123"
+
+# Colors
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+CYAN = '\033[96m'
+NC = '\033[0m'
+
+
+def header(title):
+    print(f"\n{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}  {title}{NC}")
+    print(f"{BLUE}{'='*60}{NC}")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def probe(client, url, headers, stop, latencies, interval):
+    """Request `url` every `interval` seconds, recording latency in ms"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        r = client.get(url, headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        if r.status_code == 200:
+            latencies.append(elapsed)
+        time.sleep(max(0.0, interval - elapsed / 1000))
+
+
+def login_loop(client, api_url, stop, counter, lock):
+    while not stop.is_set():
+        r = client.post(f"{api_url}/auth/login", json={
+            "email": ADMIN_EMAIL,
+            "password": ADMIN_PASSWORD
+        })
+        if r.status_code == 200:
+            with lock:
+                counter[0] += 1
+
+
+def run_phase(api_url, token, seconds, logins, interval):
+    """Returns ({probe name: latencies}, completed logins)"""
+    health_url = api_url.replace("/api/v1", "/health")
+    probes = {
+        "GET /health": (health_url, {}),
+        "GET /auth/me": (f"{api_url}/auth/me", {"Authorization": f"Bearer {token}"}),
+    }
+    stop = threading.Event()
+    latencies = {name: [] for name in probes}
+    counter, lock = [0], threading.Lock()
+    threads = []
+    with httpx.Client(timeout=60, limits=httpx.Limits(max_connections=logins + len(probes) + 4)) as client:
+        for name, (url, headers) in probes.items():
+            threads.append(threading.Thread(
+                target=probe, args=(client, url, headers, stop, latencies[name], interval)
+            ))
+        for _ in range(logins):
+            threads.append(threading.Thread(target=login_loop, args=(client, api_url, stop, counter, lock)))
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+    return latencies, counter[0]
+
+
+def report(latencies, logins_done, seconds):
+    for name, values in latencies.items():
+        if not values:
+            print(f"{YELLOW}{name}: no successful requests{NC}")
+            continue
+        print(
+            f"{name:<14} n={len(values):<5} "
+            f"p50={statistics.median(values):7.1f}ms  "
+            f"p95={percentile(values, 95):7.1f}ms  "
+            f"p99={percentile(values, 99):7.1f}ms  "
+            f"max={max(values):7.1f}ms"
+        )
+    if logins_done:
+        print(f"{CYAN}logins: {logins_done} ({logins_done / seconds:.1f}/s){NC}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p99 of unrelated endpoints during a login storm")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1", help="API base URL")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each phase")
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login threads during the storm")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between probe requests")
+    args = parser.parse_args()
+
+    print(f"\n{CYAN}InvestiGate Login Storm Benchmark{NC}")
+    print(f"{CYAN}API URL: {args.url}{NC}")
+
+    httpx.post(f"{args.url}/auth/seed-admin", timeout=30)
+    r = httpx.post(f"{args.url}/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}, timeout=30)
+    r.raise_for_status()
+    token = r.json()["tokens"]["access_token"]
+
+    header("1. Baseline (no logins)")
+    latencies, _ = run_phase(args.url, token, args.seconds, 0, args.interval)
+    report(latencies, 0, args.seconds)
+
+    header(f"2. Login storm ({args.logins} concurrent logins)")
+    latencies, logins_done = run_phase(args.url, token, args.seconds, args.logins, args.interval)
+    report(latencies, logins_done, args.seconds)
+    print(f"\n{GREEN}Done{NC}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,36 @@
+  const handlePermanentDelete = async () => {
+    if (!deletingCase) return;
+
+    const caseId = deletingCase.id;
+    setIsProcessing(true);
+    try {
+      // The purge runs as a background job - keep the row marked as
+      // deleting until it finishes, then re-list
+      const submitted = await casesAPI.permanentDelete(caseId);
+      setDeletingCase(null);
+      setIsProcessing(false);
+      setPurging((prev) => ({ ...prev, [caseId]: 0 }));
+
+      const job = await jobsAPI.waitFor(submitted.job_id, (j) =>
+        setPurging((prev) => ({ ...prev, [caseId]: j.progress }))
+      );
+      if (job.status !== 'completed') {
+        alert(`Permanent delete ${job.status}: ${job.error || job.message || ''}`);
+      }
+      fetchDeletedCases();
+    } catch (error: any) {
+      console.error('Error permanently deleting case:', error);
+      alert(error.response?.data?.detail || 'Error permanently deleting case');
+    } finally {
+      setIsProcessing(false);
+      setPurging((prev) => {
+        const next = { ...prev };
+        delete next[caseId];
+        return next;
+      });
+    }
+  };
+
 /**
  * DeletedCases - Admin Page for Managing Deleted Cases
  * Features:
@@ -20,7 +53,7 @@ import {
   XCircle
 } from 'lucide-react';
 import { Button, Input } from '../../components/ui';
-import { casesAPI, type DeletedCase } from '../../services/api';
+import { casesAPI, jobsAPI, type DeletedCase } from '../../services/api';
 import { useAuthStore } from '../../store/authStore';
 
 // ============================================
@@ -237,6 +270,9 @@ export const DeletedCases = () => {
   const [deletingCase, setDeletingCase] = useState<DeletedCase | null>(null);
   const [isProcessing, setIsProcessing] = useState(false);
 
+  // Cases whose purge job is still running (case id -> progress %)
+  const [purging, setPurging] = useState<Record<number, number>>({});
+
   // Fetch deleted cases
   const fetchDeletedCases = async () => {
     try {
@@ -267,9 +303,9 @@ export const DeletedCases = () => {
       await casesAPI.restore(restoringCase.id);
       setRestoringCase(null);
       fetchDeletedCases();
-    } catch (error) {
+    } catch (error: any) {
       console.error('Error restoring case:', error);
-      alert('Error restoring case');
+      alert(error.response?.data?.detail || 'Error restoring case');
     } finally {
       setIsProcessing(false);
     }
@@ -386,26 +422,35 @@ export const DeletedCases = () => {
                   </td>
                   <td className="px-4 py-4">
                     <div className="flex items-center justify-center gap-2">
-                      {/* Restore Button */}
-                      <button
-                        onClick={() => setRestoringCase(case_)}
-                        className="flex items-center gap-1.5 px-3 py-1.5 bg-green-500/20 text-green-400 rounded-lg hover:bg-green-500/30 transition-colors text-sm"
-                        title="Restore"
-                      >
-                        <RotateCcw size={14} />
-                        Restore
-                      </button>
-
-                      {/* Permanent Delete Button (Super Admin Only) */}
-                      {isSuperAdmin && (
-                        <button
-                          onClick={() => setDeletingCase(case_)}
-                          className="flex items-center gap-1.5 px-3 py-1.5 bg-red-500/20 text-red-400 rounded-lg hover:bg-red-500/30 transition-colors text-sm"
-                          title="Permanently Delete"
-                        >
-                          <Trash2 size={14} />
-                          Permanently Delete
-                        </button>
+                      {purging[case_.id] !== undefined ? (
+                        <span className="flex items-center gap-1.5 px-3 py-1.5 text-red-400 text-sm">
+                          <Loader2 size={14} className="animate-spin" />
+                          Deleting... {purging[case_.id]}%
+                        </span>
+                      ) : (
+                        <>
+                          {/* Restore Button */}
+                          <button
+                            onClick={() => setRestoringCase(case_)}
+                            className="flex items-center gap-1.5 px-3 py-1.5 bg-green-500/20 text-green-400 rounded-lg hover:bg-green-500/30 transition-colors text-sm"
+                            title="Restore"
+                          >
+                            <RotateCcw size={14} />
+                            Restore
+                          </button>
+
+                          {/* Permanent Delete Button (Super Admin Only) */}
+                          {isSuperAdmin && (
+                            <button
+                              onClick={() => setDeletingCase(case_)}
+                              className="flex items-center gap-1.5 px-3 py-1.5 bg-red-500/20 text-red-400 rounded-lg hover:bg-red-500/30 transition-colors text-sm"
+                              title="Permanently Delete"
+                            >
+                              <Trash2 size={14} />
+                              Permanently Delete
+                            </button>
+                          )}
+                        </>
                       )}
                     </div>
                   </td>
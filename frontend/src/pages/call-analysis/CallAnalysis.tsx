@@ -37,6 +37,7 @@ import {
 } from 'lucide-react';
 import { Button, CaseInfoBar } from '../../components/ui';
 import { useCaseStore } from '../../store/caseStore';
+import { jobsAPI } from '../../services/api';
 
 import cytoscape from "cytoscape";
 // @ts-ignore
@@ -506,8 +507,13 @@ export const CallAnalysis = () => {
         throw new Error('Failed to generate network');
       }
       
-      const result = await response.json();
-      console.log('Network generated:', result);
+      // Generation runs as a background job - wait for it
+      const submitted = await response.json();
+      const job = await jobsAPI.waitFor(submitted.job_id);
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Failed to generate network');
+      }
+      console.log('Network generated:', job.result);
       
       // Refetch network data
       fetchNetworkData();
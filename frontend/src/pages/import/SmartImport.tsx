@@ -6,7 +6,7 @@ import {
   Network, ArrowRight, Trash2, Eye, Sparkles, AlertTriangle, TrendingUp,
   Shield, Settings, Link, Unlink, ChevronDown, ChevronUp
 } from 'lucide-react';
-import { casesAPI, evidenceAPI } from '../../services/api';
+import { casesAPI, evidenceAPI, jobsAPI } from '../../services/api';
 
 // Wallet Info interface for Backend Proxy response
 interface WalletInfo {
@@ -738,7 +738,6 @@ const SmartImport: React.FC = () => {
       // ============================================
       if (bankFiles.length > 0) {
         log(`\n💰 Processing Bank Transactions → Money Flow...`);
-        const nodeIdMap = new Map<string, number>();
         
         // Get bank-related entities only
         const bankEntities = analysisResult.entities.filter(e => 
@@ -746,52 +745,39 @@ const SmartImport: React.FC = () => {
         );
         const bankEdges = analysisResult.edges.filter(e => e.edgeType === 'money_transfer');
         
-        log(`  📍 Creating ${bankEntities.length} nodes...`);
-        for (const entity of bankEntities) {
-          try {
-            const response = await fetch(`${baseUrl}/cases/${selectedCase}/money-flow/nodes`, {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
-              body: JSON.stringify({
-                label: entity.label,
-                node_type: entity.type === 'account' ? 'bank_account' : entity.type,
-                risk_score: entity.riskScore,
-                amount: entity.metadata.totalReceived || entity.metadata.totalSent || 0,
-                metadata: JSON.stringify({ riskFactors: entity.riskFactors, sources: entity.sources, ...entity.metadata })
-              })
-            });
-            if (response.ok) {
-              const data = await response.json();
-              nodeIdMap.set(entity.id, data.id);
-              log(`    ✅ ${entity.label}`);
-            }
-          } catch { log(`    ❌ ${entity.label}`); }
-        }
-        
-        log(`  🔗 Creating ${bankEdges.length} edges...`);
-        let edgeSuccess = 0;
-        for (const edge of bankEdges) {
-          const sourceId = nodeIdMap.get(edge.source);
-          const targetId = nodeIdMap.get(edge.target);
-          if (sourceId && targetId) {
-            try {
-              const response = await fetch(`${baseUrl}/cases/${selectedCase}/money-flow/edges`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
-                body: JSON.stringify({
-                  from_node_id: sourceId,
-                  to_node_id: targetId,
-                  edge_type: 'bank_transfer',
-                  label: edge.label,
-                  amount: edge.amount || 0,
-                  transaction_date: edge.date
-                })
-              });
-              if (response.ok) edgeSuccess++;
-            } catch {}
+        // Nodes and edges in one request - edges reference nodes by client id
+        const entityIds = new Set(bankEntities.map(e => e.id));
+        const graphEdges = bankEdges.filter(e => entityIds.has(e.source) && entityIds.has(e.target));
+        log(`  📍 Creating ${bankEntities.length} nodes, ${graphEdges.length} edges...`);
+        try {
+          const response = await fetch(`${baseUrl}/cases/${selectedCase}/money-flow/import`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
+            body: JSON.stringify({
+              nodes: bankEntities.map(entity => ({
+                temp_id: entity.id,
+                label: (entity.label || entity.value || entity.id).slice(0, 255),
+                node_type: entity.type === 'account' ? 'bank_account' : entity.type === 'wallet' ? 'crypto_wallet' : entity.type,
+                // The import is atomic - keep every node valid
+                risk_score: Math.min(100, Math.max(0, Math.round(entity.riskScore || 0)))
+              })),
+              edges: graphEdges.map(edge => ({
+                from_temp_id: edge.source,
+                to_temp_id: edge.target,
+                edge_type: 'bank_transfer',
+                label: edge.label,
+                amount: edge.amount || 0,
+                transaction_date: edge.date
+              }))
+            })
+          });
+          if (response.ok) {
+            const result = await response.json();
+            log(`  ✅ Money Flow: ${result.nodes_created} nodes, ${result.edges_created} edges`);
+          } else {
+            log(`  ❌ Money Flow import failed (${response.status})`);
           }
-        }
-        log(`  ✅ Money Flow: ${bankEntities.length} nodes, ${edgeSuccess} edges`);
+        } catch { log(`  ❌ Money Flow import failed`); }
       }
       
       // Save Evidence (Chain of Custody)
@@ -896,8 +882,13 @@ const SmartImport: React.FC = () => {
               headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` }
             });
             if (genResponse.ok) {
-              const genResult = await genResponse.json();
-              log(`  ✅ Network: ${genResult.entities_created} entities, ${genResult.links_created} links`);
+              const submitted = await genResponse.json();
+              const job = await jobsAPI.waitFor(submitted.job_id);
+              if (job.status === 'completed') {
+                log(`  ✅ Network: ${job.result.entities_created} entities, ${job.result.links_created} links`);
+              } else {
+                log(`  ⚠️ Failed to generate network`);
+              }
             }
           } catch (err) {
             log(`  ⚠️ Failed to generate network`);
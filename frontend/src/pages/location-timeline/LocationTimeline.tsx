@@ -64,6 +64,11 @@ const DEFAULT_SOURCE_CONFIG = { color: '#F3F4F6', borderColor: '#6B7280', icon:
 // Get source config with fallback
 const getSourceConfig = (source: string) => SOURCE_CONFIG[source] || DEFAULT_SOURCE_CONFIG;
 
+// Tracks are simplified for this zoom level (same as playback fly-to zoom)
+const TIMELINE_ZOOM = 15;
+// From this zoom on, all raw points in the viewport are loaded as a detail layer
+const DETAIL_MIN_ZOOM = 16;
+
 // Speed options
 const SPEED_OPTIONS = [
   { value: 0.5, label: '0.5x' },
@@ -115,7 +120,7 @@ export const LocationTimeline = () => {
       
       try {
         const response = await fetch(
-          `${API_BASE}/locations/case/${selectedCaseId}/timeline`,
+          `${API_BASE}/locations/case/${selectedCaseId}/timeline?zoom=${TIMELINE_ZOOM}`,
           { headers }
         );
         
@@ -165,6 +170,7 @@ export const LocationTimeline = () => {
   const trailPolylineRef = useRef<any>(null);
   const fullPolylineRef = useRef<any>(null);
   const pulseMarkerRef = useRef<any>(null);
+  const detailLayerRef = useRef<any>(null);
 
   // Get unique persons
   const persons = useMemo(() => {
@@ -269,6 +275,68 @@ export const LocationTimeline = () => {
     updateMarkers();
   }, [mapLoaded]);
 
+  // Detail layer: raw points of the visible area when zoomed in
+  useEffect(() => {
+    const L = (window as any).L;
+    const map = mapInstanceRef.current;
+    if (!L || !map || !selectedCaseId) return;
+
+    let controller: AbortController | null = null;
+
+    const loadDetail = async () => {
+      controller?.abort();
+      if (detailLayerRef.current) {
+        detailLayerRef.current.remove();
+        detailLayerRef.current = null;
+      }
+      if (map.getZoom() < DETAIL_MIN_ZOOM) return;
+
+      controller = new AbortController();
+      const bounds = map.getBounds();
+      const params = new URLSearchParams({
+        south: String(bounds.getSouth()),
+        west: String(bounds.getWest()),
+        north: String(bounds.getNorth()),
+        east: String(bounds.getEast()),
+      });
+      try {
+        const response = await fetch(
+          `${API_BASE}/locations/case/${selectedCaseId}/points/bbox?${params}`,
+          {
+            headers: { 'Authorization': `Bearer ${localStorage.getItem('access_token')}` },
+            signal: controller.signal
+          }
+        );
+        if (!response.ok) return;
+        const data = await response.json();
+        const layer = L.layerGroup();
+        data.points.forEach((p: any) => {
+          const config = getSourceConfig(p.source);
+          L.circleMarker([p.lat, p.lng], {
+            radius: 3,
+            color: config.borderColor,
+            weight: 1,
+            fillOpacity: 0.6,
+          })
+            .bindTooltip(`${p.personName || ''} ${p.timestamp ? new Date(p.timestamp).toLocaleString('en-US') : ''}`)
+            .addTo(layer);
+        });
+        layer.addTo(map);
+        detailLayerRef.current = layer;
+      } catch (err) {
+        if ((err as Error).name !== 'AbortError') {
+          console.error('Error loading detail points:', err);
+        }
+      }
+    };
+
+    map.on('moveend', loadDetail);
+    return () => {
+      controller?.abort();
+      map.off('moveend', loadDetail);
+    };
+  }, [mapLoaded, selectedCaseId]);
+
   // Update trail line (animated path)
   const updateTrailLine = useCallback((upToIndex: number) => {
     const L = (window as any).L;
@@ -272,6 +272,12 @@ export const usersAPI = {
     const response = await api.post(`/users/${id}/cancel-subscription`);
     return response.data;
   },
+
+  // Admin: End all sessions of a user
+  signOut: async (id: number): Promise<{ message: string; user_id: number; sessions_ended: number }> => {
+    const response = await api.post(`/users/${id}/sign-out`);
+    return response.data;
+  },
 };
 
 // ============== Organizations API ==============
@@ -351,6 +357,10 @@ export interface Case {
   updated_at: string;
   nodes_count?: number;
   edges_count?: number;
+  call_records_count?: number;
+  locations_count?: number;
+  crypto_transactions_count?: number;
+  evidence_count?: number;
   // Soft Delete fields
   is_active?: boolean;
   deleted_at?: string;
@@ -477,9 +487,26 @@ export const casesAPI = {
     return response.data;
   },
 
-  // ★ SUPER ADMIN: Permanent delete
-  permanentDelete: async (id: number): Promise<void> => {
-    await api.delete(`/cases/${id}/permanent`);
+  // ★ SUPER ADMIN: Permanent delete (background job - poll jobsAPI)
+  permanentDelete: async (id: number): Promise<JobSubmitResponse> => {
+    const response = await api.delete(`/cases/${id}/permanent`);
+    return response.data;
+  },
+
+  // Export case with all data as a zip bundle
+  exportBundle: async (id: number): Promise<Blob> => {
+    const response = await api.get(`/cases/${id}/export`, { responseType: 'blob' });
+    return response.data;
+  },
+
+  // Import a bundle into a new case (background job - poll jobsAPI)
+  importBundle: async (file: File): Promise<JobSubmitResponse> => {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await api.post('/cases/import', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
   },
 };
 
@@ -542,6 +569,18 @@ export interface MoneyFlowGraph {
   victims_count: number;
 }
 
+// Delta sync: apply deleted ids first, then upsert nodes/edges; reset = replace everything
+export interface MoneyFlowChanges {
+  case_id: number;
+  cursor: string;
+  graph_version: number;
+  reset: boolean;
+  nodes: MoneyFlowNode[];
+  edges: MoneyFlowEdge[];
+  deleted_node_ids: number[];
+  deleted_edge_ids: number[];
+}
+
 export const moneyFlowAPI = {
   // Get complete graph
   getGraph: async (caseId: number): Promise<MoneyFlowGraph> => {
@@ -549,6 +588,12 @@ export const moneyFlowAPI = {
     return response.data;
   },
 
+  // Changes since the cursor of the previous call (full graph when omitted)
+  getChanges: async (caseId: number, since?: string): Promise<MoneyFlowChanges> => {
+    const response = await api.get(`/cases/${caseId}/money-flow/changes`, { params: since ? { since } : undefined });
+    return response.data;
+  },
+
   // Nodes
   listNodes: async (caseId: number): Promise<MoneyFlowNode[]> => {
     const response = await api.get(`/cases/${caseId}/money-flow/nodes`);
@@ -574,11 +619,26 @@ export const moneyFlowAPI = {
     await api.delete(`/cases/${caseId}/money-flow/nodes/${nodeId}`);
   },
 
-  updateNodePositions: async (caseId: number, positions: { id: number; x: number; y: number }[]): Promise<MoneyFlowNode[]> => {
+  // Nodes + edges in one transaction; edges reference nodes by client temp id
+  importGraph: async (caseId: number, graph: {
+    nodes: (Partial<MoneyFlowNode> & { temp_id: string })[];
+    edges: Record<string, unknown>[];
+  }): Promise<{ node_ids: Record<string, number>; edge_ids: Record<string, number>; nodes_created: number; edges_created: number }> => {
+    const response = await api.post(`/cases/${caseId}/money-flow/import`, graph);
+    return response.data;
+  },
+
+  updateNodePositions: async (caseId: number, positions: { id: number; x: number; y: number }[]): Promise<{ updated: number; missing: number[] }> => {
     const response = await api.patch(`/cases/${caseId}/money-flow/nodes/positions`, { positions });
     return response.data;
   },
 
+  // Server-side force-directed layout (background job - poll with jobsAPI.waitFor)
+  layoutGraph: async (caseId: number, params?: { incremental?: boolean; iterations?: number }): Promise<JobSubmitResponse> => {
+    const response = await api.post(`/cases/${caseId}/money-flow/layout`, null, { params });
+    return response.data;
+  },
+
   // Edges
   listEdges: async (caseId: number): Promise<MoneyFlowEdge[]> => {
     const response = await api.get(`/cases/${caseId}/money-flow/edges`);
@@ -1037,6 +1097,24 @@ export interface LoginMapResponse {
   unique_locations: number;
 }
 
+export interface MapCell {
+  lat: number;
+  lng: number;
+  count: number;
+  people: number;
+  firstSeen: string | null;
+  lastSeen: string | null;
+  bounds: [number, number, number, number];  // south, west, north, east
+}
+
+export interface LoginMapCellsResponse {
+  cells: MapCell[];
+  cell_count: number;
+  total_logins: number;
+  cell_degrees: number;
+  zoom: number;
+}
+
 export interface LoginStats {
   total_logins_today: number;
   total_logins_week: number;
@@ -1066,6 +1144,19 @@ export const loginHistoryAPI = {
     return response.data;
   },
 
+  // Get logins aggregated into grid cells for a zoom level (optionally a bbox)
+  getMapCells: async (params: {
+    zoom: number;
+    days?: number;
+    south?: number;
+    west?: number;
+    north?: number;
+    east?: number;
+  }): Promise<LoginMapCellsResponse> => {
+    const response = await api.get('/login-history/map/cells', { params });
+    return response.data;
+  },
+
   // Get stats
   getStats: async (): Promise<LoginStats> => {
     const response = await api.get('/login-history/stats');
@@ -1648,5 +1739,71 @@ export const twoFactorAPI = {
   },
 };
 
+// ============================================
+// Background Jobs API
+// ============================================
+
+export type JobStatus = 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
+
+export interface BackgroundJob {
+  id: number;
+  job_type: string;
+  case_id: number | null;
+  created_by: number | null;
+  status: JobStatus;
+  progress: number;
+  message: string | null;
+  cancel_requested: boolean;
+  result: any;
+  error: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  updated_at: string | null;
+}
+
+export interface JobSubmitResponse {
+  job_id: number;
+  job_type: string;
+  status: JobStatus;
+  message: string;
+}
+
+export const jobsAPI = {
+  // List recent jobs
+  list: async (params?: { case_id?: number; job_type?: string; status?: JobStatus; limit?: number }): Promise<BackgroundJob[]> => {
+    const response = await api.get('/jobs', { params });
+    return response.data;
+  },
+
+  // Get job status/progress
+  get: async (jobId: number): Promise<BackgroundJob> => {
+    const response = await api.get(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Request cancellation
+  cancel: async (jobId: number): Promise<BackgroundJob> => {
+    const response = await api.post(`/jobs/${jobId}/cancel`);
+    return response.data;
+  },
+
+  // Poll until the job is finished
+  waitFor: async (
+    jobId: number,
+    onProgress?: (job: BackgroundJob) => void,
+    intervalMs = 1000
+  ): Promise<BackgroundJob> => {
+    for (;;) {
+      const job = await jobsAPI.get(jobId);
+      onProgress?.(job);
+      if (job.status === 'completed' || job.status === 'failed' || job.status === 'cancelled') {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+};
+
 // Export default api instance
 export default api;